@@ -0,0 +1,344 @@
+"""
+Bulk ingestion of a corpus into a hybrid (dense + BM25) index.
+
+    python bulk_upsert.py corpus.jsonl --backend local --index-dir ./local_index
+    python bulk_upsert.py corpus.txt --backend pinecone --workers 16
+    python bulk_upsert.py corpus.jsonl --backend mock --failure-rate 0.05
+
+The corpus is streamed from disk: JSON lines ({"text": ..., "id": ..., "metadata": {...}},
+id and metadata optional) or plain text with one document per line. BM25 is
+fitted in a first streaming pass (or loaded with --bm25). The second pass
+encodes dense and sparse vectors in batches and hands size-bounded upsert
+requests to a thread pool. Failed requests are retried with exponential
+backoff. Each request first fetches the ids it sends for the first time, so
+the run knows how many vectors are really new (re-runs and duplicate lines
+overwrite instead of adding). At the end, vector counts are polled (again
+with backoff) until the index reports the new vectors. Apart from the set of
+ids seen, nothing holds more than a few batches in memory.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Documents embedded + BM25-encoded per round
+ENCODE_BATCH_SIZE = 256
+# Pinecone limits: 1000 vectors and 2 MB per upsert request; stay well below
+UPSERT_BATCH_SIZE = 100
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+UPSERT_WORKERS = 8
+MAX_RETRIES = 6
+# Metadata field holding the text (what PineconeHybridSearchRetriever reads back)
+TEXT_KEY = "context"
+
+Doc = Tuple[Optional[str], str, dict]
+
+
+def backoff_delays(initial: float = 0.1, factor: float = 2.0, max_delay: float = 5.0, jitter: bool = True) -> Iterator[float]:
+    """initial, initial*factor, ... capped at max_delay; with jitter each delay is scaled by 0.5-1."""
+    delay = initial
+    while True:
+        yield delay * random.uniform(0.5, 1.0) if jitter else delay
+        delay = min(delay * factor, max_delay)
+
+
+def hash_text(text: str) -> str:
+    # Same id scheme as PineconeHybridSearchRetriever.add_texts, so both paths overwrite each other
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def iter_corpus(path: str) -> Iterator[Doc]:
+    """(id or None, text, metadata) per document, read lazily."""
+    jsonl = path.endswith((".jsonl", ".ndjson"))
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if jsonl:
+                record = json.loads(line)
+                yield record.get("id"), record["text"], record.get("metadata") or {}
+            else:
+                yield None, line, {}
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def estimate_bytes(vector: dict) -> int:
+    """Upper estimate of a vector's size in an upsert request (floats as JSON text)."""
+    sparse = vector.get("sparse_values") or {}
+    return (
+        64
+        + 24 * len(vector["values"])
+        + 32 * len(sparse.get("indices", ()))
+        + len(json.dumps(vector.get("metadata") or {}))
+    )
+
+
+def size_bounded_batches(vectors: Sequence[dict], max_vectors: int = UPSERT_BATCH_SIZE,
+                         max_bytes: int = MAX_REQUEST_BYTES) -> Iterator[List[dict]]:
+    """Split vectors into requests holding at most max_vectors and about max_bytes each."""
+    batch, size = [], 0
+    for vector in vectors:
+        vec_bytes = estimate_bytes(vector)
+        if batch and (len(batch) == max_vectors or size + vec_bytes > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(vector)
+        size += vec_bytes
+    if batch:
+        yield batch
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Throttling, server errors and connection problems; not malformed requests."""
+    status = getattr(exc, "status", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return not isinstance(exc, (ValueError, TypeError, KeyError))
+
+
+def call_with_retry(call: Callable[[], Any], max_retries: int = MAX_RETRIES) -> Tuple[Any, int]:
+    """call(), retrying transient failures; returns (its result, the number of retries used)."""
+    delays = backoff_delays(initial=0.5, max_delay=30.0)
+    for attempt in range(max_retries + 1):
+        try:
+            return call(), attempt
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            time.sleep(next(delays))
+
+
+def upsert_with_retry(index: Any, vectors: List[dict], namespace: Optional[str] = None,
+                      max_retries: int = MAX_RETRIES) -> int:
+    """Upsert one request, retrying transient failures; returns the number of retries used."""
+    return call_with_retry(lambda: index.upsert(vectors=vectors, namespace=namespace), max_retries)[1]
+
+
+def count_existing(index: Any, ids: List[str], namespace: Optional[str] = None,
+                   max_retries: int = MAX_RETRIES) -> Tuple[int, int]:
+    """(how many of `ids` the index already holds, retries used)."""
+    response, retries = call_with_retry(lambda: index.fetch(ids=ids, namespace=namespace), max_retries)
+    return len(_field(response, "vectors") or {}), retries
+
+
+def _field(obj: Any, name: str, default: Any = None) -> Any:
+    # Stats come back as dicts (local/mock) or as SDK response objects (Pinecone)
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def vector_count(index: Any, namespace: Optional[str] = None) -> int:
+    stats = index.describe_index_stats()
+    namespaces = _field(stats, "namespaces") or {}
+    # Newer Pinecone API versions report the default namespace as "__default__"
+    summary = namespaces.get(namespace or "") or (None if namespace else namespaces.get("__default__"))
+    return int(_field(summary, "vector_count", 0)) if summary is not None else 0
+
+
+def wait_for_vector_count(index: Any, target: int, namespace: Optional[str] = None,
+                          timeout_s: float = 300.0, max_delay: float = 5.0) -> int:
+    """Poll (exponential backoff) until the namespace holds at least `target` vectors."""
+    start = time.monotonic()
+    delays = backoff_delays(initial=0.1, max_delay=max_delay)
+    while True:
+        count = vector_count(index, namespace)
+        if count >= target:
+            return count
+        if time.monotonic() - start > timeout_s:
+            raise TimeoutError(f"Index reports {count} vectors, expected {target} after {timeout_s}s")
+        time.sleep(next(delays))
+
+
+@dataclass
+class UpsertStats:
+    docs: int = 0
+    # Distinct ids sent that the index did not hold before the run
+    new_ids: int = 0
+    requests: int = 0
+    retries: int = 0
+    count_before: int = 0
+    encode_s: float = 0.0
+    seconds: float = 0.0
+
+    @property
+    def expected_count(self) -> int:
+        """Vector count once every upsert of the run is visible."""
+        return self.count_before + self.new_ids
+
+    @property
+    def docs_per_s(self) -> float:
+        return self.docs / self.seconds if self.seconds else 0.0
+
+
+def bulk_upsert(
+    index: Any,
+    docs: Iterable[Doc],
+    embeddings: Any,
+    sparse_encoder: Any,
+    namespace: Optional[str] = None,
+    encode_batch: int = ENCODE_BATCH_SIZE,
+    upsert_batch: int = UPSERT_BATCH_SIZE,
+    max_request_bytes: int = MAX_REQUEST_BYTES,
+    workers: int = UPSERT_WORKERS,
+    max_retries: int = MAX_RETRIES,
+    text_key: str = TEXT_KEY,
+    report_every: int = 10_000,
+) -> UpsertStats:
+    """
+    Encode `docs` batch by batch on this thread while earlier batches are
+    upserted by `workers` threads. At most 2 * workers requests are queued,
+    which bounds the memory used by vectors for any corpus size. Ids seen for
+    the first time are looked up with `fetch` before their upsert, so
+    `stats.new_ids` (and `stats.expected_count`) are right for re-runs,
+    resumed runs and corpora with duplicates. The first failed request
+    (after its retries) stops the run and is raised.
+    """
+    stats = UpsertStats(count_before=vector_count(index, namespace))
+    lock = threading.Lock()
+    started = time.perf_counter()
+    next_report = report_every
+    seen: set = set()
+
+    def send(vectors: List[dict], first_seen: List[str]) -> None:
+        existing, retries = count_existing(index, first_seen, namespace, max_retries) if first_seen else (0, 0)
+        retries += upsert_with_retry(index, vectors, namespace, max_retries)
+        with lock:
+            stats.new_ids += len(first_seen) - existing
+            stats.requests += 1
+            stats.retries += retries
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight: set = set()
+
+        def drain(limit: int) -> None:
+            nonlocal in_flight
+            while len(in_flight) > limit:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+
+        try:
+            for batch in batched(docs, encode_batch):
+                texts = [text for _, text, _ in batch]
+                encode_started = time.perf_counter()
+                dense = embeddings.embed_documents(texts)
+                sparse = sparse_encoder.encode_documents(texts)
+                stats.encode_s += time.perf_counter() - encode_started
+
+                vectors = [
+                    {
+                        "id": doc_id or hash_text(text),
+                        "values": [float(x) for x in values],
+                        "sparse_values": {"indices": list(sp["indices"]), "values": [float(x) for x in sp["values"]]},
+                        "metadata": {text_key: text, **metadata},
+                    }
+                    for (doc_id, text, metadata), values, sp in zip(batch, dense, sparse)
+                ]
+                for request in size_bounded_batches(vectors, upsert_batch, max_request_bytes):
+                    # Only the request that first carries an id checks whether it is new
+                    first_seen = []
+                    for vector in request:
+                        if vector["id"] not in seen:
+                            seen.add(vector["id"])
+                            first_seen.append(vector["id"])
+                    drain(2 * workers - 1)
+                    in_flight.add(pool.submit(send, request, first_seen))
+                stats.docs += len(batch)
+
+                if stats.docs >= next_report:
+                    elapsed = time.perf_counter() - started
+                    print(f"  {stats.docs} docs encoded, {stats.requests} requests done, {stats.docs / elapsed:.0f} docs/s")
+                    next_report += report_every
+            drain(0)
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            raise
+
+    stats.seconds = time.perf_counter() - started
+    print(
+        f"Upserted {stats.docs} docs ({stats.new_ids} new ids) in {stats.requests} requests ({stats.retries} retries) "
+        f"in {stats.seconds:.1f}s ({stats.docs_per_s:.0f} docs/s, encoding {stats.encode_s:.1f}s)"
+    )
+    return stats
+
+
+def _get_index(args):
+    if args.backend == "pinecone":
+        from main import get_pinecone_index
+        return get_pinecone_index()
+    if args.backend == "mock":
+        from mock_index import MockPineconeIndex
+        return MockPineconeIndex(failure_rate=args.failure_rate)
+    from local_index import LocalHybridIndex
+    return LocalHybridIndex(args.index_dir)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Stream a corpus into the hybrid index.")
+    parser.add_argument("corpus", help=".jsonl ({'text', 'id'?, 'metadata'?} per line) or text, one doc per line")
+    parser.add_argument("--backend", choices=["pinecone", "local", "mock"], default="local")
+    parser.add_argument("--index-dir", default="./local_index")
+    parser.add_argument("--namespace")
+    parser.add_argument("--bm25", help="load a fitted BM25Encoder instead of fitting on the corpus")
+    parser.add_argument("--encode-batch", type=int, default=ENCODE_BATCH_SIZE)
+    parser.add_argument("--upsert-batch", type=int, default=UPSERT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=UPSERT_WORKERS)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="mock backend: share of failing requests")
+    parser.add_argument("--expect-total", type=int,
+                        help="vector count to wait for; default: count before + ids not yet in the index")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from pinecone_text.sparse import BM25Encoder
+    from main import get_embeddings
+    load_dotenv()
+
+    if args.bm25:
+        bm25 = BM25Encoder().load(args.bm25)
+    else:
+        bm25 = BM25Encoder().fit(text for _, text, _ in iter_corpus(args.corpus))
+        if args.backend == "local":
+            os.makedirs(args.index_dir, exist_ok=True)
+            bm25.dump(os.path.join(args.index_dir, "bm25.json"))
+
+    index = _get_index(args)
+    stats = bulk_upsert(
+        index,
+        iter_corpus(args.corpus),
+        get_embeddings(),
+        bm25,
+        namespace=args.namespace,
+        encode_batch=args.encode_batch,
+        upsert_batch=args.upsert_batch,
+        workers=args.workers,
+    )
+    waited = time.perf_counter()
+    target = args.expect_total if args.expect_total is not None else stats.expected_count
+    count = wait_for_vector_count(index, target, args.namespace, timeout_s=args.timeout)
+    print(f"Index reports {count} vectors ({time.perf_counter() - waited:.1f}s until visible)")
+    if hasattr(index, "save"):
+        index.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,409 @@
+"""
+Local, in-process replacement for the Pinecone hybrid index.
+
+`LocalHybridIndex` implements the part of the Pinecone `Index` API that
+`PineconeHybridSearchRetriever` uses (upsert / query / delete /
+describe_index_stats), plus fetch, so the same retriever runs against either backend:
+
+    index = LocalHybridIndex("./local_index")
+    retriever = PineconeHybridSearchRetriever(embeddings=..., sparse_encoder=bm25, index=index)
+    retriever.add_texts(sentences)
+    index.save()
+
+Scoring is Pinecone's dotproduct over the alpha-scaled query from
+`hybrid_convex_scale`: alpha * dense.q + (1 - alpha) * bm25.q. Dense vectors
+live in a float32 matrix (memory-mapped from disk after a reload) and are
+scored in row blocks. Sparse BM25 vectors go into an inverted index (term ->
+rows, weights), so a query only touches the postings of its own terms.
+"""
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Data files are versioned per save and referenced from meta.json, which is
+# replaced last: a crash mid-save leaves the previous generation intact
+DENSE_FILE = "dense-{}.f32"
+INDEX_FILE = "index-{}.npz"
+META_FILE = "meta.json"
+# Rows scored per matrix-vector product; bounds the memory touched at once
+DENSE_BLOCK_ROWS = 65_536
+# save() rewrites the index without deleted / overwritten rows beyond this share
+COMPACT_DEAD_FRACTION = 0.25
+
+
+FILTER_OPERATORS = ("$eq", "$ne", "$in", "$nin")
+
+
+def _matches(value, op: str, operand) -> bool:
+    # List-valued metadata matches when any element does, as in Pinecone
+    values = value if isinstance(value, list) else [value]
+    if op == "$eq":
+        return operand in values
+    if op == "$ne":
+        return operand not in values
+    if op == "$in":
+        return any(v in operand for v in values)
+    return not any(v in operand for v in values)  # $nin
+
+
+def matches_filter(metadata: dict, filter: dict) -> bool:
+    """
+    Pinecone metadata filter over one vector's metadata. Supported: plain
+    equality ({"genre": "drama"}), $eq / $ne / $in / $nin per field, and
+    $and / $or of such filters. Anything else raises ValueError.
+    """
+    for field, condition in filter.items():
+        if field in ("$and", "$or"):
+            results = (matches_filter(metadata, sub) for sub in condition)
+            if not (all(results) if field == "$and" else any(results)):
+                return False
+            continue
+        if field.startswith("$"):
+            raise ValueError(f"Unsupported filter operator {field!r}")
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(field)
+        for op, operand in condition.items():
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator {op!r}; LocalHybridIndex supports {FILTER_OPERATORS}")
+            if value is None:
+                if op in ("$eq", "$in"):
+                    return False
+                continue
+            if not _matches(value, op, operand):
+                return False
+    return True
+
+
+class LocalHybridIndex:
+    """
+    Dense + sparse vector index with Pinecone's hybrid dotproduct scoring,
+    persisted under `path` by save(). Safe to share between threads.
+    """
+
+    def __init__(self, path: Optional[str] = None, dimension: Optional[int] = None):
+        self.path = path
+        self.dimension = dimension
+        self._lock = threading.RLock()
+        self._count = 0                                  # rows used, live or dead
+        self._dense = np.zeros((0, dimension or 0), dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_ns = np.zeros(0, dtype=np.int32)
+        self._ids: List[str] = []
+        self._metadata: List[dict] = []
+        self._namespaces: Dict[str, int] = {}
+        self._rows: Dict[Tuple[int, str], int] = {}      # (namespace code, id) -> live row
+        # Inverted index in CSR form: postings of _terms[i] are _post_rows/_post_values[_offsets[i]:_offsets[i+1]]
+        self._terms = np.zeros(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._post_rows = np.zeros(0, dtype=np.int64)
+        self._post_values = np.zeros(0, dtype=np.float32)
+        # Postings added since the CSR arrays were last rebuilt
+        self._delta: Dict[int, Tuple[List[int], List[float]]] = {}
+        self._dirty = False
+        self._generation = 0
+        if path and os.path.exists(os.path.join(path, META_FILE)):
+            self._load()
+
+    # --- Pinecone Index API ---
+
+    def upsert(self, vectors: Sequence, namespace: Optional[str] = None, **kwargs) -> dict:
+        """Insert or overwrite vectors given as dicts (id, values, sparse_values, metadata) or tuples."""
+        records = [self._as_record(v) for v in vectors]
+        if not records:
+            return {"upserted_count": 0}
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = len(records[0][1])
+                self._dense = np.zeros((0, self.dimension), dtype=np.float32)
+            dense = np.asarray([values for _, values, _, _ in records], dtype=np.float32)
+            if dense.shape[1] != self.dimension:
+                raise ValueError(f"Vector dimension {dense.shape[1]} does not match index dimension {self.dimension}")
+            ns = self._namespaces.setdefault(namespace or "", len(self._namespaces))
+            start = self._count
+            self._reserve(start + len(records))
+            self._dense[start:start + len(records)] = dense
+            self._alive[start:start + len(records)] = True
+            self._row_ns[start:start + len(records)] = ns
+            for row, (vec_id, _, sparse, metadata) in enumerate(records, start):
+                old = self._rows.get((ns, vec_id))
+                if old is not None:
+                    self._alive[old] = False
+                self._rows[(ns, vec_id)] = row
+                self._ids.append(vec_id)
+                self._metadata.append(dict(metadata or {}))
+                for term, weight in zip(sparse.get("indices", ()), sparse.get("values", ())):
+                    rows, weights = self._delta.setdefault(int(term), ([], []))
+                    rows.append(row)
+                    weights.append(float(weight))
+            self._count += len(records)
+            self._dirty = True
+        return {"upserted_count": len(records)}
+
+    def query(
+        self,
+        vector: Optional[Sequence[float]] = None,
+        sparse_vector: Optional[dict] = None,
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        namespace: Optional[str] = None,
+        filter: Optional[dict] = None,
+        **kwargs,
+    ) -> dict:
+        """
+        Top-k live vectors in `namespace` by dense.vector + sparse.sparse_vector,
+        optionally restricted by a metadata `filter` (see matches_filter).
+        """
+        with self._lock:
+            ns = self._namespaces.get(namespace or "")
+            count = self._count
+            if ns is None or count == 0 or top_k <= 0:
+                return {"matches": [], "namespace": namespace or ""}
+            scores = self._scores(vector, sparse_vector)
+            valid = self._alive[:count] & (self._row_ns[:count] == ns)
+            if filter:
+                rows = np.flatnonzero(valid)
+                valid[rows] = [matches_filter(self._metadata[row], filter) for row in rows.tolist()]
+            scores[~valid] = -np.inf
+            k = min(top_k, int(valid.sum()))
+            if k == 0:
+                return {"matches": [], "namespace": namespace or ""}
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            matches = []
+            for row in top.tolist():
+                match = {"id": self._ids[row], "score": float(scores[row])}
+                if include_metadata:
+                    # A copy: the retriever pops the text out of it
+                    match["metadata"] = dict(self._metadata[row])
+                if include_values:
+                    match["values"] = self._dense[row].tolist()
+                matches.append(match)
+        return {"matches": matches, "namespace": namespace or ""}
+
+    def delete(self, ids: Optional[Sequence[str]] = None, delete_all: bool = False,
+               namespace: Optional[str] = None, **kwargs) -> dict:
+        with self._lock:
+            ns = self._namespaces.get(namespace or "")
+            if ns is None:
+                return {}
+            if delete_all:
+                self._alive[:self._count][self._row_ns[:self._count] == ns] = False
+                self._rows = {key: row for key, row in self._rows.items() if key[0] != ns}
+            for vec_id in ids or ():
+                row = self._rows.pop((ns, vec_id), None)
+                if row is not None:
+                    self._alive[row] = False
+            self._dirty = True
+        return {}
+
+    def fetch(self, ids: Sequence[str], namespace: Optional[str] = None, **kwargs) -> dict:
+        """Live vectors among `ids` (id, values, metadata); unknown ids are left out."""
+        with self._lock:
+            ns = self._namespaces.get(namespace or "")
+            vectors = {}
+            for vec_id in ids:
+                row = self._rows.get((ns, vec_id)) if ns is not None else None
+                if row is not None:
+                    vectors[vec_id] = {"id": vec_id, "values": self._dense[row].tolist(),
+                                       "metadata": dict(self._metadata[row])}
+        return {"vectors": vectors, "namespace": namespace or ""}
+
+    def describe_index_stats(self, **kwargs) -> dict:
+        with self._lock:
+            live = self._alive[:self._count]
+            counts = np.bincount(self._row_ns[:self._count][live], minlength=len(self._namespaces))
+            return {
+                "dimension": self.dimension,
+                "total_vector_count": int(live.sum()),
+                "namespaces": {name: {"vector_count": int(counts[code])} for name, code in self._namespaces.items()},
+            }
+
+    # --- persistence ---
+
+    def save(self) -> None:
+        """
+        Write the index under `path` as a new generation of data files, then
+        switch meta.json to it (atomically) and delete the older generation.
+        Compacts away dead rows first if many.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            if self._count and (self._count - self._alive[:self._count].sum()) / self._count > COMPACT_DEAD_FRACTION:
+                self._compact()
+            self._merge_delta()
+            os.makedirs(self.path, exist_ok=True)
+            count = self._count
+            generation = self._generation + 1
+            dense_file, index_file = DENSE_FILE.format(generation), INDEX_FILE.format(generation)
+            self._write(dense_file, lambda f: self._dense[:count].tofile(f))
+            self._write(index_file, lambda f: np.savez(
+                f,
+                alive=self._alive[:count],
+                row_ns=self._row_ns[:count],
+                terms=self._terms,
+                offsets=self._offsets,
+                post_rows=self._post_rows,
+                post_values=self._post_values,
+            ))
+            meta = {
+                "dimension": self.dimension,
+                "count": count,
+                "generation": generation,
+                "dense_file": dense_file,
+                "index_file": index_file,
+                "namespaces": self._namespaces,
+                "ids": self._ids,
+                "metadata": self._metadata,
+            }
+            self._write(META_FILE, lambda f: f.write(json.dumps(meta).encode("utf-8")))
+            self._generation = generation
+            self._dirty = False
+            if isinstance(self._dense, np.memmap):
+                # Map the new file so the old one is no longer open (Windows can't delete mapped files)
+                self._dense = self._map_dense(dense_file)
+            self._remove_stale({dense_file, index_file})
+
+    def _write(self, name: str, write) -> None:
+        tmp = os.path.join(self.path, name + ".tmp")
+        with open(tmp, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def _remove_stale(self, current: set) -> None:
+        """Delete data files of earlier generations (and leftovers of interrupted saves)."""
+        for name in os.listdir(self.path):
+            if name in current or not name.startswith(("dense-", "index-")):
+                continue
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass  # still in use; retried on the next save
+
+    def _map_dense(self, name: str) -> np.ndarray:
+        # Read-only map: pages are loaded on demand, and only copied into memory on the next upsert
+        return np.memmap(os.path.join(self.path, name), dtype=np.float32, mode="r",
+                         shape=(self._count, self.dimension))
+
+    def _load(self) -> None:
+        with open(os.path.join(self.path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dimension = meta["dimension"]
+        self._count = meta["count"]
+        self._namespaces = meta["namespaces"]
+        self._ids = meta["ids"]
+        self._metadata = meta["metadata"]
+        self._generation = meta["generation"]
+        if self._count:
+            self._dense = self._map_dense(meta["dense_file"])
+        else:
+            self._dense = np.zeros((0, self.dimension or 0), dtype=np.float32)
+        with np.load(os.path.join(self.path, meta["index_file"])) as arrays:
+            self._alive = arrays["alive"].copy()
+            self._row_ns = arrays["row_ns"].copy()
+            self._terms = arrays["terms"]
+            self._offsets = arrays["offsets"]
+            self._post_rows = arrays["post_rows"]
+            self._post_values = arrays["post_values"]
+        self._rows = {
+            (int(ns), self._ids[row]): row
+            for row, ns in zip(np.flatnonzero(self._alive).tolist(), self._row_ns[self._alive].tolist())
+        }
+
+    # --- internals ---
+
+    @staticmethod
+    def _as_record(vector) -> Tuple[str, Sequence[float], dict, Optional[dict]]:
+        if isinstance(vector, dict):
+            return str(vector["id"]), vector["values"], vector.get("sparse_values") or {}, vector.get("metadata")
+        vec_id, values, *rest = vector
+        return str(vec_id), values, {}, rest[0] if rest else None
+
+    def _reserve(self, rows: int) -> None:
+        """Room for `rows` rows in the (in-memory, growable) row arrays."""
+        if rows <= len(self._alive) and not isinstance(self._dense, np.memmap):
+            return
+        capacity = max(rows, 2 * len(self._alive), 1024)
+        dense = np.zeros((capacity, self.dimension), dtype=np.float32)
+        dense[:self._count] = self._dense[:self._count]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._count] = self._alive[:self._count]
+        row_ns = np.zeros(capacity, dtype=np.int32)
+        row_ns[:self._count] = self._row_ns[:self._count]
+        self._dense, self._alive, self._row_ns = dense, alive, row_ns
+
+    def _scores(self, vector, sparse_vector) -> np.ndarray:
+        count = self._count
+        scores = np.zeros(count, dtype=np.float32)
+        if vector is not None:
+            q = np.asarray(vector, dtype=np.float32)
+            for start in range(0, count, DENSE_BLOCK_ROWS):
+                end = min(start + DENSE_BLOCK_ROWS, count)
+                scores[start:end] = self._dense[start:end] @ q
+        if sparse_vector:
+            for term, weight in zip(sparse_vector.get("indices", ()), sparse_vector.get("values", ())):
+                rows, values = self._postings(int(term))
+                # A row holds each term once, so plain fancy-index addition is exact
+                scores[rows] += np.float32(weight) * values
+        return scores
+
+    def _postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        i = np.searchsorted(self._terms, term)
+        if i < len(self._terms) and self._terms[i] == term:
+            lo, hi = self._offsets[i], self._offsets[i + 1]
+            rows, values = self._post_rows[lo:hi], self._post_values[lo:hi]
+        else:
+            rows, values = self._post_rows[:0], self._post_values[:0]
+        extra = self._delta.get(term)
+        if extra:
+            rows = np.concatenate([rows, np.asarray(extra[0], dtype=np.int64)])
+            values = np.concatenate([values, np.asarray(extra[1], dtype=np.float32)])
+        return rows, values
+
+    def _entries(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Every posting as parallel (term, row, value) arrays, CSR and delta together."""
+        terms = [np.repeat(self._terms, np.diff(self._offsets))]
+        rows = [self._post_rows]
+        values = [self._post_values]
+        for term, (r, v) in self._delta.items():
+            terms.append(np.full(len(r), term, dtype=np.int64))
+            rows.append(np.asarray(r, dtype=np.int64))
+            values.append(np.asarray(v, dtype=np.float32))
+        return np.concatenate(terms), np.concatenate(rows), np.concatenate(values)
+
+    def _set_postings(self, terms: np.ndarray, rows: np.ndarray, values: np.ndarray) -> None:
+        order = np.argsort(terms, kind="stable")
+        terms, self._post_rows, self._post_values = terms[order], rows[order], values[order]
+        self._terms, starts = np.unique(terms, return_index=True)
+        self._offsets = np.append(starts, len(terms)).astype(np.int64)
+        self._delta = {}
+
+    def _merge_delta(self) -> None:
+        if self._delta:
+            self._set_postings(*self._entries())
+
+    def _compact(self) -> None:
+        """Drop dead rows and renumber the rest."""
+        keep = np.flatnonzero(self._alive[:self._count])
+        new_row = np.full(self._count, -1, dtype=np.int64)
+        new_row[keep] = np.arange(len(keep))
+        terms, rows, values = self._entries()
+        rows = new_row[rows]
+        live = rows >= 0
+        self._set_postings(terms[live], rows[live], values[live])
+        self._dense = np.ascontiguousarray(self._dense[keep])
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._row_ns = self._row_ns[keep]
+        self._ids = [self._ids[r] for r in keep.tolist()]
+        self._metadata = [self._metadata[r] for r in keep.tolist()]
+        self._count = len(keep)
+        self._rows = {(int(ns), self._ids[r]): r for r, ns in enumerate(self._row_ns.tolist())}
@@ -1,12 +1,11 @@
+import argparse
 import os
 import time
 from dotenv import load_dotenv
 
-# Pinecone (new SDK)
-from pinecone import Pinecone, ServerlessSpec
-
 # LangChain pieces
 from langchain_huggingface import HuggingFaceEmbeddings
+from genai_common import CachedEmbeddings
 
 
 #  Class PineconeHybridSearchRetriever is responsible for searching both symentic and semantic search.
@@ -15,6 +14,14 @@ from langchain_community.retrievers import PineconeHybridSearchRetriever
 # Sparse encoder (BM25/TF-IDF)
 from pinecone_text.sparse import BM25Encoder
 
+# In-process stand-in for the Pinecone index (offline runs, small tenants, latency baseline)
+from local_index import LocalHybridIndex
+
+# Batched, parallel upserts with retries, and count polling instead of fixed sleeps
+from bulk_upsert import backoff_delays, bulk_upsert, wait_for_vector_count
+
+LOCAL_INDEX_DIR = "./local_index"
+
 
 def require_env(name: str) -> str:
     value = os.getenv(name)
@@ -23,9 +30,10 @@ def require_env(name: str) -> str:
     return value
 
 
-def wait_for_index_ready(pc: Pinecone, index_name: str, timeout_s: int = 120) -> None:
-    """Poll until index 'ready' or timeout."""
+def wait_for_index_ready(pc, index_name: str, timeout_s: int = 120) -> None:
+    """Poll (exponential backoff, capped at 5s) until index 'ready' or timeout."""
     start = time.time()
+    delays = backoff_delays(initial=0.5, max_delay=5.0)
     while True:
         desc = pc.describe_index(index_name)
         ready = desc.get("status", {}).get("ready", False)
@@ -33,11 +41,25 @@ def wait_for_index_ready(pc: Pinecone, index_name: str, timeout_s: int = 120) ->
             return
         if time.time() - start > timeout_s:
             raise TimeoutError(f"Index {index_name} not ready after {timeout_s}s")
-        time.sleep(2)
+        time.sleep(next(delays))
 
 
-def main():
-    load_dotenv()
+def get_embeddings() -> CachedEmbeddings:
+    # Uses sentence-transformers/all-MiniLM-L6-v2 (384 dims)
+    # Wrapped in the shared on-disk cache: re-running only embeds new sentences
+    return CachedEmbeddings(
+        HuggingFaceEmbeddings(
+            model_name="sentence-transformers/all-MiniLM-L6-v2",
+            # ensure HF token is visible to sentence-transformers
+            cache_folder=os.path.join(os.getcwd(), ".hf_cache"),
+        ),
+        model_id="hf/sentence-transformers/all-MiniLM-L6-v2",
+    )
+
+
+def get_pinecone_index():
+    # Pinecone (new SDK); only needed for the remote backend
+    from pinecone import Pinecone, ServerlessSpec
 
     # --- 1) Keys / config ---
     # Make sure you set these in a .env file:
@@ -72,15 +94,25 @@ def main():
         print(f"Index '{INDEX_NAME}' already exists")
 
     # Get index handle
-    index = pc.Index(INDEX_NAME)
+    return pc.Index(INDEX_NAME)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid (dense + BM25) search demo.")
+    parser.add_argument("--backend", choices=["pinecone", "local"], default="pinecone",
+                        help="'local' keeps both indexes on disk under --index-dir; no Pinecone account needed")
+    parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    args = parser.parse_args()
+    load_dotenv()
+
+    # --- Index: Pinecone serverless or local (same query/upsert interface) ---
+    if args.backend == "local":
+        index = LocalHybridIndex(args.index_dir)
+    else:
+        index = get_pinecone_index()
 
     # --- 3) Dense embeddings (Hugging Face) ---
-    # Uses sentence-transformers/all-MiniLM-L6-v2 (384 dims)
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/all-MiniLM-L6-v2",
-        # ensure HF token is visible to sentence-transformers
-        cache_folder=os.path.join(os.getcwd(), ".hf_cache"),
-    )
+    embeddings = get_embeddings()
 
     # --- 4) Sparse encoder (BM25 = TF-IDF) ---
     bm25 = BM25Encoder()
@@ -100,6 +132,10 @@ def main():
     # (Optional) persist / load sparse model
     # bm25.dump("bm25.json")
     # bm252 = BM25Encoder().load("bm25.json")
+    if args.backend == "local":
+        # Kept with the local index so a query-only process can load the same encoder
+        os.makedirs(args.index_dir, exist_ok=True)
+        bm25.dump(os.path.join(args.index_dir, "bm25.json"))
 
     # --- 5) Hybrid retriever (dense + sparse) ---
     retriever = PineconeHybridSearchRetriever(
@@ -110,10 +146,15 @@ def main():
     )
 
     # --- 6) Upsert documents ---
+    # Same ids (text hashes) and metadata layout as retriever.add_texts; for big
+    # corpora use `python bulk_upsert.py corpus.jsonl` instead
     print("Upserting documents...")
-    retriever.add_texts(sentences)
-    # Give Pinecone a short moment to index
-    time.sleep(2)
+    stats = bulk_upsert(index, ((None, s, {}) for s in sentences), embeddings, bm25)
+    # Pinecone is eventually consistent: poll until every new sentence is counted
+    wait_for_vector_count(index, stats.expected_count, timeout_s=60)
+    if args.backend == "local":
+        # Local upserts are visible immediately; this only writes them to disk
+        index.save()
     print("Upsert complete")
 
     # --- 7) Testing Code ---
@@ -127,7 +168,9 @@ def main():
     for q in queries:
         print("\n---")
         print(f"Q: {q}")
-        docs = retriever.get_relevant_documents(q)
+        started = time.perf_counter()
+        docs = retriever.invoke(q)
+        print(f"({args.backend}: {(time.perf_counter() - started) * 1000:.1f} ms)")
         for i, d in enumerate(docs, 1):
             # 'page_content' holds the original text
             print(f"{i}. {d.page_content}")
@@ -0,0 +1,86 @@
+"""
+Offline stand-in for a remote Pinecone index, for testing bulk_upsert.py.
+
+`MockPineconeIndex` is a LocalHybridIndex with the behaviour that makes
+remote ingestion hard: per-request latency, Pinecone's request limits,
+random transient errors (HTTP 503 style), and eventually consistent writes.
+An upsert is only counted by describe_index_stats and returned by query
+or fetch after `visibility_delay_s`.
+"""
+import json
+import random
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from local_index import LocalHybridIndex
+
+MAX_VECTORS_PER_REQUEST = 1000
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+
+
+class MockTransientError(Exception):
+    """Retryable failure, shaped like the SDK's API exceptions (has `.status`)."""
+
+    def __init__(self, status: int = 503):
+        super().__init__(f"({status}) Service Unavailable (mock)")
+        self.status = status
+
+
+class MockPineconeIndex(LocalHybridIndex):
+    def __init__(
+        self,
+        latency_s: float = 0.01,
+        failure_rate: float = 0.0,
+        visibility_delay_s: float = 0.5,
+        seed: Optional[int] = None,
+        dimension: Optional[int] = None,
+    ):
+        super().__init__(path=None, dimension=dimension)
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self.visibility_delay_s = visibility_delay_s
+        self._rng = random.Random(seed)
+        self._pending: List[Tuple[float, list, Optional[str]]] = []
+        self._pending_lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def upsert(self, vectors: Sequence, namespace: Optional[str] = None, **kwargs) -> dict:
+        time.sleep(self.latency_s)
+        vectors = list(vectors)
+        if len(vectors) > MAX_VECTORS_PER_REQUEST:
+            raise ValueError(f"{len(vectors)} vectors in one request; the limit is {MAX_VECTORS_PER_REQUEST}")
+        size = len(json.dumps(vectors, default=float))
+        if size > MAX_REQUEST_BYTES:
+            raise ValueError(f"Request of {size} bytes exceeds {MAX_REQUEST_BYTES}")
+        with self._pending_lock:
+            self.requests += 1
+            if self._rng.random() < self.failure_rate:
+                self.failures += 1
+                raise MockTransientError()
+            self._pending.append((time.monotonic() + self.visibility_delay_s, vectors, namespace))
+        return {"upserted_count": len(vectors)}
+
+    def _apply_visible(self) -> None:
+        now = time.monotonic()
+        with self._pending_lock:
+            due = [p for p in self._pending if p[0] <= now]
+            self._pending = [p for p in self._pending if p[0] > now]
+        for _, vectors, namespace in due:
+            super().upsert(vectors, namespace=namespace)
+
+    def query(self, *args, **kwargs) -> dict:
+        time.sleep(self.latency_s)
+        self._apply_visible()
+        return super().query(*args, **kwargs)
+
+    def fetch(self, *args, **kwargs) -> dict:
+        time.sleep(self.latency_s)
+        self._apply_visible()
+        return super().fetch(*args, **kwargs)
+
+    def describe_index_stats(self, **kwargs) -> dict:
+        time.sleep(self.latency_s)
+        self._apply_visible()
+        return super().describe_index_stats(**kwargs)
@@ -2,6 +2,10 @@
 const API_URL = "http://127.0.0.1:8000/complete_once"; // one-shot endpoint
 const DEBOUNCE_MS = 500;
 const MIN_CHARS = 20;  // min length of fragment since last '.' before calling
+// Also ask the in-process n-gram backend and show its answer until the model's arrives
+const LOCAL_FIRST = false;
+// Lets the backend cancel this tab's superseded requests and share identical ones
+const SESSION_ID = (crypto.randomUUID && crypto.randomUUID()) || String(Math.random()).slice(2);
 
 // === INIT QUILL ===
 const quill = new Quill('#editor', { theme: 'snow' });
@@ -145,27 +149,23 @@ async function fetchSuggestion() {
   const signal = inflightController.signal;
 
   const myId = ++latestRequestId;
+  let remoteShown = false;
+
+  if (LOCAL_FIRST) {
+    // no session header: it must not supersede the model request below
+    requestCompletion(rawPrefix, "local", signal, false)
+      .then((text) => {
+        if (text && !remoteShown && myId === latestRequestId) showSuggestion(text);
+      })
+      .catch(() => {});
+  }
 
   try {
-    const res = await fetch(API_URL, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ query: rawPrefix }),
-      signal
-    });
-
-    if (!res.ok) { clearSuggestion(); return; }
-
-    let text = (await res.text() || "").trim();
-    // sanitize to avoid new blocks when showing/inserting
-    text = text.replace(/\r?\n+/g, " ");
-
+    const text = await requestCompletion(rawPrefix, null, signal, true);
     if (myId !== latestRequestId) return; // stale response
-
-    currentSuggestion = text;
-    ensureGhostMounted();
-    ghost.textContent = currentSuggestion;
-    requestAnimationFrame(positionGhostAtCaret);
+    if (text === null) { if (!LOCAL_FIRST) clearSuggestion(); return; }
+    remoteShown = true;
+    showSuggestion(text);
 
   } catch (e) {
     if (e.name !== "AbortError") console.error(e);
@@ -173,6 +173,28 @@ async function fetchSuggestion() {
   }
 }
 
+/** POST the prefix; resolves to the sanitized suggestion, or null on non-200 */
+async function requestCompletion(prefix, backend, signal, withSession) {
+  const headers = { "Content-Type": "application/json" };
+  if (withSession) headers["X-Session-Id"] = SESSION_ID;
+  const res = await fetch(API_URL, {
+    method: "POST",
+    headers,
+    body: JSON.stringify(backend ? { query: prefix, backend } : { query: prefix }),
+    signal
+  });
+  if (res.status !== 200) return null;
+  // sanitize to avoid new blocks when showing/inserting
+  return (await res.text() || "").trim().replace(/\r?\n+/g, " ");
+}
+
+function showSuggestion(text) {
+  currentSuggestion = text;
+  ensureGhostMounted();
+  ghost.textContent = currentSuggestion;
+  requestAnimationFrame(positionGhostAtCaret);
+}
+
 // === EVENTS ===
 ensureGhostMounted();
 
@@ -1,18 +1,22 @@
-from fastapi import FastAPI
-from fastapi.responses import StreamingResponse, PlainTextResponse
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse, PlainTextResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
-
-import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
 from dotenv import load_dotenv
 
-from queryModel import CompleteRequest
-
+# Before the local imports: config.py reads COMPLETION_BACKEND etc. from the environment
 load_dotenv()
 
+from queryModel import CompleteRequest
+from completion_cache import CompletionCache
+from metrics import LatencyStats
+from streaming import StreamHub
+from scheduler import CompletionScheduler
+from backends import BackendRegistry, REFINE_MARKER
+
 app = FastAPI()
 
 # CORS: relax while developing; tighten in prod
@@ -24,38 +28,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
-    raise ValueError(" OPENAI_API_KEY not found. Did you create a .env file?")
+# openai / ollama / ngram / tiered, built on first use (see backends.py)
+backends = BackendRegistry()
 
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    api_key=openai_api_key,
-    temperature=0.2,
-    streaming=True,
-)
 
-prompt = ChatPromptTemplate.from_template(
-    """You are an autocomplete engine.
-User is typing: "{prefix}"
-Most important Continue the text naturally (no preface, don't add single or double quotes, no extra commentary), can also complete the half-word.
-Keep it concise (<= 5 tokens)."""
-)
+@dataclass
+class BackendState:
+    model: object
+    # Answers repeated / extended prefixes without calling the model
+    cache: CompletionCache
+    # Debounces per session and micro-batches /complete_once across users
+    scheduler: CompletionScheduler
+
+
+_states: Dict[str, BackendState] = {}
+cache_hit_latency = LatencyStats()
+upstream_latency = LatencyStats()
+# Shares identical in-flight prefixes and cancels a session's superseded stream
+hub = StreamHub()
+stream_ttft = LatencyStats()
+
+
+def get_backend_state(name: Optional[str]):
+    """(name, state) for the requested backend; 400 if unknown, 503 if it can't be built."""
+    try:
+        resolved, model = backends.get(name)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown backend {name!r}; choose from {backends.names()}")
+    except (ValueError, ImportError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if resolved not in _states:
+        _states[resolved] = BackendState(model, CompletionCache(), CompletionScheduler(model))
+    return resolved, _states[resolved]
 
-chain = prompt | llm | StrOutputParser()
 
 @app.post("/complete")
-async def autocomplete(body: CompleteRequest):
+async def autocomplete(body: CompleteRequest, x_session_id: Optional[str] = Header(default=None)):
+    """
+    Streams a completion. Send X-Session-Id so a newer prefix cancels this client's older stream.
+    With the tiered backend the local suggestion comes first; text after a form feed replaces it.
+    """
     prefix = body.query
+    name, state = get_backend_state(body.backend)
+    started = time.perf_counter()
+    cached = state.cache.lookup(prefix)
 
     async def token_stream():
+        if cached is not None:
+            cache_hit_latency.record(time.perf_counter() - started)
+            # This request still replaces the session's older stream
+            if x_session_id:
+                hub.supersede(x_session_id)
+            yield cached[0]
+            return
+        first = True
         try:
-            async for chunk in chain.astream({"prefix": prefix}):
+            async for chunk in hub.stream(
+                f"{name}\x00{prefix}",
+                lambda: state.model.astream({"prefix": prefix}),
+                session_id=x_session_id,
+                on_complete=lambda text: state.cache.store(prefix, text.rsplit(REFINE_MARKER, 1)[-1]),
+            ):
                 # yield raw text chunks (frontend reads with ReadableStream)
+                if first:
+                    stream_ttft.record(time.perf_counter() - started)
+                    first = False
                 yield chunk
         except Exception as e:
             # surface error as text in the stream
             yield f"[error] {type(e).__name__}: {e}"
+            return
+        upstream_latency.record(time.perf_counter() - started)
 
     # Use event-stream to avoid browser buffering; keep raw chunks (no "data:" prefix)
     return StreamingResponse(
@@ -69,6 +112,40 @@ async def autocomplete(body: CompleteRequest):
 
 # Optional: one-shot endpoint for quick debugging
 @app.post("/complete_once")
-async def complete_once(body: CompleteRequest):
-    text = await chain.ainvoke({"prefix": body.query})
+async def complete_once(body: CompleteRequest, x_session_id: Optional[str] = Header(default=None)):
+    """One-shot completion. Requests are debounced per X-Session-Id and batched; superseded ones get 204."""
+    name, state = get_backend_state(body.backend)
+    started = time.perf_counter()
+    cached = state.cache.lookup(body.query)
+    if cached is not None:
+        cache_hit_latency.record(time.perf_counter() - started)
+        return PlainTextResponse(cached[0])
+    # Only the n-gram completer itself; tiered mode still goes through debounce, batching and the cache
+    if getattr(state.model, "is_local", False) is True:
+        return PlainTextResponse(await state.model.ainvoke({"prefix": body.query}))
+    text = await state.scheduler.submit(body.query, session_id=x_session_id)
+    if text is None:
+        return Response(status_code=204)
+    upstream_latency.record(time.perf_counter() - started)
+    state.cache.store(body.query, text)
     return PlainTextResponse(text)
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "default_backend": backends.default,
+        "streams": hub.stats(),
+        "backends": {
+            name: {
+                "cache": state.cache.stats(),
+                "batching": state.scheduler.stats(),
+                "ttft_once": state.scheduler.ttft.summary(),
+            }
+            for name, state in _states.items()
+        },
+        "latency": {
+            "cache_hit": cache_hit_latency.summary(),
+            "upstream": upstream_latency.summary(),
+            "ttft_stream": stream_ttft.summary(),
+        },
+    }
@@ -0,0 +1,243 @@
+"""
+Completion backends behind /complete and /complete_once.
+
+Every backend exposes the slice of the LangChain Runnable interface the app
+uses, taking {"prefix": ...} inputs: astream, ainvoke and abatch. Model
+backends are plain LangChain chains; the local n-gram completer and the
+tiered combinator implement the same three methods.
+"""
+import asyncio
+import bisect
+import os
+import re
+from collections import Counter, defaultdict
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import (
+    COMPLETION_BACKEND,
+    OPENAI_MODEL,
+    OLLAMA_MODEL,
+    NGRAM_CORPUS_PATH,
+    NGRAM_ORDER,
+    NGRAM_MAX_WORDS,
+    TIERED_REMOTE,
+    TIERED_REMOTE_TIMEOUT_S,
+)
+
+PROMPT_TEMPLATE = """You are an autocomplete engine.
+User is typing: "{prefix}"
+Most important Continue the text naturally (no preface, don't add single or double quotes, no extra commentary), can also complete the half-word.
+Keep it concise (<= 5 tokens)."""
+
+# In tiered streams, everything after this marker replaces the local suggestion
+REFINE_MARKER = "\f"
+
+_WORD_RE = re.compile(r"[\w']+|[^\w\s]")
+
+
+def build_openai_chain():
+    from langchain_openai import ChatOpenAI
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        raise ValueError(" OPENAI_API_KEY not found. Did you create a .env file?")
+    llm = ChatOpenAI(model=OPENAI_MODEL, api_key=openai_api_key, temperature=0.2, streaming=True)
+    return ChatPromptTemplate.from_template(PROMPT_TEMPLATE) | llm | StrOutputParser()
+
+
+def build_ollama_chain():
+    from langchain_ollama import OllamaLLM
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import StrOutputParser
+
+    llm = OllamaLLM(model=OLLAMA_MODEL, temperature=0.2, num_predict=12)
+    return ChatPromptTemplate.from_template(PROMPT_TEMPLATE) | llm | StrOutputParser()
+
+
+class NGramCompleter:
+    """
+    In-process word n-gram completer. Completes a half-typed word from the
+    vocabulary, then greedily appends the most frequent next words.
+    Answers in well under a millisecond for typical corpora.
+    """
+
+    # Served inline by the app: no debounce or batching in front of it
+    is_local = True
+
+    def __init__(self, order: int = NGRAM_ORDER, max_words: int = NGRAM_MAX_WORDS):
+        self.order = max(2, order)
+        self.max_words = max_words
+        self.next_words: Dict[Tuple[str, ...], Counter] = defaultdict(Counter)
+        self.unigrams: Counter = Counter()
+        self._vocab: List[str] = []
+        self._dirty = False
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str], **kwargs) -> "NGramCompleter":
+        model = cls(**kwargs)
+        for path in paths:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    model.learn(line)
+        return model
+
+    def learn(self, text: str) -> None:
+        words = [w.lower() for w in _WORD_RE.findall(text)]
+        self.unigrams.update(words)
+        for i, word in enumerate(words):
+            for n in range(1, self.order):
+                if i - n < 0:
+                    break
+                self.next_words[tuple(words[i - n:i])][word] += 1
+        self._dirty = True
+
+    def _complete_word(self, partial: str, context: Tuple[str, ...]) -> Optional[str]:
+        if self._dirty:
+            self._vocab = sorted(self.unigrams)
+            self._dirty = False
+        for n in range(len(context), 0, -1):
+            options = self.next_words.get(context[-n:])
+            if options:
+                best = max((w for w in options if w.startswith(partial) and w != partial),
+                           key=lambda w: options[w], default=None)
+                if best:
+                    return best
+        lo = bisect.bisect_left(self._vocab, partial)
+        hi = bisect.bisect_right(self._vocab, partial + "￿")
+        candidates = [w for w in self._vocab[lo:hi] if w != partial]
+        return max(candidates, key=lambda w: self.unigrams[w], default=None)
+
+    def _next_word(self, context: Tuple[str, ...]) -> Optional[str]:
+        for n in range(min(len(context), self.order - 1), 0, -1):
+            options = self.next_words.get(context[-n:])
+            if options:
+                return options.most_common(1)[0][0]
+        return None
+
+    def complete(self, prefix: str) -> str:
+        words = [w.lower() for w in _WORD_RE.findall(prefix)]
+        out = ""
+        # A trailing word the model doesn't know yet is treated as half-typed
+        if words and not prefix[-1].isspace() and words[-1].isalnum() and words[-1] not in self.unigrams:
+            partial = words.pop()
+            full = self._complete_word(partial, tuple(words))
+            if full:
+                out += full[len(partial):]
+            words.append(full or partial)
+        for _ in range(self.max_words):
+            nxt = self._next_word(tuple(words))
+            if nxt is None:
+                break
+            sep = "" if not nxt[0].isalnum() or (not out and prefix[-1:].isspace()) else " "
+            out += sep + nxt
+            words.append(nxt)
+            if nxt in ".!?":
+                break
+        return out
+
+    async def astream(self, inputs: Dict[str, str]) -> AsyncIterator[str]:
+        text = self.complete(inputs["prefix"])
+        if text:
+            yield text
+
+    async def ainvoke(self, inputs: Dict[str, str]) -> str:
+        return self.complete(inputs["prefix"])
+
+    async def abatch(self, inputs: List[Dict[str, str]], return_exceptions: bool = False, **kwargs) -> List[str]:
+        return [self.complete(i["prefix"]) for i in inputs]
+
+
+class TieredCompleter:
+    """
+    Local completer answers first, the remote model refines.
+
+    astream yields the local suggestion immediately, then REFINE_MARKER followed
+    by the remote tokens. ainvoke/abatch return the remote answer, falling back
+    to the local one if the remote fails or exceeds `remote_timeout_s`.
+    Remote answers are fed back into the local model.
+    """
+
+    def __init__(self, local_model: NGramCompleter, remote_factory: Callable[[], object],
+                 remote_timeout_s: float = TIERED_REMOTE_TIMEOUT_S):
+        self.local_model = local_model
+        self._remote_factory = remote_factory
+        self._remote = None
+        self.remote_timeout_s = remote_timeout_s
+
+    @property
+    def remote(self):
+        if self._remote is None:
+            self._remote = self._remote_factory()
+        return self._remote
+
+    async def astream(self, inputs: Dict[str, str]) -> AsyncIterator[str]:
+        local = self.local_model.complete(inputs["prefix"])
+        if local:
+            yield local
+        yield REFINE_MARKER
+        parts = []
+        async for chunk in self.remote.astream(inputs):
+            parts.append(chunk)
+            yield chunk
+        self.local_model.learn(inputs["prefix"] + "".join(parts))
+
+    async def ainvoke(self, inputs: Dict[str, str]) -> str:
+        try:
+            text = await asyncio.wait_for(self.remote.ainvoke(inputs), timeout=self.remote_timeout_s)
+        except Exception as e:
+            print(f"Tiered: remote failed ({type(e).__name__}), serving local suggestion")
+            return self.local_model.complete(inputs["prefix"])
+        self.local_model.learn(inputs["prefix"] + text)
+        return text
+
+    async def abatch(self, inputs: List[Dict[str, str]], return_exceptions: bool = False, **kwargs) -> List[str]:
+        return list(await asyncio.gather(*(self.ainvoke(i) for i in inputs), return_exceptions=return_exceptions))
+
+
+def _build_ngram() -> NGramCompleter:
+    paths = [p for p in NGRAM_CORPUS_PATH.split(os.pathsep) if p]
+    if not paths:
+        print("NGRAM_CORPUS_PATH not set; the local completer starts empty and learns from remote answers")
+    return NGramCompleter.from_files(paths)
+
+
+class BackendRegistry:
+    """Builds backends lazily by name, so a missing API key only matters for the backend that needs it."""
+
+    ALIASES = {"local": "ngram", "remote": "openai"}
+
+    def __init__(self, default: str = COMPLETION_BACKEND):
+        self.default = default
+        self._instances: Dict[str, object] = {}
+        self._factories: Dict[str, Callable[[], object]] = {
+            "openai": build_openai_chain,
+            "ollama": build_ollama_chain,
+            "ngram": _build_ngram,
+            "tiered": lambda: TieredCompleter(self.get("ngram")[1], lambda: self.get(TIERED_REMOTE)[1]),
+            "fake": self._build_fake,
+        }
+
+    @staticmethod
+    def _build_fake():
+        from fakes import FakeStreamingChain
+        return FakeStreamingChain()
+
+    def register(self, name: str, backend: object) -> None:
+        """Install a ready-made backend (e.g. a fake chain in tests or benchmarks)."""
+        self._instances[name] = backend
+        self._factories.setdefault(name, lambda: backend)
+
+    def names(self) -> List[str]:
+        return sorted(self._factories)
+
+    def get(self, name: Optional[str] = None) -> Tuple[str, object]:
+        """(resolved name, backend); raises KeyError for unknown names."""
+        name = (name or self.default).lower()
+        name = self.ALIASES.get(name, name)
+        if name not in self._factories:
+            raise KeyError(name)
+        if name not in self._instances:
+            self._instances[name] = self._factories[name]()
+        return name, self._instances[name]
@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from config import CACHE_MAX_ENTRIES, CACHE_TTL_S
+
+
+class _Node:
+    __slots__ = ("children", "completion", "expires_at")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.completion: Optional[str] = None
+        self.expires_at = 0.0
+
+
+class CompletionCache:
+    """
+    Prefix trie of (typed prefix -> model completion) with TTL and LRU eviction.
+
+    lookup(prefix) answers in two ways without calling the model:
+      * exact:  the same prefix was completed before -> replay its completion;
+      * extend: a cached prefix P is a prefix of the new one and the characters
+                typed since P match the start of P's completion -> serve the rest.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_s: float = CACHE_TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._root = _Node()
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        self.exact_hits = 0
+        self.extend_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def lookup(self, prefix: str) -> Optional[Tuple[str, str]]:
+        """Returns (text_to_serve, "exact" | "extend") or None on a miss."""
+        now = time.monotonic()
+        node = self._root
+        # Cached ancestors of `prefix` (including itself), shallow to deep
+        ancestors = []
+        if self._live(node, now):
+            ancestors.append(("", node))
+        for depth, ch in enumerate(prefix, start=1):
+            node = node.children.get(ch)
+            if node is None:
+                break
+            if self._live(node, now):
+                ancestors.append((prefix[:depth], node))
+
+        for cached_prefix, node in reversed(ancestors):
+            completion = node.completion
+            typed = prefix[len(cached_prefix):]
+            if not typed:
+                self._touch(cached_prefix)
+                self.exact_hits += 1
+                return completion, "exact"
+            if completion.startswith(typed) and len(completion) > len(typed):
+                self._touch(cached_prefix)
+                self.extend_hits += 1
+                return completion[len(typed):], "extend"
+        self.misses += 1
+        return None
+
+    def store(self, prefix: str, completion: str) -> None:
+        if not completion:
+            return
+        node = self._root
+        for ch in prefix:
+            node = node.children.setdefault(ch, _Node())
+        node.completion = completion
+        node.expires_at = time.monotonic() + self.ttl_s
+        self._touch(prefix)
+        while len(self._lru) > self.max_entries:
+            oldest, _ = self._lru.popitem(last=False)
+            self._remove(oldest)
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.exact_hits + self.extend_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._lru),
+            "exact_hits": self.exact_hits,
+            "extend_hits": self.extend_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    @staticmethod
+    def _live(node: _Node, now: float) -> bool:
+        return node.completion is not None and node.expires_at > now
+
+    def _touch(self, prefix: str) -> None:
+        self._lru[prefix] = None
+        self._lru.move_to_end(prefix)
+
+    def _remove(self, prefix: str) -> None:
+        """Clear the entry and prune now-empty trie branches."""
+        path = [self._root]
+        for ch in prefix:
+            nxt = path[-1].children.get(ch)
+            if nxt is None:
+                return
+            path.append(nxt)
+        path[-1].completion = None
+        for depth in range(len(prefix), 0, -1):
+            node = path[depth]
+            if node.completion is not None or node.children:
+                break
+            del path[depth - 1].children[prefix[depth - 1]]
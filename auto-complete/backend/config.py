@@ -0,0 +1,23 @@
+import os
+
+# Prefix-trie completion cache
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))   # LRU-evicted beyond this
+CACHE_TTL_S = float(os.getenv("CACHE_TTL_S", "600"))              # entries expire after this many seconds
+
+# Rolling window used for latency percentiles in /metrics
+METRICS_WINDOW = 1000
+
+# Debounce + micro-batching for /complete_once
+DEBOUNCE_MS = float(os.getenv("DEBOUNCE_MS", "75"))               # hold window; newer request from the session wins
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "16"))           # prompts per chain.abatch call
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "20"))   # max wait for a batch to fill
+
+# Completion backends (see backends.py); default used when a request names none
+COMPLETION_BACKEND = os.getenv("COMPLETION_BACKEND", "openai")    # openai | ollama | ngram | tiered | fake
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
+NGRAM_CORPUS_PATH = os.getenv("NGRAM_CORPUS_PATH", "")            # text file(s), os.pathsep-separated
+NGRAM_ORDER = int(os.getenv("NGRAM_ORDER", "3"))
+NGRAM_MAX_WORDS = int(os.getenv("NGRAM_MAX_WORDS", "5"))
+TIERED_REMOTE = os.getenv("TIERED_REMOTE", "openai")              # model that refines the local answer
+TIERED_REMOTE_TIMEOUT_S = float(os.getenv("TIERED_REMOTE_TIMEOUT_S", "2.0"))
@@ -0,0 +1,55 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+
+class FakeStreamingChain:
+    """
+    Deterministic stand-in for `prompt | llm | StrOutputParser()` with
+    programmable latency, for tests and benchmarks. Exposes the Runnable
+    methods the app uses: astream, ainvoke and abatch on {"prefix": ...}.
+    """
+
+    def __init__(
+        self,
+        completion: Optional[Callable[[str], str]] = None,
+        first_token_delay_s: float = 0.05,
+        token_delay_s: float = 0.01,
+    ):
+        self.completion = completion or (lambda prefix: " and then some more")
+        self.first_token_delay_s = first_token_delay_s
+        self.token_delay_s = token_delay_s
+        self.calls = 0
+        self.cancelled = 0
+        self.batches = 0
+
+    def tokens(self, prefix: str) -> List[str]:
+        text = self.completion(prefix)
+        # Whitespace-led word pieces, like a BPE stream
+        out, word = [], ""
+        for ch in text:
+            if ch.isspace() and word:
+                out.append(word)
+                word = ""
+            word += ch
+        if word:
+            out.append(word)
+        return out
+
+    async def astream(self, inputs: Dict[str, str]) -> AsyncIterator[str]:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.first_token_delay_s)
+            for i, tok in enumerate(self.tokens(inputs["prefix"])):
+                if i:
+                    await asyncio.sleep(self.token_delay_s)
+                yield tok
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+
+    async def ainvoke(self, inputs: Dict[str, str]) -> str:
+        return "".join([tok async for tok in self.astream(inputs)])
+
+    async def abatch(self, inputs: List[Dict[str, str]], return_exceptions: bool = False, **kwargs) -> List[str]:
+        self.batches += 1
+        return list(await asyncio.gather(*(self.ainvoke(i) for i in inputs), return_exceptions=return_exceptions))
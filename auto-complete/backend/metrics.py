@@ -0,0 +1,43 @@
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from config import METRICS_WINDOW
+
+
+class LatencyStats:
+    """Rolling window of latency samples (seconds) with percentile summaries."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+        return ordered[idx]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+        }
+
+
+class Timer:
+    """`with Timer() as t: ...` then read t.elapsed (seconds)."""
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self.start
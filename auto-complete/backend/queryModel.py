@@ -1,4 +1,8 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 class CompleteRequest(BaseModel):
-    query:str
\ No newline at end of file
+    query:str
+    # openai | ollama | ngram (alias "local") | tiered | fake; defaults to COMPLETION_BACKEND
+    backend: Optional[str] = None
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from config import DEBOUNCE_MS, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+from metrics import LatencyStats
+
+
+@dataclass
+class _Request:
+    prefix: str
+    session_id: Optional[str]
+    future: asyncio.Future
+    arrived: float = field(default_factory=time.perf_counter)
+    dispatched: bool = False
+
+
+class CompletionScheduler:
+    """
+    Server-side debounce and micro-batching in front of a backend's `abatch`.
+
+    Each request is held for `debounce_ms`; if the same session sends a newer
+    prefix meanwhile, the older one is dropped (resolves to None). Surviving
+    requests from all users are collected into batches of up to
+    `max_batch_size`, flushed when full or `max_wait_ms` after the first
+    request arrived. Identical prefixes in a batch are sent once.
+    """
+
+    def __init__(
+        self,
+        chain,
+        debounce_ms: float = DEBOUNCE_MS,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+    ):
+        self.chain = chain
+        self.debounce_s = debounce_ms / 1000
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_s = max_wait_ms / 1000
+        self._latest: Dict[str, _Request] = {}
+        self._queue: List[_Request] = []
+        self._has_items = asyncio.Event()
+        self._full = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        # Running batches; the loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self.ttft = LatencyStats()
+        self.dropped = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def submit(self, prefix: str, session_id: Optional[str] = None) -> Optional[str]:
+        """Completion for `prefix`, or None if a newer request from the session superseded it."""
+        req = _Request(prefix, session_id, asyncio.get_running_loop().create_future())
+        if session_id:
+            previous = self._latest.get(session_id)
+            if previous is not None and not previous.dispatched and not previous.future.done():
+                previous.future.set_result(None)
+                self.dropped += 1
+            self._latest[session_id] = req
+
+        if self.debounce_s > 0:
+            await asyncio.sleep(self.debounce_s)
+        if req.future.done():
+            return req.future.result()
+
+        req.dispatched = True
+        if session_id and self._latest.get(session_id) is req:
+            del self._latest[session_id]
+        self._enqueue(req)
+        result = await req.future
+        self.ttft.record(time.perf_counter() - req.arrived)
+        return result
+
+    def _enqueue(self, req: _Request) -> None:
+        self._queue.append(req)
+        self._has_items.set()
+        if len(self._queue) >= self.max_batch_size:
+            self._full.set()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._collect())
+
+    async def _collect(self) -> None:
+        while True:
+            await self._has_items.wait()
+            if len(self._queue) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.max_wait_s)
+                except asyncio.TimeoutError:
+                    pass
+            batch = self._queue[: self.max_batch_size]
+            del self._queue[: self.max_batch_size]
+            if len(self._queue) < self.max_batch_size:
+                self._full.clear()
+            if not self._queue:
+                self._has_items.clear()
+            # Run the batch without blocking collection of the next one
+            task = asyncio.create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[_Request]) -> None:
+        unique = list(dict.fromkeys(r.prefix for r in batch))
+        self.batches += 1
+        self.batched_requests += len(batch)
+        try:
+            outputs = await self.chain.abatch([{"prefix": p} for p in unique], return_exceptions=True)
+        except Exception as e:
+            outputs = [e] * len(unique)
+        by_prefix = dict(zip(unique, outputs))
+        for r in batch:
+            if r.future.done():
+                continue
+            out = by_prefix[r.prefix]
+            if isinstance(out, BaseException):
+                r.future.set_exception(out)
+            else:
+                r.future.set_result(out)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "dropped_superseded": self.dropped,
+            "batches": self.batches,
+            "avg_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "queued": len(self._queue),
+        }
@@ -0,0 +1,146 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+
+class Flight:
+    """
+    One upstream generation shared by every subscriber asking for the same key.
+    Chunks are buffered so late subscribers replay what they missed.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        # Set when the last subscriber left; the task may not have stopped yet
+        self.cancelled = False
+        self._changed = asyncio.Event()
+
+    def changed(self) -> asyncio.Event:
+        return self._changed
+
+    def notify(self) -> None:
+        """Wake every waiting subscriber (each waits on the event current at the time)."""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def pump(self, source: AsyncIterator[str], on_complete: Optional[Callable[[str], None]]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self.notify()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self.notify()
+        if self.error is None and on_complete is not None:
+            on_complete("".join(self.chunks))
+
+
+class Subscription:
+    def __init__(self, flight: Flight):
+        self.flight = flight
+        self.superseded = False
+        self.released = False
+
+
+class StreamHub:
+    """
+    Single-flight streaming with per-session cancellation.
+
+    * Concurrent requests for the same key share one upstream stream.
+    * A new request from a session supersedes that session's previous one:
+      the old response ends, and its upstream generation is cancelled when
+      nobody else is subscribed to it.
+    * A cancelled flight is never joined; the next request for its key
+      starts a fresh one.
+    """
+
+    def __init__(self):
+        self.flights: Dict[str, Flight] = {}
+        self.sessions: Dict[str, Subscription] = {}
+        self.upstream_started = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    async def stream(
+        self,
+        key: str,
+        source_factory: Callable[[], AsyncIterator[str]],
+        session_id: Optional[str] = None,
+        on_complete: Optional[Callable[[str], None]] = None,
+    ) -> AsyncIterator[str]:
+        if session_id:
+            self.supersede(session_id)
+
+        flight = self.flights.get(key)
+        if flight is None or flight.done or flight.cancelled or (flight.task is not None and flight.task.done()):
+            flight = Flight(key)
+            self.flights[key] = flight
+            flight.task = asyncio.create_task(self._run(flight, source_factory, on_complete))
+            self.upstream_started += 1
+        else:
+            self.coalesced += 1
+
+        sub = Subscription(flight)
+        flight.subscribers += 1
+        if session_id:
+            self.sessions[session_id] = sub
+        try:
+            sent = 0
+            while True:
+                while sent < len(flight.chunks) and not sub.superseded:
+                    yield flight.chunks[sent]
+                    sent += 1
+                if sub.superseded or flight.done:
+                    break
+                # No await between the checks above and grabbing the event, so no wake-up is lost
+                await flight.changed().wait()
+            if flight.error is not None and not sub.superseded:
+                raise flight.error
+        finally:
+            self._release(sub)
+            if session_id and self.sessions.get(session_id) is sub:
+                del self.sessions[session_id]
+
+    def supersede(self, session_id: str) -> None:
+        """End the session's current stream, if any (e.g. when its next request is served from cache)."""
+        previous = self.sessions.pop(session_id, None)
+        if previous is not None:
+            previous.superseded = True
+            self._release(previous)
+            previous.flight.notify()
+
+    async def _run(self, flight: Flight, source_factory, on_complete) -> None:
+        try:
+            await flight.pump(source_factory(), on_complete)
+        finally:
+            if self.flights.get(flight.key) is flight:
+                del self.flights[flight.key]
+
+    def _release(self, sub: Subscription) -> None:
+        """Drop a subscriber; cancel the upstream if it was the last one and is still running."""
+        if sub.released:
+            return
+        sub.released = True
+        flight = sub.flight
+        flight.subscribers -= 1
+        if flight.subscribers <= 0 and not flight.done and flight.task is not None:
+            flight.cancelled = True
+            flight.task.cancel()
+            self.cancelled += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self.flights),
+            "sessions": len(self.sessions),
+            "upstream_started": self.upstream_started,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+        }
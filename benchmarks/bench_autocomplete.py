@@ -0,0 +1,88 @@
+"""Benchmarks for auto-complete/backend/app.py: /complete streaming, /complete_once batching, local n-gram."""
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import Any, Dict
+
+from .harness import LoopLagMonitor, asgi_request, run_load, stream_report
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "auto-complete" / "backend"
+
+CORPUS = (
+    "I want to go home now. I want to go to the store today. We want to go home early. "
+    "Please let me know if you have any questions. Let me know when you are free. "
+    "Thanks for the update on the project. The meeting is moved to next week. "
+)
+
+LOCAL_PREFIXES = ["I want to g", "Please let me kn", "Thanks for the up", "The meeting is mo", "Let me know when"]
+
+
+def load_app():
+    """Import the app without provider credentials; the fake backend is the default."""
+    os.environ.setdefault("COMPLETION_BACKEND", "fake")
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    import app as app_module
+    return app_module
+
+
+async def run(requests: int, concurrency: int, first_token_ms: float, token_ms: float, tokens: int) -> Dict[str, Any]:
+    app_module = load_app()
+    from fakes import FakeStreamingChain
+    from backends import NGramCompleter
+    import config
+
+    completion = " " + " ".join(f"tok{i}" for i in range(tokens))
+    chain = FakeStreamingChain(
+        completion=lambda prefix: completion,
+        first_token_delay_s=first_token_ms / 1000,
+        token_delay_s=token_ms / 1000,
+    )
+    app_module.backends.register("bench", chain)
+    ngram = NGramCompleter()
+    for line in CORPUS.split(". "):
+        ngram.learn(line + ".")
+    app_module.backends.register("ngram", ngram)
+    app = app_module.app
+    # Unique per run so the in-process completion cache never answers for a previous scenario
+    run_id = uuid.uuid4().hex[:8]
+    results: Dict[str, Any] = {}
+
+    async def scenario(name, make_request, streaming=True):
+        calls_before = chain.calls
+        async with LoopLagMonitor() as lag:
+            responses, wall = await run_load(make_request, requests, concurrency)
+        report = stream_report(responses, wall, lag, streaming=streaming)
+        report["upstream_calls"] = chain.calls - calls_before
+        results[name] = report
+
+    # Every client types something different: one upstream stream each
+    await scenario("stream_unique", lambda i: asgi_request(
+        app, "POST", "/complete",
+        {"query": f"stream {run_id} request number {i} is", "backend": "bench"},
+        headers={"X-Session-Id": f"s{i}"},
+    ))
+    # Everyone asks for the same prefix at once: single-flight should collapse them
+    await scenario("stream_shared", lambda i: asgi_request(
+        app, "POST", "/complete",
+        {"query": f"shared {run_id} prefix for everyone", "backend": "bench"},
+        headers={"X-Session-Id": f"s{i}"},
+    ))
+    # One-shot path: server debounce + micro-batching in front of abatch
+    await scenario("once_unique", lambda i: asgi_request(
+        app, "POST", "/complete_once",
+        {"query": f"once {run_id} request number {i} is", "backend": "bench"},
+        headers={"X-Session-Id": f"o{i}"},
+    ), streaming=False)
+    # In-process n-gram backend: no model latency at all
+    await scenario("once_local", lambda i: asgi_request(
+        app, "POST", "/complete_once",
+        {"query": f"{run_id} {i} {LOCAL_PREFIXES[i % len(LOCAL_PREFIXES)]}", "backend": "local"},
+    ), streaming=False)
+    results["config"] = {
+        "debounce_ms": config.DEBOUNCE_MS,
+        "batch_max_size": config.BATCH_MAX_SIZE,
+        "batch_max_wait_ms": config.BATCH_MAX_WAIT_MS,
+    }
+    return results
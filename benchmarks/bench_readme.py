@@ -0,0 +1,147 @@
+"""
+Benchmarks for github_readme_BE/src/main.py: the /repo job pipeline followed
+over SSE, and the file listing / content read paths.
+
+Everything runs locally: projects live in a SQLite store, output goes to a
+temp directory, repositories are generated git repos cloned over file://,
+and the LLM is FakeChatModel. The API only accepts http(s) git URLs, so
+fixtures get https://bench.invalid/ URLs that git rewrites to file:// through
+`url.<base>.insteadOf` (set for this process via GIT_CONFIG_* variables).
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from git import Repo
+
+from .fake_llm import FakeChatModel
+from .harness import LoopLagMonitor, asgi_request, run_load, stream_report, summarize_ms
+
+SERVICE_DIR = Path(__file__).resolve().parents[1] / "github_readme_BE"
+FAKE_GIT_HOST = "https://bench.invalid/"
+
+
+def serve_fixtures_as_https(fixtures_dir: Path) -> None:
+    """Make git resolve FAKE_GIT_HOST/<name> to the local repo fixtures_dir/<name>."""
+    index = int(os.environ.get("GIT_CONFIG_COUNT", "0"))
+    os.environ[f"GIT_CONFIG_KEY_{index}"] = f"url.{fixtures_dir.resolve().as_uri()}/.insteadOf"
+    os.environ[f"GIT_CONFIG_VALUE_{index}"] = FAKE_GIT_HOST
+    os.environ["GIT_CONFIG_COUNT"] = str(index + 1)
+
+
+def make_fixture_repo(path: Path, files: int) -> str:
+    """A small Python project with `files` modules; returns its URL under FAKE_GIT_HOST."""
+    path.mkdir(parents=True)
+    (path / "pyproject.toml").write_text('[project]\nname = "fixture"\n', encoding="utf-8")
+    pkg = path / "pkg"
+    pkg.mkdir()
+    for i in range(files):
+        body = "\n\n".join(
+            f"def handler_{i}_{j}(request):\n    \"\"\"Handle case {j}.\"\"\"\n    return request.get('k{j}')"
+            for j in range(20)
+        )
+        # Repo name in every file keeps fixtures distinct for the summary cache
+        (pkg / f"module_{i}.py").write_text(f'"""Module {i} of {path.name}."""\n\n{body}\n', encoding="utf-8")
+    repo = Repo.init(path)
+    with repo.config_writer() as cfg:
+        cfg.set_value("user", "name", "bench")
+        cfg.set_value("user", "email", "bench@example.com")
+    repo.git.add(A=True)
+    repo.git.commit("-m", "fixture", "--no-gpg-sign")
+    return FAKE_GIT_HOST + path.name
+
+
+def load_app(workdir: Path, llm: FakeChatModel):
+    """Import the service with its output directory, store and LLM pointed at local stand-ins."""
+    if str(SERVICE_DIR) not in sys.path:
+        sys.path.insert(0, str(SERVICE_DIR))
+    from src.utility import path as path_module, file_crawler, llm_util
+    from src.utility.supabase.database import set_store
+    from src.utility.supabase.local_store import SQLiteStore
+    from src import main
+
+    path_module.get_project_root = lambda start=None: workdir
+    file_crawler.get_project_root = lambda start=None: workdir
+    llm_util.get_llm_model = lambda: llm
+    set_store(SQLiteStore(workdir / "bench.sqlite3"))
+    return main.app
+
+
+async def follow_job(app, body: Dict[str, str]) -> Dict[str, Any]:
+    """POST /repo, then read /jobs/{id}/events to the end. Times are seconds from the POST."""
+    started = time.perf_counter()
+    accepted = await asgi_request(app, "POST", "/repo", body)
+    job_id = accepted.json()["job_id"]
+    events = await asgi_request(app, "GET", f"/jobs/{job_id}/events")
+    messages = [json.loads(line[len("data: "):]) for line in events.body.decode().splitlines() if line.startswith("data: ")]
+    return {
+        "accept_s": accepted.total_s,
+        "first_event_s": events.chunks[0][0] - started if events.chunks else None,
+        "total_s": events.finished - started,
+        "status": messages[-1]["status"] if messages else None,
+        "events": len(messages),
+    }
+
+
+async def run(requests: int, concurrency: int, first_token_ms: float, token_ms: float, tokens: int,
+              repos: int = 4, files_per_repo: int = 25) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp(prefix="readme-bench-"))
+    llm = FakeChatModel(first_token_delay_s=first_token_ms / 1000, token_delay_s=token_ms / 1000, reply_tokens=tokens)
+    app = load_app(workdir, llm)
+    serve_fixtures_as_https(workdir / "fixtures")
+    urls = [make_fixture_repo(workdir / "fixtures" / f"repo{i}", files_per_repo) for i in range(repos)]
+    results: Dict[str, Any] = {"workdir": str(workdir)}
+
+    # Full pipeline: clone → crawl → summarize → compose, one job per repository, all at once
+    async with LoopLagMonitor() as lag:
+        started = time.perf_counter()
+        jobs: List[Dict[str, Any]] = await asyncio.gather(*(
+            follow_job(app, {"project_name": f"bench{i}", "git_url": url}) for i, url in enumerate(urls)
+        ))
+        wall = time.perf_counter() - started
+    results["repo_jobs"] = {
+        "jobs": len(jobs),
+        "failed": sum(1 for j in jobs if j["status"] != "succeeded"),
+        "files_per_repo": files_per_repo,
+        "wall_s": round(wall, 3),
+        "llm_calls": llm.calls,
+        "accept": summarize_ms([j["accept_s"] for j in jobs]),
+        "first_event": summarize_ms([j["first_event_s"] for j in jobs]),
+        "job_total": summarize_ms([j["total_s"] for j in jobs]),
+        "loop_lag": summarize_ms(lag.samples),
+    }
+
+    projects = (await asgi_request(app, "GET", "/projects")).json()
+    project_id = projects[0]["project_id"]
+    listing = (await asgi_request(app, "GET", f"/projects/{project_id}/files/summary", query="limit=1000")).json()
+    file_ids = [f["file_id"] for f in listing["files"]]
+
+    async def scenario(name, make_request, ok_status=(200,)):
+        async with LoopLagMonitor() as lag:
+            responses, wall = await run_load(make_request, requests, concurrency)
+        results[name] = stream_report(responses, wall, lag, streaming=False, ok_status=ok_status)
+
+    await scenario("files_summary_page", lambda i: asgi_request(
+        app, "GET", f"/projects/{project_id}/files/summary", query="limit=50",
+    ))
+    await scenario("file_content", lambda i: asgi_request(
+        app, "GET", f"/projects/{project_id}/files/{file_ids[i % len(file_ids)]}/content",
+    ))
+    etags = {}
+    for fid in file_ids:
+        r = await asgi_request(app, "GET", f"/projects/{project_id}/files/{fid}/content")
+        etags[fid] = r.headers.get("etag", "")
+
+    await scenario("file_content_304", lambda i: asgi_request(
+        app, "GET", f"/projects/{project_id}/files/{file_ids[i % len(file_ids)]}/content",
+        headers={"If-None-Match": etags[file_ids[i % len(file_ids)]]},
+    ), ok_status=(304,))
+    await scenario("search", lambda i: asgi_request(
+        app, "GET", f"/projects/{project_id}/search", query=f"q=handler_{i % files_per_repo}",
+    ))
+    return results
@@ -0,0 +1,62 @@
+"""Deterministic chat model with programmable latency, for driving LangChain code without a provider."""
+import asyncio
+import hashlib
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORDS = (
+    "module handles request parsing configuration storage routing summary client "
+    "server cache index worker pipeline schema endpoint helper utility model"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Replies with `reply_tokens` words chosen from a hash of the prompt, so the
+    same prompt always gets the same answer. The first token takes
+    `first_token_delay_s`, each following one `token_delay_s`.
+    """
+
+    model_name: str = "fake-bench"
+    first_token_delay_s: float = 0.05
+    token_delay_s: float = 0.002
+    reply_tokens: int = 40
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bench"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        seed = hashlib.sha256("".join(str(m.content) for m in messages).encode()).digest()
+        return [
+            ("" if i == 0 else " ") + _WORDS[seed[i % len(seed)] % len(_WORDS)]
+            for i in range(self.reply_tokens)
+        ]
+
+    def _delays(self, n: int) -> Iterator[float]:
+        for i in range(n):
+            yield self.first_token_delay_s if i == 0 else self.token_delay_s
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        time.sleep(sum(self._delays(len(tokens))))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        await asyncio.sleep(sum(self._delays(len(tokens))))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        tokens = self._tokens(messages)
+        for tok, delay in zip(tokens, self._delays(len(tokens))):
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=tok))
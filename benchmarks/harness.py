@@ -0,0 +1,202 @@
+"""
+In-process load driver for ASGI apps.
+
+Requests are sent straight to the app callable (no sockets, no HTTP client),
+so every body message is timestamped the moment the app emits it. That is
+what makes time-to-first-byte of a streaming response measurable here;
+httpx's ASGITransport buffers the whole body first.
+"""
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class AsgiResponse:
+    status: int = 0
+    headers: Dict[str, str] = field(default_factory=dict)
+    started: float = 0.0
+    # (perf_counter, bytes) per non-empty body message
+    chunks: List[Tuple[float, bytes]] = field(default_factory=list)
+    finished: float = 0.0
+
+    @property
+    def body(self) -> bytes:
+        return b"".join(c for _, c in self.chunks)
+
+    @property
+    def ttfb_s(self) -> Optional[float]:
+        return self.chunks[0][0] - self.started if self.chunks else None
+
+    @property
+    def total_s(self) -> float:
+        return self.finished - self.started
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+async def asgi_request(
+    app,
+    method: str,
+    path: str,
+    json_body: Any = None,
+    headers: Optional[Dict[str, str]] = None,
+    query: str = "",
+) -> AsgiResponse:
+    """One request against `app`; the body is read to the end."""
+    body = json.dumps(json_body).encode() if json_body is not None else b""
+    raw_headers = [(b"host", b"bench"), (b"content-length", str(len(body)).encode())]
+    if json_body is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    resp = AsgiResponse(started=time.perf_counter())
+    request_sent = False
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            resp.status = message["status"]
+            resp.headers = {k.decode(): v.decode() for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            data = message.get("body", b"")
+            if data:
+                resp.chunks.append((time.perf_counter(), data))
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+        resp.finished = time.perf_counter()
+    return resp
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: a task asks to wake every `interval_s` and records
+    how late it actually woke. Blocking calls on the loop show up here directly.
+    """
+
+    def __init__(self, interval_s: float = 0.005):
+        self.interval_s = interval_s
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_ms(values: Sequence[float]) -> Dict[str, float]:
+    """count/mean/p50/p95/p99/max of second-valued samples, in milliseconds."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(1000 * sum(values) / len(values), 3),
+        "p50_ms": round(1000 * percentile(values, 50), 3),
+        "p95_ms": round(1000 * percentile(values, 95), 3),
+        "p99_ms": round(1000 * percentile(values, 99), 3),
+        "max_ms": round(1000 * max(values), 3),
+    }
+
+
+async def run_load(
+    make_request: Callable[[int], Awaitable[AsgiResponse]],
+    requests: int,
+    concurrency: int,
+) -> Tuple[List[AsgiResponse], float]:
+    """Run `requests` calls of make_request(i) with at most `concurrency` in flight; returns (responses, wall seconds)."""
+    results: List[Optional[AsgiResponse]] = [None] * requests
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < requests:
+            i = next_index
+            next_index += 1
+            results[i] = await make_request(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, requests)))))
+    return results, time.perf_counter() - started
+
+
+def stream_report(
+    responses: List[AsgiResponse],
+    wall_s: float,
+    lag: LoopLagMonitor,
+    streaming: bool = True,
+    ok_status: Sequence[int] = (200,),
+) -> Dict[str, Any]:
+    """Standard result block for a scenario; for streaming ones, one body chunk counts as one token."""
+    ok = [r for r in responses if r.status in ok_status]
+    rates = []
+    for r in ok:
+        if len(r.chunks) > 1:
+            span = r.chunks[-1][0] - r.chunks[0][0]
+            if span > 0:
+                rates.append((len(r.chunks) - 1) / span)
+    tokens = sum(len(r.chunks) for r in ok)
+    report = {
+        "requests": len(responses),
+        "errors": len(responses) - len(ok),
+        "wall_s": round(wall_s, 3),
+        "requests_per_s": round(len(responses) / wall_s, 2) if wall_s else None,
+        "ttfb": summarize_ms([r.ttfb_s for r in ok]),
+        "latency": summarize_ms([r.total_s for r in ok]),
+        "loop_lag": summarize_ms(lag.samples),
+    }
+    if streaming:
+        report["tokens_per_s_aggregate"] = round(tokens / wall_s, 1) if wall_s else None
+        report["tokens_per_s_per_stream_p50"] = round(percentile(rates, 50), 1) if rates else None
+    return report
@@ -0,0 +1,147 @@
+"""
+Run the benchmark suites and write one JSON result file.
+
+    python -m benchmarks.run                                # all suites, defaults
+    python -m benchmarks.run --suite autocomplete -c 50 -n 500 --token-ms 20
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+With --compare, latency (`*_ms`, lower is better) and throughput (`*_per_s`,
+higher is better) figures are diffed against the baseline; the exit code is
+1 if any got worse by more than --threshold percent.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SUITES = ("autocomplete", "readme")
+# Noisy or informational figures that should not fail a comparison
+IGNORED_KEYS = ("max_ms", "count", "wall_s")
+
+
+def _git_revision() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, cwd=RESULTS_DIR.parent).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def _flatten(node: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold_pct: float,
+    min_delta_ms: float = 0.0,
+) -> List[Dict[str, Any]]:
+    """
+    Rows for every comparable figure; `regressed` marks those worse than
+    threshold_pct. Latency changes smaller than min_delta_ms never count, so
+    sub-millisecond jitter does not fail a comparison.
+    """
+    base = dict(_flatten(baseline.get("results", {})))
+    rows = []
+    for key, value in _flatten(current.get("results", {})):
+        leaf = key.rsplit(".", 1)[-1]
+        if key not in base or leaf in IGNORED_KEYS:
+            continue
+        if leaf.endswith("_ms"):
+            lower_is_better = True
+        elif "_per_s" in leaf:
+            lower_is_better = False
+        else:
+            continue
+        old = base[key]
+        if old == 0:
+            continue
+        change = 100 * (value - old) / old
+        worse = change if lower_is_better else -change
+        significant = not lower_is_better or abs(value - old) >= min_delta_ms
+        rows.append({"metric": key, "baseline": old, "current": value, "change_pct": round(change, 1),
+                     "regressed": worse > threshold_pct and significant})
+    return rows
+
+
+async def run_suites(args) -> Dict[str, Any]:
+    params = dict(requests=args.requests, concurrency=args.concurrency, first_token_ms=args.first_token_ms,
+                  token_ms=args.token_ms, tokens=args.tokens)
+    results: Dict[str, Any] = {}
+    for suite in args.suite:
+        print(f"Running {suite} ...", file=sys.stderr)
+        # The services log with print(); keep it out of the report unless asked for
+        sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+        with sink:
+            if suite == "autocomplete":
+                from . import bench_autocomplete
+                results[suite] = await bench_autocomplete.run(**params)
+            else:
+                from . import bench_readme
+                results[suite] = await bench_readme.run(**params, repos=args.repos, files_per_repo=args.files_per_repo)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", choices=SUITES, help="repeatable; default: all")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=20, help="requests in flight")
+    parser.add_argument("--first-token-ms", type=float, default=50, help="fake LLM time to first token")
+    parser.add_argument("--token-ms", type=float, default=10, help="fake LLM time per following token")
+    parser.add_argument("--tokens", type=int, default=20, help="tokens per fake LLM reply")
+    parser.add_argument("--repos", type=int, default=4, help="readme suite: repositories processed at once")
+    parser.add_argument("--files-per-repo", type=int, default=25)
+    parser.add_argument("--out", type=Path, help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="baseline result file to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore latency changes smaller than this")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the services' own logging")
+    args = parser.parse_args(argv)
+    args.suite = args.suite or list(SUITES)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "verbose", "threshold", "min_delta_ms")},
+        },
+        "results": asyncio.run(run_suites(args)),
+    }
+
+    out = args.out
+    if out is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        commit = (report["meta"]["git"]["commit"] or "nogit")[:8]
+        out = RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Results written to {out}", file=sys.stderr)
+
+    if not args.compare:
+        print(json.dumps(report["results"], indent=2))
+        return 0
+    baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+    rows = compare(report, baseline, args.threshold, args.min_delta_ms)
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(f"{row['metric']:<60} {row['baseline']:>12.3f} {row['current']:>12.3f} {row['change_pct']:>+8.1f}% {flag}")
+    regressed = [r for r in rows if r["regressed"]]
+    print(f"{len(regressed)} of {len(rows)} figures regressed by more than {args.threshold}%", file=sys.stderr)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
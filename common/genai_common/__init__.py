@@ -0,0 +1,3 @@
+from .embeddings import CachedEmbeddings, EmbeddingStore
+
+__all__ = ["CachedEmbeddings", "EmbeddingStore"]
@@ -0,0 +1,235 @@
+"""
+Batched, disk-cached embeddings shared by pdf_qa, local_ai_agent and Hybrid_Search.
+
+CachedEmbeddings wraps any LangChain `Embeddings` and is one itself, so it
+drops in wherever OllamaEmbeddings / HuggingFaceEmbeddings were used. Texts
+already embedded by the same model are read from an EmbeddingStore instead
+of being sent to the model; the rest go out in batches, several at a time.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.getenv(
+    "EMBEDDING_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "genai_projects", "embeddings"),
+)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+
+KEY_BYTES = 32  # sha256 digest
+
+
+class EmbeddingStore:
+    """
+    Append-only float32 matrix on disk (vectors.f32) with one 32-byte key per
+    row (keys.bin), read through a memory map. Rows are written before their
+    keys, so a crash mid-write leaves at most a tail of unreferenced bytes,
+    which is trimmed on the next append. Appends take a file lock, so several
+    processes can share one store.
+    """
+
+    def __init__(self, directory: Path):
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.keys_path = self.dir / "keys.bin"
+        self.vectors_path = self.dir / "vectors.f32"
+        self.meta_path = self.dir / "meta.json"
+        self.dim: Optional[int] = None
+        if self.meta_path.exists():
+            self.dim = json.loads(self.meta_path.read_text(encoding="utf-8"))["dim"]
+        self._rows: Dict[bytes, int] = {}
+        self._map: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _refresh(self) -> None:
+        """Pick up keys appended since the last read (by this or another process)."""
+        if not self.keys_path.exists() or self.dim is None:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(len(self._rows) * KEY_BYTES)
+            tail = f.read()
+        for i in range(len(tail) // KEY_BYTES):
+            self._rows.setdefault(tail[i * KEY_BYTES:(i + 1) * KEY_BYTES], len(self._rows))
+
+    def _matrix(self) -> np.ndarray:
+        rows = len(self._rows)
+        if self._map is None or self._map.shape[0] < rows:
+            self._map = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return self._map
+
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[List[float]]]:
+        with self._lock:
+            if any(k not in self._rows for k in keys):
+                self._refresh()
+            if not self._rows:
+                return [None] * len(keys)
+            matrix = self._matrix()
+            return [matrix[self._rows[k]].tolist() if k in self._rows else None for k in keys]
+
+    def put_many(self, keys: Sequence[bytes], vectors: Sequence[Sequence[float]]) -> None:
+        if not keys:
+            return
+        arr = np.asarray(vectors, dtype=np.float32)
+        with self._lock, open(self.dir / ".lock", "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self.dim is None:
+                self.dim = int(arr.shape[1])
+                self.meta_path.write_text(json.dumps({"dim": self.dim}), encoding="utf-8")
+            if arr.shape[1] != self.dim:
+                raise ValueError(f"Embedding size {arr.shape[1]} does not match store {self.dir} ({self.dim})")
+            self._refresh()
+            fresh, seen = [], set()
+            for i, key in enumerate(keys):
+                if key not in self._rows and key not in seen:
+                    seen.add(key)
+                    fresh.append(i)
+            if not fresh:
+                return
+            with open(self.vectors_path, "ab") as f:
+                # Drop bytes of rows whose keys never got written
+                f.truncate(len(self._rows) * self.dim * 4)
+                f.write(arr[fresh].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(keys[i] for i in fresh))
+            for i in fresh:
+                self._rows[keys[i]] = len(self._rows)
+
+
+def _model_slug(model_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model_id).strip("_") or "model"
+
+
+def _as_float32(vectors) -> List[List[float]]:
+    """Round to what the store keeps, so cached and fresh results are identical."""
+    return np.asarray(vectors, dtype=np.float32).tolist()
+
+
+def default_model_id(embeddings: Embeddings) -> str:
+    """`<class>/<model>` from the wrapped client's own settings."""
+    name = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None) or ""
+    return f"{type(embeddings).__name__}/{name}"
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain Embeddings with a persistent cache keyed by (model, text hash)
+    and batched, concurrent calls to the wrapped model for cache misses.
+    Query and document vectors are cached separately, since some models embed
+    them differently.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model_id: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        batch_size: int = EMBED_BATCH_SIZE,
+        max_concurrency: int = EMBED_MAX_CONCURRENCY,
+    ):
+        self.underlying = underlying
+        self.model_id = model_id or default_model_id(underlying)
+        self.store = EmbeddingStore(Path(cache_dir or DEFAULT_CACHE_DIR) / _model_slug(self.model_id))
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, kind: str, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_id}\0{kind}\0{text}".encode("utf-8")).digest()
+
+    def _plan(self, texts: List[str]):
+        """(keys, cached vectors, unique missing texts in batches)."""
+        keys = [self._key("doc", t) for t in texts]
+        found = self.store.get_many(keys)
+        missing: Dict[bytes, str] = {}
+        for key, text, vec in zip(keys, texts, found):
+            if vec is None:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - sum(1 for v in found if v is None)
+        self.misses += len(missing)
+        items = list(missing.items())
+        batches = [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+        return keys, found, batches
+
+    def _fill(self, keys: List[bytes], found: List[Optional[List[float]]], computed: Dict[bytes, List[float]]) -> List[List[float]]:
+        return [vec if vec is not None else computed[key] for key, vec in zip(keys, found)]
+
+    def _embed_batch(self, batch) -> Dict[bytes, List[float]]:
+        vectors = _as_float32(self.underlying.embed_documents([text for _, text in batch]))
+        # Stored per batch, so an interrupted run keeps what it already paid for
+        self.store.put_many([key for key, _ in batch], vectors)
+        return dict(zip((key for key, _ in batch), vectors))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, batches = self._plan(texts)
+        computed: Dict[bytes, List[float]] = {}
+        if len(batches) == 1 or self.max_concurrency == 1:
+            for batch in batches:
+                computed.update(self._embed_batch(batch))
+        elif batches:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as pool:
+                for part in pool.map(self._embed_batch, batches):
+                    computed.update(part)
+        return self._fill(keys, found, computed)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, batches = self._plan(texts)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(batch):
+            async with semaphore:
+                vectors = _as_float32(await self.underlying.aembed_documents([text for _, text in batch]))
+            await asyncio.to_thread(self.store.put_many, [key for key, _ in batch], vectors)
+            return dict(zip((key for key, _ in batch), vectors))
+
+        computed: Dict[bytes, List[float]] = {}
+        for part in await asyncio.gather(*(run(b) for b in batches)):
+            computed.update(part)
+        return self._fill(keys, found, computed)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        cached = self.store.get_many([key])[0]
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        vector = _as_float32([self.underlying.embed_query(text)])[0]
+        self.store.put_many([key], [vector])
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key("query", text)
+        cached = self.store.get_many([key])[0]
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        vector = _as_float32([await self.underlying.aembed_query(text)])[0]
+        self.store.put_many([key], [vector])
+        return vector
+
+    def stats(self) -> dict:
+        return {"model": self.model_id, "hits": self.hits, "misses": self.misses, "stored": len(self.store)}
@@ -1,6 +1,7 @@
 # streamlit_app.py
 import os
 import io
+import time
 import requests
 import streamlit as st
 from typing import Optional, List, Dict
@@ -12,6 +13,9 @@ from helper import render_files_card, render_files_table
 API_BASE = os.getenv("API_BASE", "http://127.0.0.1:8000")  # your FastAPI root
 
 TIMEOUT = 120  # seconds
+JOB_POLL_INTERVAL = 1.0  # seconds between /jobs/{id} polls
+LISTING_TTL_S = 60       # cache lifetime of the file listing
+CONTENT_TTL_S = 600      # cache lifetime of a file's content (revalidated with ETag after)
 
 # -----------------------------
 # Small HTTP helpers
@@ -34,21 +38,88 @@ def api_create_project(project_name: str, git_url: Optional[str]) -> dict:
     res.raise_for_status()
     return res.json()
 
+def api_get_job(job_id: str) -> Dict:
+    res = get_json(f"/jobs/{job_id}")
+    res.raise_for_status()
+    return res.json()
+
 def api_list_projects() -> List[Dict]:
     res = get_json("/projects")
     res.raise_for_status()
     return res.json()
 
-def api_get_project_files(project_id: str) -> List[Dict]:
-    res = get_json(f"/projects/{project_id}/files")
+@st.cache_data(ttl=LISTING_TTL_S, show_spinner=False)
+def api_list_file_summaries(project_id: str) -> List[Dict]:
+    """All pages of the lightweight listing: file_id, file_name, file_size, summary_preview."""
+    files: List[Dict] = []
+    cursor = None
+    while True:
+        params = {"after": cursor} if cursor else None
+        res = requests.get(_url(f"/projects/{project_id}/files/summary"), params=params, timeout=TIMEOUT)
+        res.raise_for_status()
+        page = res.json()
+        files.extend(page.get("files", []))
+        cursor = page.get("next_cursor")
+        if not cursor:
+            return files
+
+@st.cache_data(ttl=LISTING_TTL_S, show_spinner=False)
+def api_search_files(project_id: str, q: str) -> List[Dict]:
+    res = requests.get(_url(f"/projects/{project_id}/search"), params={"q": q}, timeout=TIMEOUT)
     res.raise_for_status()
-    return res.json()
+    return res.json().get("hits", [])
+
+@st.cache_resource
+def _etag_store() -> Dict:
+    """(project_id, file_id) -> (etag, payload); survives reruns so expired entries can be revalidated."""
+    return {}
+
+@st.cache_data(ttl=CONTENT_TTL_S, show_spinner=False)
+def api_get_file_content(project_id: str, file_id: str) -> Dict:
+    """One file's {file_name, file_summary, file_content}; sends If-None-Match so unchanged files cost a 304."""
+    store = _etag_store()
+    key = (project_id, file_id)
+    headers = {"If-None-Match": store[key][0]} if key in store else {}
+    res = requests.get(_url(f"/projects/{project_id}/files/{file_id}/content"), headers=headers, timeout=TIMEOUT)
+    if res.status_code == 304:
+        return store[key][1]
+    res.raise_for_status()
+    payload = res.json()
+    if res.headers.get("ETag"):
+        store[key] = (res.headers["ETag"], payload)
+    return payload
 
 def api_generate_readme(project_id: str) -> Dict:
     res = get_json(f"/projects/{project_id}/readme")
     res.raise_for_status()
     return res.json()
 
+# -----------------------------
+# Job progress
+# -----------------------------
+def _job_fraction(job: Dict) -> float:
+    stage = job.get("stage")
+    if stage == "summarizing" and job.get("total"):
+        return 0.15 + 0.75 * job["done"] / job["total"]
+    return {"queued": 0.0, "cloned": 0.1, "crawled": 0.15, "composed": 0.95, "done": 1.0}.get(stage, 0.0)
+
+def _job_label(job: Dict) -> str:
+    stage = job.get("stage")
+    if stage == "summarizing":
+        return f"Summarized {job.get('done', 0)}/{job.get('total', 0)} files"
+    return {"queued": "Queued…", "cloned": "Cloned", "crawled": "Crawled files",
+            "composed": "Composed README", "done": "Done"}.get(stage, stage or "")
+
+def wait_for_job(job_id: str) -> Dict:
+    """Poll /jobs/{id} and mirror its stage in a progress bar until it finishes."""
+    bar = st.progress(0.0, text="Queued…")
+    while True:
+        job = api_get_job(job_id)
+        bar.progress(min(_job_fraction(job), 1.0), text=_job_label(job))
+        if job.get("status") in ("succeeded", "failed"):
+            return job
+        time.sleep(JOB_POLL_INTERVAL)
+
 # -----------------------------
 # UI
 # -----------------------------
@@ -73,8 +144,15 @@ if submitted:
         try:
             created = api_create_project(project_name.strip(), git_url.strip() or None)
             print(created)
-            st.success(f"Project created: {created.get('project_name', project_name)}")
+            if created.get("deduplicated"):
+                st.info("This repository is already being processed; following the existing job.")
+            job = wait_for_job(created["job_id"]) if created.get("job_id") else {"status": "succeeded"}
+            if job.get("status") == "failed":
+                st.error(f"README generation failed: {job.get('error')}")
+            else:
+                st.success(f"Project created: {created.get('project_name', project_name)} ({job.get('message', '')})")
             st.session_state["_projects_cache"] = None  # invalidate cache
+            api_list_file_summaries.clear()
         except requests.HTTPError as e:
             msg = e.response.text if e.response is not None else str(e)
             st.error(f"Failed to create project: {msg}")
@@ -126,7 +204,7 @@ st.subheader("3) Files & Summaries")
 files_placeholder = st.empty()
 
 try:
-    files = api_get_project_files(project_id)
+    files = api_list_file_summaries(project_id)
     if not isinstance(files, list):
         raise ValueError("Unexpected response shape for files")
     # if files:
@@ -141,11 +219,14 @@ try:
     if not files:
         st.info("No files found for this project.")
     else:
+        def load_content(file_id: str) -> Dict:
+            return api_get_file_content(project_id, file_id)
+
         view = st.radio("View", options=["Cards", "Table"], horizontal=True)
         if view == "Cards":
-            render_files_card(files)
+            render_files_card(files, load_content, lambda q: api_search_files(project_id, q))
         else:
-            render_files_table(files)
+            render_files_table(files, load_content)
     
 except Exception as e:
     files_placeholder.error(f"Failed to load files: {e}")
@@ -1,48 +1,73 @@
 import io
+from typing import Callable, Dict, List
+
 import pandas as pd
 import streamlit as st
 
-def render_files_card(files: list[dict]):
-    q = st.text_input("Search files", placeholder="type to filter…")
-    if q:
-        ql = q.lower()
-        files = [
-            f for f in files
-            if any(ql in (f.get(k, "") or "").lower()
-                   for k in ("file_name", "file_content", "file_summary"))
-        ]
+CARDS_PER_PAGE = 25
+
+def _human_size(n: int | None) -> str:
+    if n is None:
+        return ""
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+def _content_tabs(name: str, summary: str, load: Callable[[], Dict], key: str):
+    """Summary preview always; the file payload is fetched only once the user asks for it."""
+    t1, t2 = st.tabs(["📝 Summary", "💻 Content"])
+    with t1:
+        if summary.endswith("…") and st.toggle("Full summary", key=f"sum_{key}"):
+            summary = load().get("file_summary") or summary
+        st.write(summary or "_No summary_")
+    with t2:
+        if not st.toggle("Load content", key=f"load_{key}"):
+            return
+        code = load().get("file_content") or ""
+        lang = "markdown" if name.lower().endswith(".md") else ""
+        st.code(code, language=lang)
+        st.download_button(
+            "⬇️ Download file",
+            data=io.BytesIO(code.encode("utf-8")),
+            file_name=name,
+            mime="text/plain",
+            use_container_width=True,
+            key=f"dl_{key}",
+        )
+
+def render_files_card(
+    files: list[dict],
+    load_content: Callable[[str], Dict],
+    search: Callable[[str], List[Dict]],
+):
+    q = st.text_input("Search files", placeholder="search names, summaries and code…")
+    snippets: Dict[str, str] = {}
+    if q.strip():
+        # Ranked server-side full-text search; keep the hit order
+        by_id = {f.get("file_id"): f for f in files}
+        hits = search(q)
+        files = [by_id[h["file_id"]] for h in hits if h["file_id"] in by_id]
+        snippets = {h["file_id"]: h.get("snippet") or "" for h in hits}
     if not files:
         st.info("No files match your search.")
         return
 
-    for i, f in enumerate(files, start=1):
-        name = f.get("file_name") or f"file_{i}.txt"
-        summ = f.get("file_summary") or ""
-        code = f.get("file_content") or ""
-
-        with st.expander(f"📄 {name}", expanded=False):
-            t1, t2, t3 = st.tabs(["📝 Summary", "💻 Content", "⬇️ Download"])
-            with t1:
-                st.write(summ or "_No summary_")
-            with t2:
-                lang = "markdown" if name.lower().endswith(".md") else ""
-                st.code(code, language=lang)
-            with t3:
-                st.download_button(
-                    "Download file",
-                    data=io.BytesIO(code.encode("utf-8")),
-                    file_name=name,
-                    mime="text/plain",
-                    use_container_width=True,
-                )
+    pages = (len(files) - 1) // CARDS_PER_PAGE + 1
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+    start = (page - 1) * CARDS_PER_PAGE
+    st.caption(f"{len(files)} files · page {page}/{pages}")
 
-def _preview(text: str | None, n: int = 140) -> str:
-    if not text:
-        return ""
-    text = text.replace("\n", " ")
-    return text[:n] + ("…" if len(text) > n else "")
+    for i, f in enumerate(files[start:start + CARDS_PER_PAGE], start=start + 1):
+        name = f.get("file_name") or f"file_{i}.txt"
+        file_id = f.get("file_id")
+        if file_id in snippets:
+            st.markdown(f"📄 **{name}** — {snippets[file_id]}")
+        with st.expander(f"📄 {name}  ·  {_human_size(f.get('file_size'))}", expanded=False):
+            _content_tabs(name, f.get("summary_preview") or "", lambda fid=file_id: load_content(fid), key=f"card_{file_id}")
 
-def render_files_table(files: list[dict]):
+def render_files_table(files: list[dict], load_content: Callable[[str], Dict]):
     if not files:
         st.info("No files found for this project.")
         return
@@ -50,37 +75,24 @@ def render_files_table(files: list[dict]):
     df = pd.DataFrame([
         {
             "file_name": f.get("file_name"),
-            "summary_preview": _preview(f.get("file_summary")),
-            "content_preview": _preview(f.get("file_content")),
-            "file_summary": f.get("file_summary"),
-            "file_content": f.get("file_content"),
+            "size": _human_size(f.get("file_size")),
+            "summary_preview": f.get("summary_preview"),
         }
         for f in files
     ])
 
-    st.dataframe(
-        df[["file_name", "summary_preview", "content_preview"]],
-        use_container_width=True,
-        hide_index=True,
-    )
+    st.dataframe(df, use_container_width=True, hide_index=True)
 
-    if len(df):
-        idx = st.selectbox(
-            "Open a file",
-            options=list(range(len(df))),
-            format_func=lambda i: df.iloc[i]["file_name"],
+    idx = st.selectbox(
+        "Open a file",
+        options=list(range(len(files))),
+        format_func=lambda i: files[i].get("file_name") or f"file_{i}",
+    )
+    f = files[idx]
+    with st.expander(f"View: {f.get('file_name')}", expanded=True):
+        _content_tabs(
+            f.get("file_name") or "file.txt",
+            f.get("summary_preview") or "",
+            lambda: load_content(f.get("file_id")),
+            key=f"table_{f.get('file_id')}",
         )
-        with st.expander(f"View: {df.iloc[idx]['file_name']}", expanded=True):
-            t1, t2, t3 = st.tabs(["📝 Summary", "💻 Content", "⬇️ Download"])
-            with t1:
-                st.write(df.iloc[idx]["file_summary"] or "_No summary_")
-            with t2:
-                st.code(df.iloc[idx]["file_content"] or "", language="")
-            with t3:
-                st.download_button(
-                    "Download file",
-                    data=io.BytesIO((df.iloc[idx]["file_content"] or "").encode("utf-8")),
-                    file_name=df.iloc[idx]["file_name"] or "file.txt",
-                    mime="text/plain",
-                    use_container_width=True,
-                )
\ No newline at end of file
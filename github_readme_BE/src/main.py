@@ -1,13 +1,23 @@
-from fastapi import FastAPI, Depends
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import FastAPI, Depends, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
 from .models.request import RepoRequest
-from .utility.git import clone_repo
-from .utility.file_crawler import aggregate_code
-from .utility.preprocess_file import parse_blocks, get_readme_data
-from .utility.llm_util import generate_readme_file
+from .utility.git import clone_repo, resolve_remote_sha
+from .utility.jobs import Job, JobManager, ProgressCallback, TERMINAL_STATUSES
+from .utility.llm_util import generate_readme_file, is_readme_current
+from .utility.config import JOB_EVENTS_POLL_S
 from .utility.supabase.models import Project
-from .utility.supabase.database import save_projects, save_readme, get_projects_list, get_project_files, get_readme
+from .utility.supabase.database import (
+    save_projects, save_readme, get_projects_list, get_project_files, get_readme,
+    list_file_summaries, get_file, get_file_etag, file_etag, search_project_files,
+)
+from .utility.config import FILES_PAGE_SIZE
 
 app = FastAPI()
 app.add_middleware(
@@ -18,38 +28,123 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+jobs = JobManager()
+
 @app.get("/")
 def home():
     return "The App is up and running"
 
-@app.post("/repo")
-async def cloneAndGenerate(body: RepoRequest):
-    print("body ", body)
-    
+def _run_repo_job(body: RepoRequest, job: Job, progress: ProgressCallback) -> str:
+    """Worker body: clone → crawl → summarize → compose, reporting per-stage progress."""
+    # Clone (or shallow-fetch) the repository
+    clone = clone_repo(body.git_url, body.project_name)
+    progress("cloned")
+    if is_readme_current(body.project_name, clone.sha):
+        # Nothing to regenerate; the project row from the earlier run still holds files and README
+        return "README already up to date"
     project = Project(project_name=body.project_name, git_url=body.git_url)
     # Save the project info to the database.
     save_projects(project)
-    # Clone the repository
-    clone_repo(body.git_url, body.project_name)
-    # Preprocess and aggregate code files
-    aggregate_code(body.project_name)    
-    ret = generate_readme_file(projectName=body.project_name) 
-    return {'message': "Success", 'isSuccess': True, 'statusCode': 201}
+    # Crawl, summarize and compose (files are streamed from the clone)
+    generate_readme_file(projectName=body.project_name, source_sha=clone.sha, progress=progress)
+    return "Success"
+
+@app.post("/repo", status_code=202)
+async def cloneAndGenerate(body: RepoRequest):
+    print("body ", body)
+    # ls-remote is a network call; keep it off the event loop
+    sha = await run_in_threadpool(resolve_remote_sha, body.git_url)
+    job, created = jobs.submit(
+        body.project_name, body.git_url, sha,
+        lambda job, progress: _run_repo_job(body, job, progress),
+    )
+    return {
+        'message': "Accepted" if created else "Already in progress",
+        'isSuccess': True,
+        'statusCode': 202,
+        'job_id': job.job_id,
+        'deduplicated': not created,
+    }
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.snapshot(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-sent events: one `data: <job json>` message per progress update until the job ends."""
+    if jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        last_version = -1
+        while True:
+            job = jobs.snapshot(job_id)
+            if job is None:
+                return
+            if job["version"] != last_version:
+                last_version = job["version"]
+                yield f"data: {json.dumps(job)}\n\n"
+            if job["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_S)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# Blocking DB calls: plain `def` routes run on FastAPI's threadpool, not the event loop
 @app.get("/projects")
-async def get_all_projects():
+def get_all_projects():
     print("Fetching all projects")
     returnlst = get_projects_list()
     return returnlst
 
 @app.get("/projects/{project_id}/files")
-async def get_file_data(project_id: str):
+def get_file_data(project_id: str):
     print("Fetching files for project_id: ", project_id)
     files = get_project_files(project_id)
     return files
 
+@app.get("/projects/{project_id}/files/summary")
+def get_file_summaries(project_id: str, after: Optional[str] = None, limit: int = FILES_PAGE_SIZE):
+    """Paged listing without file contents: {files: [{file_id, file_name, file_size, summary_preview}], next_cursor}."""
+    return list_file_summaries(project_id, after=after, limit=max(1, min(limit, 1000)))
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/").strip('"') for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+@app.get("/projects/{project_id}/files/{file_id}/content")
+def get_file_content(project_id: str, file_id: str, if_none_match: Optional[str] = Header(default=None)):
+    """One file's full content; answers 304 when If-None-Match carries the current ETag."""
+    cache_headers = {"Cache-Control": "private, max-age=0, must-revalidate"}
+    etag = get_file_etag(project_id, file_id)
+    if etag and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": f'"{etag}"', **cache_headers})
+    pf = get_file(project_id, file_id)
+    if pf is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    body = json.dumps({
+        "file_id": pf.file_id,
+        "file_name": pf.file_name,
+        "file_summary": pf.file_summary or "",
+        "file_content": pf.file_content or "",
+    })
+    etag = file_etag(pf)
+    if etag:
+        cache_headers["ETag"] = f'"{etag}"'
+    return Response(content=body, media_type="application/json", headers=cache_headers)
+
+@app.get("/projects/{project_id}/search")
+def search_files(project_id: str, q: str, limit: int = 20):
+    """Full-text search over names, summaries and contents: {hits: [{file_id, file_name, snippet, score}]}."""
+    return {"hits": search_project_files(project_id, q, limit=limit)}
 
 @app.get("/projects/{project_id}/readme")
-async def get_readme_content(project_id: str) -> str:
+def get_readme_content(project_id: str) -> str:
     return get_readme(project_id)
     
\ No newline at end of file
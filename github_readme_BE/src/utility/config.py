@@ -1,5 +1,5 @@
 # Safety limits to keep prompts small (character-based, coarse control)
-MAX_FILES_TO_SUMMARIZE = 120           # cap number of files summarized
+MAX_FILES_TO_SUMMARIZE = 2000          # cap number of files summarized (reduce step is hierarchical)
 MAX_CHARS_PER_FILE_SNIPPET = 4000      # truncate each file's content
 
 # Configure which file extensions count as "programming language files"
@@ -22,4 +22,61 @@ DEFAULT_EXCLUDE_DIRS = {
 }
 
 PROJECT_TABLE = "projects"
-PROJECT_FILES_TABLE = "project_files"
\ No newline at end of file
+PROJECT_FILES_TABLE = "project_files"
+
+# Map phase (per-file summaries) concurrency and resilience
+MAX_CONCURRENT_SUMMARIES = 8           # max LLM calls in flight at once
+SUMMARY_TIMEOUT_S = 60                 # per-call timeout (seconds)
+SUMMARY_MAX_RETRIES = 4                # retries on rate-limit errors
+SUMMARY_RETRY_BASE_DELAY_S = 1.0       # backoff: base * 2**attempt (+ jitter)
+
+# Content-addressed summary cache (sha256(content), prompt version, model) -> summary
+SUMMARY_PROMPT_VERSION = "v1"          # bump whenever SUMMARY_PROMPT changes
+SUMMARY_CACHE_MAX_BYTES = 64 * 1024 * 1024  # LRU-evict beyond this many summary bytes
+
+# Hierarchical reduce (compose_readme): summaries are folded until they fit one prompt
+CHARS_PER_TOKEN = 4                    # coarse token estimate for budgeting
+REDUCE_FINAL_TOKEN_BUDGET = 12000      # max summary tokens sent to the final README prompt
+REDUCE_BATCH_TOKEN_BUDGET = 6000       # max summary tokens per intermediate reduce call
+MAX_REDUCE_LEVELS = 5                  # safety stop; leftovers are truncated to the budget
+
+# Repository scanner (gitignore/gitattributes aware, binary sniffing, importance ranking)
+SCANNER_MAX_WORKERS = 8                # threads reading file contents
+MAX_BYTES_PER_FILE = 512 * 1024        # larger files are skipped outright
+BINARY_SNIFF_BYTES = 8192              # a NUL byte in this prefix marks a file as binary
+MINIFIED_AVG_LINE_LEN = 300            # avg chars/line above this looks minified/bundled
+
+# Lock files, bundles and other generated artifacts (fnmatch patterns on the file name)
+GENERATED_NAME_PATTERNS = {
+    "*.min.js", "*.min.css", "*.bundle.js", "*.chunk.js", "*.map",
+    "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.generated.*",
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "uv.lock", "Cargo.lock",
+}
+
+# Files that describe the project; always scanned and ranked first
+MANIFEST_FILES = {
+    "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt", "Pipfile",
+    "package.json", "go.mod", "Cargo.toml", "pom.xml", "build.gradle",
+    "Dockerfile", "docker-compose.yml", "docker-compose.yaml", "Makefile",
+}
+
+# File stems that usually mark an entry point
+ENTRY_POINT_STEMS = {"main", "app", "index", "server", "cli", "manage", "wsgi", "asgi", "__main__"}
+
+# Background README jobs (/repo)
+JOB_MAX_WORKERS = 2                    # README pipelines running at the same time
+JOB_HISTORY_LIMIT = 200                # finished jobs kept for polling before pruning
+JOB_EVENTS_POLL_S = 0.5                # how often /jobs/{id}/events checks for updates
+
+# Persistence: chunked inserts and keyset pagination for project files
+FILE_INSERT_BATCH_ROWS = 200           # max rows per insert request
+FILE_INSERT_BATCH_BYTES = 1_000_000    # max (approx. JSON) payload bytes per insert request
+FILES_PAGE_SIZE = 200                  # default page size when listing files
+FILE_COLUMNS = ("file_id", "project_id", "file_name", "file_content", "file_summary", "file_size", "content_sha256")
+FILE_SUMMARY_COLUMNS = ("file_id", "project_id", "file_name", "file_summary", "file_size", "content_sha256")
+SUMMARY_PREVIEW_CHARS = 200            # summary characters returned by the lightweight listing
+
+# Full-text search over project files (SQLite FTS5, built at ingest time)
+SEARCH_MAX_RESULTS = 50                # hard cap on hits returned by /search
+SEARCH_SNIPPET_TOKENS = 12             # tokens of context around each highlighted match
+SEARCH_WEIGHTS = (10.0, 3.0, 1.0)      # bm25 weights for file_name, file_summary, file_content
@@ -1,8 +1,10 @@
-import os
+import json
 from pathlib import Path
-from typing import Optional, Set
+from typing import Iterator, Optional, Set, Tuple
 
-from .config import CODE_EXTS, DEFAULT_EXCLUDE_DIRS
+from .config import MAX_BYTES_PER_FILE
+from .path import get_agg_pack_paths
+from .repo_scanner import scan_repository, read_candidates
 
 PROJECT_MARKERS = ("pyproject.toml", "setup.cfg", "setup.py", ".git", ".env")
 
@@ -19,67 +21,61 @@ def _sanitize_project_name(name: str) -> str:
     clean = Path(str(name).strip().strip('"\''))  # strip whitespace and quotes
     return clean.name  # last path segment only
 
-def aggregate_code(
-    project_name: str,
-    include_exts: Optional[Set[str]] = None,
-    exclude_dirs: Optional[Set[str]] = None,
-    max_bytes_per_file: Optional[int] = None,
-) -> int:
-    """
-    Read from <root>/output/git/<project_name> and write to
-    <root>/output/aggregate/<project_name>/aggregated_code.txt
-    """
+def _resolve_repo_dir(project_name: str) -> Path:
     project_root = get_project_root()
     pname = _sanitize_project_name(project_name)
-
     repo_dir = (project_root / "src" / "output" / "git" / pname).resolve()
-    out_dir  = (project_root / "src" / "output" / "aggregate" / pname).resolve()
-    out_path = out_dir / "aggregated_code.txt"
-
-    # --- helpful debug when things go wrong ---
-    # print(f"[aggregate_code] project_root={project_root}")
-    # print(f"[aggregate_code] project_name(raw)={repr(project_name)}  sanitized={pname}")
-    # print(f"[aggregate_code] repo_dir={repo_dir}  exists={repo_dir.exists()}")
-
     if not repo_dir.exists():
         raise FileNotFoundError(
             f"Repo directory not found: {repo_dir}\n"
             f"Expected structure: output/git/{pname}/\n"
             f"(Got project_name={repr(project_name)} → sanitized={pname})"
         )
+    return repo_dir
 
-    out_dir.mkdir(parents=True, exist_ok=True)
+def iter_code_files(
+    project_name: str,
+    include_exts: Optional[Set[str]] = None,
+    exclude_dirs: Optional[Set[str]] = None,
+    max_bytes_per_file: Optional[int] = MAX_BYTES_PER_FILE,
+    limit: Optional[int] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Lazily yield (relative_posix_path, content) for the code files under
+    <root>/output/git/<project_name>, most important first (see repo_scanner).
+    .gitignore/.gitattributes exclusions, binary and minified files are skipped;
+    contents are read on a thread pool with a bounded look-ahead, so memory
+    does not grow with the size of the repository. `limit` caps files yielded.
+    """
+    repo_dir = _resolve_repo_dir(project_name)
+    candidates = scan_repository(repo_dir, include_exts, exclude_dirs, max_bytes_per_file)
+    yield from read_candidates(candidates, limit=limit)
 
-    include_exts = include_exts or CODE_EXTS
-    exclude_dirs = exclude_dirs or DEFAULT_EXCLUDE_DIRS
-    exclude_dirs_lower = {d.lower() for d in exclude_dirs}
+def aggregate_code(
+    project_name: str,
+    include_exts: Optional[Set[str]] = None,
+    exclude_dirs: Optional[Set[str]] = None,
+    max_bytes_per_file: Optional[int] = None,
+) -> int:
+    """
+    Optional on-disk snapshot of the crawl. Streams files from
+    <root>/output/git/<project_name> into
+    <root>/output/aggregate/<project_name>/aggregated_code.pack (raw UTF-8 bytes, back to back)
+    plus aggregated_code.index.jsonl ({"path", "offset", "length"} per line), so single files
+    can later be sliced out with mmap (see preprocess_file.read_block). Returns files written.
+    """
+    pname = _sanitize_project_name(project_name)
+    pack_path, index_path = get_agg_pack_paths(pname)
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
 
     files_written = 0
-    candidate_files: list[Path] = []
-
-    for dirpath, dirnames, filenames in os.walk(repo_dir):
-        dirnames[:] = [d for d in dirnames if d.lower() not in exclude_dirs_lower]
-        for fname in filenames:
-            if Path(fname).suffix.lower() in include_exts:
-                candidate_files.append(Path(dirpath) / fname)
-
-    candidate_files.sort(key=lambda p: str(p.relative_to(repo_dir)).lower())
-
-    with out_path.open("w", encoding="utf-8", errors="ignore") as out:
-        for fpath in candidate_files:
-            try:
-                if max_bytes_per_file is not None and fpath.stat().st_size > max_bytes_per_file:
-                    continue
-                rel = fpath.relative_to(repo_dir).as_posix()
-                content = fpath.read_text(encoding="utf-8", errors="ignore")
-
-                out.write(f"Path - {rel}\n\n")
-                out.write(content)
-                if not content.endswith("\n"):
-                    out.write("\n")
-                out.write("---\n")
-                files_written += 1
-            except Exception:
-                continue
-
-    return files_written
\ No newline at end of file
+    offset = 0
+    with pack_path.open("wb") as pack, index_path.open("w", encoding="utf-8") as index:
+        for rel, content in iter_code_files(pname, include_exts, exclude_dirs, max_bytes_per_file):
+            data = content.encode("utf-8")
+            pack.write(data)
+            index.write(json.dumps({"path": rel, "offset": offset, "length": len(data)}) + "\n")
+            offset += len(data)
+            files_written += 1
+
+    return files_written
@@ -1,15 +1,106 @@
+import json
+import shutil
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from git import Repo
+from typing import Iterable, Optional
 
-def clone_repo(repo_url: str, project_name: str):
-    base_dir = Path(__file__).resolve().parent.parent  # go up to project root
-    clone_dir = base_dir / "output" / "git" / project_name
-    
-    print("Base dir : ", base_dir)
-    print("Clone dir : ", clone_dir)
+from git import Git, Repo
 
+from .path import get_git_repo_path
+
+CLONE_DEPTH = 1
+BLOB_FILTER = "blob:none"
+
+
+@dataclass
+class CloneResult:
+    path: Path
+    sha: str
+    previous_sha: Optional[str] = None
+
+    @property
+    def changed(self) -> bool:
+        return self.sha != self.previous_sha
+
+
+def _state_path(clone_dir: Path) -> Path:
+    return clone_dir.parent / f"{clone_dir.name}.clone.json"
+
+
+def read_recorded_sha(project_name: str) -> Optional[str]:
+    """Commit SHA recorded by the last successful clone/fetch of this project, if any."""
+    state = _state_path(get_git_repo_path(project_name))
+    if not state.exists():
+        return None
+    try:
+        return json.loads(state.read_text(encoding="utf-8")).get("sha")
+    except (OSError, ValueError):
+        return None
+
+
+def _record(clone_dir: Path, repo_url: str, sha: str) -> None:
+    _state_path(clone_dir).write_text(
+        json.dumps({"repo_url": repo_url, "sha": sha, "fetched_at": time.time()}),
+        encoding="utf-8",
+    )
+
+
+def resolve_remote_sha(repo_url: str) -> Optional[str]:
+    """SHA of the remote's HEAD via `git ls-remote` (no clone needed)."""
     try:
-        Repo.clone_from(repo_url, str(clone_dir))
-        print(f"Repository cloned into {clone_dir}")
+        out = Git().ls_remote(repo_url, "HEAD")
     except Exception as e:
-        print("Error cloning repository:", e)
+        print("Could not resolve remote HEAD:", e)
+        return None
+    return out.split()[0] if out else None
+
+
+def _fetch_existing(repo: Repo, repo_url: str, depth: int) -> None:
+    origin = repo.remotes.origin
+    if origin.url != repo_url:
+        origin.set_url(repo_url)
+    repo.git.fetch(f"--depth={depth}", f"--filter={BLOB_FILTER}", "origin", "HEAD")
+    repo.git.reset("--hard", "FETCH_HEAD")
+    repo.git.clean("-fd")
+
+
+def clone_repo(
+    repo_url: str,
+    project_name: str,
+    sparse_paths: Optional[Iterable[str]] = None,
+    depth: int = CLONE_DEPTH,
+) -> CloneResult:
+    """
+    Shallow (depth-1), blob-filtered clone of `repo_url` into output/git/<project_name>.
+    An existing local copy is reused and fast-forwarded with a shallow fetch instead
+    of being cloned again. `sparse_paths` restricts the checkout (git sparse-checkout).
+    The resolved commit SHA is recorded next to the clone so later stages can skip
+    work when it has not changed.
+    """
+    clone_dir = get_git_repo_path(project_name)
+    clone_dir.parent.mkdir(parents=True, exist_ok=True)
+    previous_sha = read_recorded_sha(project_name)
+    sparse_paths = list(sparse_paths or [])
+
+    if (clone_dir / ".git").exists():
+        print(f"Fetching into existing clone {clone_dir}")
+        repo = Repo(str(clone_dir))
+        _fetch_existing(repo, repo_url, depth)
+    else:
+        if clone_dir.exists():
+            # Leftover from a failed clone; it is not a usable repository
+            shutil.rmtree(clone_dir)
+        print(f"Cloning {repo_url} into {clone_dir}")
+        kwargs = {"depth": depth, "filter": BLOB_FILTER}
+        if sparse_paths:
+            kwargs["sparse"] = True
+        repo = Repo.clone_from(repo_url, str(clone_dir), **kwargs)
+
+    if sparse_paths:
+        repo.git.sparse_checkout("set", *sparse_paths)
+
+    sha = repo.head.commit.hexsha
+    _record(clone_dir, repo_url, sha)
+    print(f"Repository at {sha} (previous: {previous_sha})")
+    return CloneResult(path=clone_dir, sha=sha, previous_sha=previous_sha)
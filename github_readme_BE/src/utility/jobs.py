@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, Optional, Tuple
+
+from .config import JOB_MAX_WORKERS, JOB_HISTORY_LIMIT
+
+# Pipeline stages reported through progress callbacks, in order
+STAGES = ("queued", "cloned", "crawled", "summarizing", "composed", "done")
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+# stage, done, total
+ProgressCallback = Callable[[str, int, int], None]
+# project_name, git_url, sha
+JobKey = Tuple[str, str, str]
+
+
+@dataclass
+class Job:
+    job_id: str
+    project_name: str
+    git_url: str
+    sha: Optional[str] = None
+    status: str = "queued"             # queued | running | succeeded | failed
+    stage: str = "queued"
+    done: int = 0
+    total: int = 0
+    message: str = ""
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    version: int = 0                   # bumped on every update (used by SSE)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class JobManager:
+    """
+    Runs README pipelines on a bounded thread pool and keeps their progress
+    in memory for polling. A submission for a (project_name, git_url, sha)
+    that is already queued or running returns the existing job instead of
+    starting another. Without a resolved sha nothing is deduplicated, since
+    two such requests may target different commits.
+    """
+
+    def __init__(self, max_workers: int = JOB_MAX_WORKERS, history_limit: int = JOB_HISTORY_LIMIT):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="readme-job")
+        self._history_limit = history_limit
+        self._jobs: Dict[str, Job] = {}
+        self._inflight: Dict[JobKey, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        project_name: str,
+        git_url: str,
+        sha: Optional[str],
+        work: Callable[[Job, ProgressCallback], str],
+    ) -> Tuple[Job, bool]:
+        """
+        Queue `work(job, progress)`; its return value becomes the job message.
+        Returns (job, created) where created is False for a deduplicated submission.
+        """
+        key = (project_name, git_url, sha) if sha else None
+        with self._lock:
+            existing_id = self._inflight.get(key) if key else None
+            if existing_id and self._jobs[existing_id].status not in TERMINAL_STATUSES:
+                return self._jobs[existing_id], False
+            job = Job(job_id=uuid.uuid4().hex, project_name=project_name, git_url=git_url, sha=sha)
+            self._jobs[job.job_id] = job
+            if key:
+                self._inflight[key] = job.job_id
+            self._prune()
+        self._pool.submit(self._run, job, key, work)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def snapshot(self, job_id: str) -> Optional[dict]:
+        """Consistent copy of a job's fields (safe to serialize while the job runs)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = time.time()
+            job.version += 1
+
+    def _run(self, job: Job, key: Optional[JobKey], work: Callable[[Job, ProgressCallback], str]) -> None:
+        def progress(stage: str, done: int = 0, total: int = 0) -> None:
+            self.update(job.job_id, stage=stage, done=done, total=total)
+
+        self.update(job.job_id, status="running")
+        try:
+            message = work(job, progress)
+            self.update(job.job_id, status="succeeded", stage="done", message=message or "")
+        except Exception as e:
+            print(f"Job {job.job_id} failed: {e}")
+            self.update(job.job_id, status="failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                if key and self._inflight.get(key) == job.job_id:
+                    del self._inflight[key]
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond the history limit (caller holds the lock)."""
+        finished = [j for j in self._jobs.values() if j.status in TERMINAL_STATUSES]
+        excess = len(self._jobs) - self._history_limit
+        for j in sorted(finished, key=lambda j: j.updated_at)[: max(0, excess)]:
+            del self._jobs[j.job_id]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
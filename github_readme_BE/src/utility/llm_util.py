@@ -1,15 +1,35 @@
 import os
+import asyncio
+import posixpath
+import random
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from typing import List, Tuple
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
 from .supabase.models import ProjectFile, Project
 from .supabase.database import save_files_data, save_readme
 
-from .config import MAX_CHARS_PER_FILE_SNIPPET, MAX_FILES_TO_SUMMARIZE
-from .preprocess_file import parse_blocks
-from .path import get_readme_output_path
+from .config import (
+    MAX_CHARS_PER_FILE_SNIPPET,
+    MAX_FILES_TO_SUMMARIZE,
+    MAX_CONCURRENT_SUMMARIES,
+    SUMMARY_TIMEOUT_S,
+    SUMMARY_MAX_RETRIES,
+    SUMMARY_RETRY_BASE_DELAY_S,
+    SUMMARY_PROMPT_VERSION,
+    CHARS_PER_TOKEN,
+    REDUCE_FINAL_TOKEN_BUDGET,
+    REDUCE_BATCH_TOKEN_BUDGET,
+    MAX_REDUCE_LEVELS,
+)
+from .file_crawler import iter_code_files
+from .path import get_readme_output_path, get_readme_sha_path
+from .summary_cache import SummaryCache, get_summary_cache, hash_content
+from .jobs import ProgressCallback
 
 load_dotenv()
 
@@ -28,52 +48,248 @@ def get_llm_model() -> ChatOpenAI:
         streaming=False,
     )
 
-def summarize_files(LLM: ChatOpenAI, blocks: List[Tuple[str, str]], projectName: str) -> str:
+SUMMARY_PROMPT = PromptTemplate.from_template(
+    "You are a precise code summarizer. Summarize the file below for a README.\n"
+    "Focus on: purpose, key responsibilities, important functions/classes/exports, routes/CLI, "
+    "external deps, and how it fits the project. No code snippets.\n\n"
+    "PATH: {path}\n"
+    "CONTENT:\n```\n{code}\n```\n\n"
+    "Output 3–6 concise bullet points."
+)
+
+def _is_rate_limit_error(e: Exception) -> bool:
+    """True for HTTP 429 / provider rate-limit errors (checked by shape, not by SDK class)."""
+    if getattr(e, "status_code", None) == 429:
+        return True
+    return "ratelimit" in type(e).__name__.lower() or "rate limit" in str(e).lower()
+
+async def _summarize_one(chain, semaphore: asyncio.Semaphore, path: str, code: str) -> str:
+    """Summarize a single file, bounded by `semaphore`, with timeout and rate-limit backoff."""
+    snippet = code[:MAX_CHARS_PER_FILE_SNIPPET]
+    async with semaphore:
+        for attempt in range(SUMMARY_MAX_RETRIES + 1):
+            try:
+                s = await asyncio.wait_for(
+                    chain.ainvoke({"path": path, "code": snippet}),
+                    timeout=SUMMARY_TIMEOUT_S,
+                )
+                return s.strip()
+            except Exception as e:
+                if attempt >= SUMMARY_MAX_RETRIES or not _is_rate_limit_error(e):
+                    raise
+                delay = SUMMARY_RETRY_BASE_DELAY_S * (2 ** attempt)
+                delay += random.uniform(0, SUMMARY_RETRY_BASE_DELAY_S)
+                print(f"Rate limited on {path}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+                await asyncio.sleep(delay)
+
+def get_model_name(LLM: BaseChatModel) -> str:
+    """Model identifier used as part of the summary cache key."""
+    return getattr(LLM, "model_name", None) or getattr(LLM, "model", None) or type(LLM).__name__
+
+async def asummarize_files(
+    LLM: BaseChatModel,
+    blocks: Iterable[Tuple[str, str]],
+    max_concurrency: int = MAX_CONCURRENT_SUMMARIES,
+    cache: Optional[SummaryCache] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Tuple[str, str, Optional[str]]]:
     """
-    Map step: summarize each file briefly to keep context tiny.
-    Returns a concatenated multi-file summary string.
+    Concurrent map step. Returns (path, code, summary) in the same order as `blocks`;
+    summary is None when the file could not be summarized.
+    `blocks` may be a lazy iterator; at most MAX_FILES_TO_SUMMARIZE items are consumed.
+    When `cache` is given, only files whose content is not cached hit the LLM.
+    `progress` receives ("crawled", 0, M) once, then ("summarizing", N, M) per finished file.
     """
-    file_level_data = []
-    prompt = PromptTemplate.from_template(
-        "You are a precise code summarizer. Summarize the file below for a README.\n"
-        "Focus on: purpose, key responsibilities, important functions/classes/exports, routes/CLI, "
-        "external deps, and how it fits the project. No code snippets.\n\n"
-        "PATH: {path}\n"
-        "CONTENT:\n```\n{code}\n```\n\n"
-        "Output 3–6 concise bullet points."
-    )
-    chain = prompt | LLM | StrOutputParser()
-
-    summaries: List[str] = []
-    limit = min(MAX_FILES_TO_SUMMARIZE, len(blocks))
-    for i in range(limit):
-        path, code = blocks[i]
-        snippet = code[:MAX_CHARS_PER_FILE_SNIPPET]
-        # print("Summarizing file:", path, len(code))
+    chain = SUMMARY_PROMPT | LLM | StrOutputParser()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    selected = list(islice(blocks, MAX_FILES_TO_SUMMARIZE))
+    model_name = get_model_name(LLM)
+
+    results: List[object] = [None] * len(selected)
+    hashes: List[str] = [""] * len(selected)
+    pending: List[int] = []
+    for i, (path, code) in enumerate(selected):
+        if cache is not None:
+            hashes[i] = hash_content(code)
+            cached = cache.get(hashes[i], SUMMARY_PROMPT_VERSION, model_name)
+            if cached is not None:
+                results[i] = cached
+                continue
+        pending.append(i)
+
+    total = len(selected)
+    done = total - len(pending)
+    if progress:
+        progress("crawled", 0, total)
+        progress("summarizing", done, total)
+
+    async def tracked(i: int) -> str:
+        nonlocal done
         try:
-            s = chain.invoke({"path": path, "code": snippet})
-            summaries.append(f"### {path}\n{s.strip()}\n")
-            project_file = ProjectFile(
-                file_name=path,
-                file_content=code,
-                file_summary=s.strip()
-            )
-            # print("Adding file summary to database: ", project_file)
-            file_level_data.append(project_file)
-        except Exception as e:
+            return await _summarize_one(chain, semaphore, *selected[i])
+        finally:
+            done += 1
+            if progress:
+                progress("summarizing", done, total)
+
+    fresh = await asyncio.gather(*(tracked(i) for i in pending), return_exceptions=True)
+    for i, res in zip(pending, fresh):
+        results[i] = res
+        if cache is not None and isinstance(res, str):
+            cache.put(hashes[i], SUMMARY_PROMPT_VERSION, model_name, res)
+
+    if cache is not None:
+        print(f"Summary cache: {len(selected) - len(pending)} hits, {len(pending)} misses ({cache.stats()})")
+
+    out: List[Tuple[str, str, Optional[str]]] = []
+    for (path, code), res in zip(selected, results):
+        if isinstance(res, BaseException):
             # Skip problematic files but continue
-            
-            print(f"Error summarizing file {path}: {e}")
-            summaries.append(f"### {path}\n- (summary failed: {e})\n")
+            if isinstance(res, asyncio.TimeoutError):
+                res = TimeoutError(f"timed out after {SUMMARY_TIMEOUT_S}s")
+            print(f"Error summarizing file {path}: {res}")
+            out.append((path, code, None))
+        else:
+            out.append((path, code, res))
+    return out
+
+def _run_sync(coro):
+    """Run a coroutine to completion from sync code, even if an event loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from inside a running loop (e.g. an async FastAPI handler): use a helper thread.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+def summarize_files(
+    LLM: BaseChatModel,
+    blocks: Iterable[Tuple[str, str]],
+    projectName: str,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Map step: summarize each file briefly to keep context tiny.
+    Files are summarized concurrently (see MAX_CONCURRENT_SUMMARIES); output order matches `blocks`.
+    Unchanged files are served from the on-disk summary cache.
+    Returns (path, "### path + bullets") sections for the reduce step.
+    """
+    results = _run_sync(asummarize_files(LLM, blocks, cache=get_summary_cache(), progress=progress))
+
+    file_level_data = []
+    summaries: List[Tuple[str, str]] = []
+    for path, code, s in results:
+        if s is None:
+            summaries.append((path, f"### {path}\n- (summary failed)\n"))
+            continue
+        summaries.append((path, f"### {path}\n{s}\n"))
+        file_level_data.append(ProjectFile(
+            file_name=path,
+            file_content=code,
+            file_summary=s
+        ))
     # print("Saving file-level summaries to database...", file_level_data)
     save_files_data(projectName, file_level_data)
-    return "\n".join(summaries)
+    return summaries
+
+REDUCE_PROMPT = PromptTemplate.from_template(
+    "You are condensing file summaries of one part of a repository for a later README pass.\n"
+    "SCOPE: {scope}\n\n"
+    "SUMMARIES:\n{summaries}\n\n"
+    "Merge them into 4–10 concise bullet points covering purpose, main components, "
+    "entry points/routes/CLI, external deps and configuration. Keep file and directory names. No code."
+)
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _common_dir(paths: List[str]) -> str:
+    dirs = [posixpath.dirname(p) for p in paths]
+    try:
+        common = posixpath.commonpath(dirs) if dirs else ""
+    except ValueError:
+        common = ""
+    return common or "."
+
+def _pack_batches(items: List[Tuple[str, str]], budget_tokens: int) -> List[List[Tuple[str, str]]]:
+    """
+    Greedily pack (path, text) items, sorted by path so siblings stay together,
+    into batches of at most `budget_tokens`. A batch is closed early at a
+    top-level directory boundary once it is at least half full.
+    """
+    batches: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    used = 0
+    for path, text in sorted(items, key=lambda it: it[0].lower()):
+        cost = estimate_tokens(text)
+        if cost > budget_tokens:
+            text = text[: budget_tokens * CHARS_PER_TOKEN]
+            cost = budget_tokens
+        top = path.split("/", 1)[0]
+        new_dir = bool(current) and current[-1][0].split("/", 1)[0] != top
+        if current and (used + cost > budget_tokens or (new_dir and used >= budget_tokens // 2)):
+            batches.append(current)
+            current, used = [], 0
+        current.append((path, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+async def areduce_summaries(
+    LLM: BaseChatModel,
+    items: List[Tuple[str, str]],
+    max_concurrency: int = MAX_CONCURRENT_SUMMARIES,
+) -> str:
+    """
+    Multi-level reduce: while the summaries exceed REDUCE_FINAL_TOKEN_BUDGET, group them
+    by directory into token-budgeted batches and condense every batch (concurrently).
+    Returns a single summary text that fits the final prompt.
+    """
+    chain = REDUCE_PROMPT | LLM | StrOutputParser()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-def compose_readme(LLM: ChatOpenAI, multi_file_summary: str) -> str:
+    async def reduce_batch(batch: List[Tuple[str, str]], shrink_singletons: bool) -> Tuple[str, str]:
+        paths = [p for p, _ in batch]
+        scope = _common_dir(paths)
+        if len(batch) == 1 and not shrink_singletons:
+            return batch[0]
+        text = "\n".join(t for _, t in batch)
+        async with semaphore:
+            try:
+                s = await asyncio.wait_for(
+                    chain.ainvoke({"scope": scope, "summaries": text}),
+                    timeout=SUMMARY_TIMEOUT_S,
+                )
+            except Exception as e:
+                print(f"Error reducing {scope} ({len(batch)} summaries): {e}")
+                s = text[: REDUCE_BATCH_TOKEN_BUDGET * CHARS_PER_TOKEN // len(batch)]
+        # Keep a path-like key so the next level still groups by directory
+        key = paths[0] if scope == "." else f"{scope}/"
+        return (key, f"### {scope}/\n{s.strip()}\n")
+
+    level = 0
+    while sum(estimate_tokens(t) for _, t in items) > REDUCE_FINAL_TOKEN_BUDGET:
+        if level >= MAX_REDUCE_LEVELS:
+            print(f"Reduce stopped after {level} levels; truncating to the final budget")
+            break
+        batches = _pack_batches(items, REDUCE_BATCH_TOKEN_BUDGET)
+        print(f"Reduce level {level + 1}: {len(items)} summaries -> {len(batches)} batches")
+        # If packing made no progress (every batch is a single large item), condense those too
+        shrink = len(batches) == len(items)
+        items = list(await asyncio.gather(*(reduce_batch(b, shrink) for b in batches)))
+        level += 1
+
+    joined = "\n".join(t for _, t in sorted(items, key=lambda it: it[0].lower()))
+    return joined[: REDUCE_FINAL_TOKEN_BUDGET * CHARS_PER_TOKEN]
+
+def compose_readme(LLM: BaseChatModel, summaries: List[Tuple[str, str]]) -> str:
     """
-    Reduce + final step: produce a complete README.md
-    from the compact multi-file summary.
+    Reduce + final step: fold the per-file summaries hierarchically until they
+    fit one prompt, then produce a complete README.md from them.
     """
+    multi_file_summary = _run_sync(areduce_summaries(LLM, summaries))
     final_prompt = PromptTemplate.from_template(
         "You will write a high-quality README.md for a repository using the condensed file summaries below.\n"
         "Write concise, actionable documentation without large code blocks. Use fenced blocks only for commands.\n\n"
@@ -95,20 +311,36 @@ def compose_readme(LLM: ChatOpenAI, multi_file_summary: str) -> str:
     chain = final_prompt | LLM | StrOutputParser()
     return chain.invoke({"summaries": multi_file_summary})
 
-def generate_readme_file(projectName: str) -> str:
+def is_readme_current(projectName: str, source_sha: Optional[str]) -> bool:
+    """True if readme.md exists and was generated from `source_sha`."""
+    sha_path = get_readme_sha_path(projectName)
+    if not source_sha or not sha_path.exists() or not get_readme_output_path(projectName).exists():
+        return False
+    return sha_path.read_text(encoding="utf-8").strip() == source_sha
+
+def generate_readme_file(
+    projectName: str,
+    source_sha: Optional[str] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> str:
     """
     Orchestrates the map → reduce → write pipeline.
+    `source_sha` (the cloned commit) is recorded next to the README for is_readme_current.
+    `progress(stage, done, total)` is called for crawled / summarizing / composed.
     Returns the output README path.
     """
     LLM = get_llm_model()
-    blocks = parse_blocks(projectName)
+    # Stream (path, content) straight from the cloned repo; no intermediate aggregate file
+    blocks = iter_code_files(projectName, limit=MAX_FILES_TO_SUMMARIZE)
     README_OUTPUT_PATH = get_readme_output_path(projectName)
 
     # Map: per-file micro-summaries (bounded by limits above)
-    multi_file_summary = summarize_files(LLM, blocks, projectName)
+    file_summaries = summarize_files(LLM, blocks, projectName, progress=progress)
 
     # Reduce/final: compose full README from condensed context
-    readme_text = compose_readme(LLM, multi_file_summary)
+    readme_text = compose_readme(LLM, file_summaries)
+    if progress:
+        progress("composed", len(file_summaries), len(file_summaries))
     
     # Save README to database
     project = Project(project_name=projectName, readme_doc=readme_text)
@@ -119,5 +351,7 @@ def generate_readme_file(projectName: str) -> str:
 
     with open(README_OUTPUT_PATH, "w", encoding="utf-8") as outf:
         outf.write(readme_text)
+    if source_sha:
+        get_readme_sha_path(projectName).write_text(source_sha, encoding="utf-8")
 
     return README_OUTPUT_PATH
\ No newline at end of file
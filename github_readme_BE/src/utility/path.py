@@ -10,11 +10,11 @@ def get_project_root(start: Optional[Path] = None) -> Path:
             return parent
     return here.parent
 
-def get_agg_file_path(projectName: str):
-    project_root = get_project_root()    
+def get_agg_pack_paths(projectName: str):
+    """(pack, index) paths of the offset-indexed aggregate written by aggregate_code."""
+    project_root = get_project_root()
     out_dir  = (project_root / "src" / "output" / "aggregate" / projectName).resolve()
-    out_path = out_dir / "aggregated_code.txt"
-    return out_path
+    return out_dir / "aggregated_code.pack", out_dir / "aggregated_code.index.jsonl"
 
 def get_git_repo_path(projectName:str):
     project_root = get_project_root()
@@ -27,4 +27,26 @@ def get_readme_output_path(projectName: str):
     out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / "readme.md"
     return out_path
-    
\ No newline at end of file
+    
+def get_summary_cache_path():
+    project_root = get_project_root()
+    out_dir = (project_root / "src" / "output" / "cache").resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir / "summaries.sqlite3"
+
+def get_readme_sha_path(projectName: str):
+    """Commit SHA the current readme.md was generated from."""
+    return get_readme_output_path(projectName).with_name("readme.sha")
+
+def get_local_db_path():
+    """Default location of the SQLite stand-in for Supabase (STORAGE_BACKEND=sqlite)."""
+    project_root = get_project_root()
+    out_dir = (project_root / "src" / "output" / "db").resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir / "readme_be.sqlite3"
+
+def get_search_index_path():
+    project_root = get_project_root()
+    out_dir = (project_root / "src" / "output" / "search").resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    return out_dir / "files_fts.sqlite3"
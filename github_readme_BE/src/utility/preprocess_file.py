@@ -1,12 +1,7 @@
-from typing import List, Tuple
-from .path import get_agg_file_path, get_readme_output_path
-
-def get_file_data(projectName:str) -> str:    
-    """Read the aggregated code file."""
-    path = get_agg_file_path(projectName)
-    
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+import json
+import mmap
+from typing import Dict, Iterator, List, Optional, Tuple
+from .path import get_agg_pack_paths, get_readme_output_path
 
 def get_readme_data(projectName:str) -> str:    
     """Read the generated README file."""
@@ -15,23 +10,46 @@ def get_readme_data(projectName:str) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
-def parse_blocks(projectName: str) -> List[Tuple[str, str]]:
+def _read_index(projectName: str) -> Iterator[Dict]:
+    _, index_path = get_agg_pack_paths(projectName)
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_blocks(projectName: str) -> Iterator[Tuple[str, str]]:
     """
-    Parse aggregated file blocks of the form:
-        <relative/path>
-        <file contents...>
-        ---
-    Returns list of (path, code) tuples.
+    Lazily yield (path, code) from the offset-indexed aggregate written by
+    file_crawler.aggregate_code. Each file is decoded from a memory-mapped
+    slice, so only one file's content is materialized at a time.
     """
-    file_data = get_file_data(projectName)
-    raw_blocks = [b.strip("\n") for b in file_data.split("\n---\n") if b.strip()]
-    blocks: List[Tuple[str, str]] = []
-    for b in raw_blocks:
-        if "\n" not in b:
-            # Block with only a path and no content; skip
+    pack_path, _ = get_agg_pack_paths(projectName)
+    with open(pack_path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for entry in _read_index(projectName):
+                start = entry["offset"]
+                code = mm[start : start + entry["length"]].decode("utf-8", errors="ignore")
+                if code.strip():
+                    yield entry["path"], code
+
+def read_block(projectName: str, rel_path: str) -> Optional[str]:
+    """Fetch a single file's content from the aggregate without reading the rest."""
+    for entry in _read_index(projectName):
+        if entry["path"] != rel_path:
             continue
-        first_nl = b.find("\n")
-        rel_path = b[:first_nl].strip()
-        code = b[first_nl + 1 :]
-        blocks.append((rel_path, code))
-    return blocks
\ No newline at end of file
+        if entry["length"] == 0:
+            return ""
+        pack_path, _ = get_agg_pack_paths(projectName)
+        with open(pack_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = entry["offset"]
+            return mm[start : start + entry["length"]].decode("utf-8", errors="ignore")
+    return None
+
+def parse_blocks(projectName: str) -> List[Tuple[str, str]]:
+    """
+    Materialize every (path, code) block of the aggregate.
+    Prefer iter_blocks (or file_crawler.iter_code_files) for large repos.
+    """
+    return list(iter_blocks(projectName))
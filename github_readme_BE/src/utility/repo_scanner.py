@@ -0,0 +1,271 @@
+import fnmatch
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+
+from .config import (
+    CODE_EXTS,
+    DEFAULT_EXCLUDE_DIRS,
+    SCANNER_MAX_WORKERS,
+    MAX_BYTES_PER_FILE,
+    BINARY_SNIFF_BYTES,
+    MINIFIED_AVG_LINE_LEN,
+    GENERATED_NAME_PATTERNS,
+    MANIFEST_FILES,
+    ENTRY_POINT_STEMS,
+)
+
+GENERATED_MARKERS = (b"@generated", b"DO NOT EDIT", b"Code generated by", b"autogenerated")
+TEST_DIR_NAMES = {"test", "tests", "__tests__", "spec", "specs", "testing", "example", "examples"}
+TEST_NAME_PATTERNS = ("test_*", "*_test.*", "*_tests.*", "*.test.*", "*.spec.*", "*_spec.*", "conftest.py")
+
+
+@dataclass
+class Candidate:
+    rel_path: str
+    abs_path: Path
+    size: int
+    score: float = 0.0
+
+
+def _pattern_to_regex(pattern: str) -> Tuple[re.Pattern, bool]:
+    """
+    Translate a .gitignore/.gitattributes pattern to a regex matched against a
+    path relative to the directory that holds the rules file.
+    Returns (regex, dir_only).
+    """
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    i, out = 0, []
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = pattern.find("]", i)
+            if j == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                out.append(pattern[i : j + 1].replace("[!", "[^"))
+                i = j + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+    body = "".join(out)
+    prefix = "" if anchored else "(?:.*/)?"
+    # A match on a directory also covers everything below it
+    return re.compile(f"^{prefix}{body}(?:/.*)?$"), dir_only
+
+
+class IgnoreRules:
+    """Accumulated .gitignore rules; later rules (and deeper files) win, `!` re-includes."""
+
+    def __init__(self, rules: Optional[List[Tuple[str, re.Pattern, bool, bool]]] = None):
+        # (base_dir, regex, negated, dir_only)
+        self.rules = rules or []
+
+    def extended(self, base_dir: str, gitignore: Path) -> "IgnoreRules":
+        try:
+            lines = gitignore.read_text(encoding="utf-8", errors="ignore").splitlines()
+        except OSError:
+            return self
+        new_rules = list(self.rules)
+        for line in lines:
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            regex, dir_only = _pattern_to_regex(line)
+            new_rules.append((base_dir, regex, negated, dir_only))
+        return IgnoreRules(new_rules)
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        ignored = False
+        for base_dir, regex, negated, dir_only in self.rules:
+            if base_dir:
+                if not rel_path.startswith(base_dir + "/"):
+                    continue
+                local = rel_path[len(base_dir) + 1 :]
+            else:
+                local = rel_path
+            if dir_only and not is_dir:
+                # Directories are pruned while walking, so a dir-only rule never needs to hit a file
+                continue
+            if regex.match(local):
+                ignored = not negated
+        return ignored
+
+
+def load_linguist_excludes(repo_dir: Path) -> List[re.Pattern]:
+    """Patterns marked linguist-generated or linguist-vendored in the root .gitattributes."""
+    path = repo_dir / ".gitattributes"
+    if not path.exists():
+        return []
+    patterns: List[re.Pattern] = []
+    for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+        parts = line.split()
+        if len(parts) < 2 or parts[0].startswith("#"):
+            continue
+        for attr in parts[1:]:
+            name, _, value = attr.partition("=")
+            if name in ("linguist-generated", "linguist-vendored") and value.lower() not in ("false", "0"):
+                patterns.append(_pattern_to_regex(parts[0])[0])
+                break
+    return patterns
+
+
+def _is_wanted_name(fname: str, include_exts: Set[str]) -> bool:
+    if fname in MANIFEST_FILES:
+        return True
+    if Path(fname).suffix.lower() not in include_exts:
+        return False
+    return not any(fnmatch.fnmatch(fname, pat) for pat in GENERATED_NAME_PATTERNS)
+
+
+def is_test_or_example(rel_path: str) -> bool:
+    """Tests, specs and examples by directory or file name, not by substring (`latest.py` is not a test)."""
+    parts = rel_path.lower().split("/")
+    if any(part in TEST_DIR_NAMES for part in parts[:-1]):
+        return True
+    return any(fnmatch.fnmatch(parts[-1], pat) for pat in TEST_NAME_PATTERNS)
+
+
+def importance(rel_path: str, size: int) -> float:
+    """Heuristic rank: manifests and entry points first, shallow before deep, tests last."""
+    p = Path(rel_path)
+    depth = len(p.parts) - 1
+    score = 0.0
+    if p.name in MANIFEST_FILES:
+        score += 100
+    if p.stem.lower() in ENTRY_POINT_STEMS:
+        score += 50
+    if is_test_or_example(rel_path):
+        score -= 20
+    score -= 5 * depth
+    # Substantial files carry more signal, up to a point
+    score += min(size, 20_000) / 2_000
+    return score
+
+
+def scan_repository(
+    repo_dir: Path,
+    include_exts: Optional[Set[str]] = None,
+    exclude_dirs: Optional[Set[str]] = None,
+    max_bytes_per_file: Optional[int] = MAX_BYTES_PER_FILE,
+) -> List[Candidate]:
+    """
+    Walk the tree (metadata only) honoring .gitignore files at every level,
+    .gitattributes linguist-generated/vendored and the default exclude lists.
+    Returns candidates ordered by descending importance.
+    """
+    include_exts = include_exts or CODE_EXTS
+    exclude_dirs_lower = {d.lower() for d in (exclude_dirs or DEFAULT_EXCLUDE_DIRS)}
+    linguist = load_linguist_excludes(repo_dir)
+
+    candidates: List[Candidate] = []
+    stack: List[Tuple[Path, str, IgnoreRules]] = [(repo_dir, "", IgnoreRules())]
+    while stack:
+        dir_path, rel_dir, rules = stack.pop()
+        gitignore = dir_path / ".gitignore"
+        if gitignore.exists():
+            rules = rules.extended(rel_dir, gitignore)
+        try:
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                if not is_dir and not entry.is_file(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name.lower() in exclude_dirs_lower or rules.is_ignored(rel, True):
+                    continue
+                stack.append((Path(entry.path), rel, rules))
+                continue
+            if not _is_wanted_name(entry.name, include_exts):
+                continue
+            if rules.is_ignored(rel, False) or any(p.match(rel) for p in linguist):
+                continue
+            size = entry.stat().st_size
+            if size == 0 or (max_bytes_per_file is not None and size > max_bytes_per_file):
+                continue
+            candidates.append(Candidate(rel, Path(entry.path), size, importance(rel, size)))
+
+    candidates.sort(key=lambda c: (-c.score, c.rel_path.lower()))
+    return candidates
+
+
+def read_candidate(c: Candidate) -> Optional[str]:
+    """Read a file as text, or None if it looks binary, generated or minified."""
+    try:
+        data = c.abs_path.read_bytes()
+    except OSError:
+        return None
+    head = data[:BINARY_SNIFF_BYTES]
+    if b"\x00" in head:
+        return None
+    if any(marker in head[:1024] for marker in GENERATED_MARKERS):
+        return None
+    text = data.decode("utf-8", errors="ignore")
+    lines = text.count("\n") + 1
+    if len(text) / lines > MINIFIED_AVG_LINE_LEN:
+        return None
+    return text
+
+
+def read_candidates(
+    candidates: Iterable[Candidate],
+    max_workers: int = SCANNER_MAX_WORKERS,
+    limit: Optional[int] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Read candidates on a thread pool and yield (rel_path, content) in the
+    candidates' order, skipping files rejected by read_candidate. Only a
+    bounded window of reads is in flight, so memory stays flat.
+    """
+    window = max(1, max_workers) * 2
+    yielded = 0
+    it = iter(candidates)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        pending = []
+        for c in it:
+            pending.append((c, pool.submit(read_candidate, c)))
+            if len(pending) >= window:
+                break
+        while pending:
+            c, fut = pending.pop(0)
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(read_candidate, nxt)))
+            text = fut.result()
+            if text is None:
+                continue
+            yield c.rel_path, text
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                for _, f in pending:
+                    f.cancel()
+                return
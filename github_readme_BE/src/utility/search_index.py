@@ -0,0 +1,138 @@
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from .config import SEARCH_MAX_RESULTS, SEARCH_SNIPPET_TOKENS, SEARCH_WEIGHTS
+from .path import get_search_index_path
+
+HIGHLIGHT_OPEN = "**"
+HIGHLIGHT_CLOSE = "**"
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Bumped whenever the table layout changes; older index files are rebuilt
+# (projects are re-indexed lazily on their next search)
+SCHEMA_VERSION = 2
+
+
+def to_fts_query(q: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 query: every word is quoted (so operators and
+    punctuation in user input are literal) and the last one is a prefix match,
+    which keeps results useful while the user is still typing.
+    """
+    terms = _TERM_RE.findall(q)
+    if not terms:
+        return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def project_table(project_id: str) -> str:
+    """FTS table of one project; hex keeps any project id a safe identifier."""
+    return "fts_" + project_id.encode("utf-8").hex()
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 inverted index over file name, summary and content, ranked
+    with bm25 (name and summary weighted above content). Each project has its
+    own FTS table, so a search (and its bm25 statistics) only touches that
+    project's files, however large the rest of the corpus grows.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ":memory:"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # v1 kept every project in one table and filtered by project_id after matching
+            self._conn.executescript("DROP TABLE IF EXISTS file_search; DROP TABLE IF EXISTS indexed_projects;")
+        self._conn.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS indexed_projects (project_id TEXT PRIMARY KEY);
+            PRAGMA user_version = {SCHEMA_VERSION};
+            """
+        )
+        self._conn.commit()
+
+    def is_indexed(self, project_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM indexed_projects WHERE project_id=?", (project_id,)).fetchone()
+        return row is not None
+
+    def add_files(self, project_id: str, rows: Iterable[Dict]) -> int:
+        """Index rows with file_id, file_name, file_summary and file_content."""
+        data = [
+            (r["file_id"], r.get("file_name") or "", r.get("file_summary") or "", r.get("file_content") or "")
+            for r in rows
+        ]
+        table = project_table(project_id)
+        with self._lock:
+            self._conn.execute(
+                f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+                    file_id UNINDEXED,
+                    file_name,
+                    file_summary,
+                    file_content,
+                    tokenize = "unicode61 tokenchars '_'"
+                )
+                """
+            )
+            self._conn.executemany(
+                f"INSERT INTO {table} (file_id, file_name, file_summary, file_content) VALUES (?, ?, ?, ?)",
+                data,
+            )
+            self._conn.execute("INSERT OR IGNORE INTO indexed_projects VALUES (?)", (project_id,))
+            self._conn.commit()
+        return len(data)
+
+    def delete_project(self, project_id: str) -> None:
+        """Drop a project's table; its files are indexed again by the next add_files."""
+        with self._lock:
+            self._conn.execute(f"DROP TABLE IF EXISTS {project_table(project_id)}")
+            self._conn.execute("DELETE FROM indexed_projects WHERE project_id=?", (project_id,))
+            self._conn.commit()
+
+    def search(self, project_id: str, q: str, limit: int = 20) -> List[Dict]:
+        """Ranked hits: file_id, file_name, snippet (matches wrapped in **), score (lower is better)."""
+        query = to_fts_query(q)
+        if query is None:
+            return []
+        limit = max(1, min(limit, SEARCH_MAX_RESULTS))
+        if not self.is_indexed(project_id):
+            return []
+        table = project_table(project_id)
+        w_name, w_summary, w_content = SEARCH_WEIGHTS
+        sql = f"""
+            SELECT file_id,
+                   file_name,
+                   snippet({table}, -1, ?, ?, '…', {int(SEARCH_SNIPPET_TOKENS)}) AS snippet,
+                   bm25({table}, 0, {w_name}, {w_summary}, {w_content}) AS score
+            FROM {table}
+            WHERE {table} MATCH ?
+            ORDER BY score
+            LIMIT ?
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, (HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, query, limit)).fetchall()
+        return [
+            {"file_id": file_id, "file_name": name, "snippet": snip, "score": score}
+            for file_id, name, snip, score in rows
+        ]
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Process-wide index stored under output/search/."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(get_search_index_path())
+        return _index
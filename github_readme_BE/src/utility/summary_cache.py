@@ -0,0 +1,111 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from .config import SUMMARY_CACHE_MAX_BYTES
+from .path import get_summary_cache_path
+
+
+def hash_content(content: str) -> str:
+    """sha256 of the file content; the cache key is content-addressed, not path-based."""
+    return hashlib.sha256(content.encode("utf-8", errors="ignore")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent (SQLite) cache of per-file summaries keyed by
+    (sha256 of content, prompt version, model name).
+    Entries are evicted least-recently-used first once the stored summaries
+    exceed `max_bytes`.
+    """
+
+    def __init__(self, db_path: Path, max_bytes: int = SUMMARY_CACHE_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                content_hash   TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model_name     TEXT NOT NULL,
+                summary        TEXT NOT NULL,
+                size_bytes     INTEGER NOT NULL,
+                last_used      REAL NOT NULL,
+                PRIMARY KEY (content_hash, prompt_version, model_name)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries(last_used)")
+        self._conn.commit()
+
+    def get(self, content_hash: str, prompt_version: str, model_name: str) -> Optional[str]:
+        key = (content_hash, prompt_version, model_name)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM summaries WHERE content_hash=? AND prompt_version=? AND model_name=?",
+                key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE summaries SET last_used=? WHERE content_hash=? AND prompt_version=? AND model_name=?",
+                (time.time(), *key),
+            )
+            self._conn.commit()
+            return row[0]
+
+    def put(self, content_hash: str, prompt_version: str, model_name: str, summary: str) -> None:
+        size = len(summary.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, prompt_version, model_name, summary, size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least-recently-used rows until the total size fits `max_bytes`."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM summaries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT rowid, size_bytes FROM summaries ORDER BY last_used ASC"
+        ).fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((rowid,))
+            total -= size
+        self._conn.executemany("DELETE FROM summaries WHERE rowid=?", doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM summaries"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+_cache: Optional[SummaryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """Process-wide cache instance stored under output/cache/."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SummaryCache(get_summary_cache_path())
+        return _cache
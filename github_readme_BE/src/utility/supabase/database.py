@@ -1,15 +1,41 @@
 import os
+import threading
+import uuid
 from dotenv import load_dotenv
-from supabase import create_client, Client
-from ..config import PROJECT_TABLE, PROJECT_FILES_TABLE
+from typing import List, Optional, Tuple
+
+from ..config import FILES_PAGE_SIZE, FILE_COLUMNS, FILE_SUMMARY_COLUMNS, SUMMARY_PREVIEW_CHARS
+from ..path import get_local_db_path
+from ..summary_cache import hash_content
+from ..search_index import get_search_index
 from .models import Project, ProjectFile
-from typing import List
-import uuid
+from .store import ProjectStore, SupabaseStore
+from .local_store import SQLiteStore
 load_dotenv()
 
-url: str = os.getenv("SUPABASE_URL")
-key: str = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(url, key)
+_store: Optional[ProjectStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> ProjectStore:
+    """
+    Process-wide store, created on first use.
+    STORAGE_BACKEND=supabase (default) or sqlite (local file, see SQLITE_DB_PATH).
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = os.getenv("STORAGE_BACKEND", "supabase").lower()
+            if backend == "sqlite":
+                _store = SQLiteStore(os.getenv("SQLITE_DB_PATH") or get_local_db_path())
+            else:
+                _store = SupabaseStore()
+        return _store
+
+def set_store(store: ProjectStore) -> None:
+    """Swap the backing store (e.g. SQLiteStore(":memory:") for tests and benchmarks)."""
+    global _store
+    with _store_lock:
+        _store = store
 
 def save_projects(requestJson: Project):
     data = {
@@ -17,63 +43,127 @@ def save_projects(requestJson: Project):
         "git_url": str(requestJson.git_url),
         "readme_doc": ""
     }
+    store = get_store()
+    if store.get_project_id(requestJson.project_name) is not None:
+        # Regenerating: keep the row (and its project_id); save_files_data replaces the files
+        print("Reusing project: ", requestJson.project_name)
+        return
     print("Saving project data: ", data)
-    supabase.table(PROJECT_TABLE).insert(data).execute()
+    store.insert_project(data)
 
 def save_readme(requestJson: Project):
-    data = {
-        "readme_doc": requestJson.readme_doc
-    }
-    supabase.table(PROJECT_TABLE).update(data).eq("project_name", requestJson.project_name).execute()
-    
+    get_store().update_readme(requestJson.project_name, requestJson.readme_doc)
 
 def save_files_data(projectName: str, requestJson: List[ProjectFile]):
+    """Replace the project's files (and their search index) with `requestJson`."""
+    store = get_store()
     # Get the project ID based on project name
-    response = supabase.table(PROJECT_TABLE).select("project_id").eq("project_name", projectName).execute()
-    project_data = response.data
-    print("Project data fetched for file saving: ", project_data)
-    # collect records and insert them into the PROJECT_FILES_TABLE
-    records = []
-    for pf in requestJson:
-        records.append({
-            "project_id": project_data[0]["project_id"],
+    project_id = store.get_project_id(projectName)
+    if project_id is None:
+        raise ValueError(f"Project not found: {projectName}")
+    store.delete_files(project_id)
+    get_search_index().delete_project(project_id)
+    records = [
+        {
+            # ids are assigned here so the search index can point at rows without a read-back
+            "file_id": str(uuid.uuid4()),
+            "project_id": project_id,
             "file_name": pf.file_name,
             "file_content": pf.file_content,
-            "file_summary": pf.file_summary
-        })
-    print("Saving file data: ", records)
+            "file_summary": pf.file_summary,
+            "file_size": len((pf.file_content or "").encode("utf-8")),
+            "content_sha256": pf.content_sha256 or hash_content(pf.file_content or ""),
+        }
+        for pf in requestJson
+    ]
     if records:
-        supabase.table(PROJECT_FILES_TABLE).insert(records).execute()
-        
+        batches = store.insert_files(records)
+        print(f"Saved {len(records)} files for {projectName} in {batches} batches")
+        get_search_index().add_files(project_id, records)
+
 def get_projects_list():
-    response = supabase.table(PROJECT_TABLE).select("project_id, project_name").execute()
-    project_data = response.data
-    returnLst = []
-    for pd in project_data:
-        returnLst.append({
-            "project_id": pd["project_id"],
-            "project_name": pd["project_name"]
+    return [
+        {"project_id": pd["project_id"], "project_name": pd["project_name"]}
+        for pd in get_store().list_projects()
+    ]
+
+def get_project_files_page(
+    project_id: str,
+    after: Optional[str] = None,
+    limit: int = FILES_PAGE_SIZE,
+    include_content: bool = True,
+) -> Tuple[List[ProjectFile], Optional[str]]:
+    """One keyset page of files plus the cursor for the next page (None when done)."""
+    columns = FILE_COLUMNS if include_content else FILE_SUMMARY_COLUMNS
+    rows = get_store().list_files(project_id, columns=columns, after=after, limit=limit)
+    files = [ProjectFile(**fd) for fd in rows]
+    next_cursor = rows[-1]["file_id"] if len(rows) == limit else None
+    return files, next_cursor
+
+def get_project_files(project_id: str, include_content: bool = True) -> List[ProjectFile]:
+    project_files: List[ProjectFile] = []
+    cursor = None
+    while True:
+        page, cursor = get_project_files_page(project_id, after=cursor, include_content=include_content)
+        project_files.extend(page)
+        if cursor is None:
+            return project_files
+
+def list_file_summaries(
+    project_id: str,
+    after: Optional[str] = None,
+    limit: int = FILES_PAGE_SIZE,
+) -> dict:
+    """Lightweight listing page: id, name, size and a summary preview; no file contents."""
+    files, next_cursor = get_project_files_page(project_id, after=after, limit=limit, include_content=False)
+    items = []
+    for f in files:
+        summary = f.file_summary or ""
+        preview = summary[:SUMMARY_PREVIEW_CHARS] + ("…" if len(summary) > SUMMARY_PREVIEW_CHARS else "")
+        items.append({
+            "file_id": f.file_id,
+            "file_name": f.file_name,
+            "file_size": f.file_size,
+            "summary_preview": preview,
         })
-    return returnLst
-
-def get_project_files(project_id: str) -> List[ProjectFile]:
-    response = supabase.table(PROJECT_FILES_TABLE).select("*").eq("project_id", project_id).execute()
-    file_data = response.data
-    project_files = []
-    for fd in file_data:
-        project_file = ProjectFile(
-            file_id=fd["file_id"],
-            project_id=fd["project_id"],
-            file_name=fd["file_name"],
-            file_content=fd["file_content"],
-            file_summary=fd["file_summary"]
-        )
-        project_files.append(project_file)
-    return project_files
+    return {"files": items, "next_cursor": next_cursor}
+
+def file_etag(pf: ProjectFile) -> Optional[str]:
+    """
+    ETag of the content endpoint: covers every field in its body (name, summary,
+    content via its hash), so a regenerated summary changes it too.
+    None without a content hash.
+    """
+    if not pf.content_sha256:
+        return None
+    return hash_content("\0".join((pf.content_sha256, pf.file_name or "", pf.file_summary or "")))
+
+def get_file_etag(project_id: str, file_id: str) -> Optional[str]:
+    """ETag of a file without transferring its content (None if unknown/missing)."""
+    row = get_store().get_file(project_id, file_id, columns=("file_name", "file_summary", "content_sha256"))
+    return file_etag(ProjectFile(**row)) if row else None
+
+def get_file(project_id: str, file_id: str) -> Optional[ProjectFile]:
+    row = get_store().get_file(project_id, file_id)
+    if row is None:
+        return None
+    pf = ProjectFile(**row)
+    if not pf.content_sha256:
+        # Rows saved before content hashes were stored
+        pf.content_sha256 = hash_content(pf.file_content or "")
+    return pf
+
+def search_project_files(project_id: str, q: str, limit: int = 20) -> List[dict]:
+    """Ranked full-text hits; projects stored before the index existed are indexed on first search."""
+    index = get_search_index()
+    if not index.is_indexed(project_id):
+        cursor = None
+        while True:
+            page, cursor = get_project_files_page(project_id, after=cursor)
+            index.add_files(project_id, [pf.model_dump() for pf in page])
+            if cursor is None:
+                break
+    return index.search(project_id, q, limit=limit)
 
 def get_readme(project_id: str) -> str:
-    response = supabase.table(PROJECT_TABLE).select("readme_doc").eq("project_id", project_id).execute()
-    project_data = response.data
-    if project_data and "readme_doc" in project_data[0]:
-        return project_data[0]["readme_doc"]
-    return ""
\ No newline at end of file
+    return get_store().get_readme(project_id)
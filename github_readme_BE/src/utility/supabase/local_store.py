@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from ..config import FILES_PAGE_SIZE, FILE_COLUMNS
+from .store import ProjectStore, check_columns
+
+
+class SQLiteStore(ProjectStore):
+    """
+    In-process stand-in for Supabase with the same tables and the same
+    ProjectStore interface. Use ":memory:" for throwaway runs.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ":memory:"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS projects (
+                project_id   TEXT PRIMARY KEY,
+                project_name TEXT NOT NULL,
+                git_url      TEXT,
+                readme_doc   TEXT,
+                created_at   TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS project_files (
+                file_id      TEXT PRIMARY KEY,
+                project_id   TEXT NOT NULL REFERENCES projects(project_id) ON DELETE CASCADE,
+                file_name    TEXT NOT NULL,
+                file_content TEXT,
+                file_summary TEXT,
+                file_size    INTEGER,
+                content_sha256 TEXT,
+                created_at   TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX IF NOT EXISTS project_files_project_id_idx ON project_files(project_id, file_id);
+            """
+        )
+        self._conn.commit()
+
+    def _query(self, sql: str, params: Sequence = ()) -> List[Dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def _write(self, sql: str, params: Sequence = ()) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def insert_project(self, data: Dict) -> None:
+        self._write(
+            "INSERT INTO projects (project_id, project_name, git_url, readme_doc) VALUES (?, ?, ?, ?)",
+            (uuid.uuid4().hex, data["project_name"], data.get("git_url"), data.get("readme_doc", "")),
+        )
+
+    def update_readme(self, project_name: str, readme_doc: str) -> None:
+        self._write("UPDATE projects SET readme_doc=? WHERE project_name=?", (readme_doc, project_name))
+
+    def get_project_id(self, project_name: str) -> Optional[str]:
+        rows = self._query("SELECT project_id FROM projects WHERE project_name=? ORDER BY created_at", (project_name,))
+        return rows[0]["project_id"] if rows else None
+
+    def list_projects(self) -> List[Dict]:
+        return self._query("SELECT project_id, project_name FROM projects ORDER BY created_at")
+
+    def get_readme(self, project_id: str) -> str:
+        rows = self._query("SELECT readme_doc FROM projects WHERE project_id=?", (project_id,))
+        return (rows[0]["readme_doc"] or "") if rows else ""
+
+    def insert_file_batch(self, records: List[Dict]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO project_files "
+                "(file_id, project_id, file_name, file_content, file_summary, file_size, content_sha256) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (r.get("file_id") or uuid.uuid4().hex, r["project_id"], r["file_name"],
+                     r.get("file_content"), r.get("file_summary"), r.get("file_size"), r.get("content_sha256"))
+                    for r in records
+                ],
+            )
+            self._conn.commit()
+
+    def delete_files(self, project_id: str) -> None:
+        self._write("DELETE FROM project_files WHERE project_id=?", (project_id,))
+
+    def list_files(
+        self,
+        project_id: str,
+        columns: Sequence[str] = FILE_COLUMNS,
+        after: Optional[str] = None,
+        limit: int = FILES_PAGE_SIZE,
+    ) -> List[Dict]:
+        cols = ", ".join(check_columns(columns))
+        if after is None:
+            sql, params = f"SELECT {cols} FROM project_files WHERE project_id=? ORDER BY file_id LIMIT ?", (project_id, limit)
+        else:
+            sql = f"SELECT {cols} FROM project_files WHERE project_id=? AND file_id>? ORDER BY file_id LIMIT ?"
+            params = (project_id, after, limit)
+        return self._query(sql, params)
+
+    def get_file(self, project_id: str, file_id: str, columns: Sequence[str] = FILE_COLUMNS) -> Optional[Dict]:
+        cols = ", ".join(check_columns(columns))
+        rows = self._query(f"SELECT {cols} FROM project_files WHERE project_id=? AND file_id=?", (project_id, file_id))
+        return rows[0] if rows else None
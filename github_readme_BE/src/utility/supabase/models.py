@@ -11,5 +11,7 @@ class ProjectFile(BaseModel):
     file_id: Optional[str] = None
     project_id: Optional[str] = None
     file_name: str
-    file_content: str
-    file_summary: str
+    file_content: Optional[str] = None   # omitted by summary-only listings
+    file_summary: Optional[str] = None
+    file_size: Optional[int] = None      # bytes of file_content (UTF-8)
+    content_sha256: Optional[str] = None # part of the content endpoint's ETag (see database.file_etag)
@@ -0,0 +1,158 @@
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from ..config import (
+    PROJECT_TABLE,
+    PROJECT_FILES_TABLE,
+    FILE_INSERT_BATCH_ROWS,
+    FILE_INSERT_BATCH_BYTES,
+    FILES_PAGE_SIZE,
+    FILE_COLUMNS,
+)
+
+
+def iter_batches(
+    records: List[Dict],
+    max_rows: int = FILE_INSERT_BATCH_ROWS,
+    max_bytes: int = FILE_INSERT_BATCH_BYTES,
+) -> Iterator[List[Dict]]:
+    """Split records into insert batches bounded by row count and approximate JSON size."""
+    batch: List[Dict] = []
+    size = 0
+    for rec in records:
+        rec_size = len(json.dumps(rec, default=str))
+        if batch and (len(batch) >= max_rows or size + rec_size > max_bytes):
+            yield batch
+            batch, size = [], 0
+        batch.append(rec)
+        size += rec_size
+    if batch:
+        yield batch
+
+
+def check_columns(columns: Sequence[str]) -> List[str]:
+    unknown = set(columns) - set(FILE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown project_files columns: {sorted(unknown)}")
+    # file_id is the pagination key, always return it
+    return list(dict.fromkeys(["file_id", *columns]))
+
+
+class ProjectStore(ABC):
+    """
+    Persistence interface shared by the Supabase store and the local SQLite
+    stand-in (see local_store.SQLiteStore). Rows are plain dicts.
+    """
+
+    @abstractmethod
+    def insert_project(self, data: Dict) -> None:
+        ...
+
+    @abstractmethod
+    def update_readme(self, project_name: str, readme_doc: str) -> None:
+        ...
+
+    @abstractmethod
+    def get_project_id(self, project_name: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def list_projects(self) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def get_readme(self, project_id: str) -> str:
+        ...
+
+    @abstractmethod
+    def insert_file_batch(self, records: List[Dict]) -> None:
+        ...
+
+    @abstractmethod
+    def delete_files(self, project_id: str) -> None:
+        """Remove every file row of a project (before its files are saved again)."""
+        ...
+
+    @abstractmethod
+    def list_files(
+        self,
+        project_id: str,
+        columns: Sequence[str] = FILE_COLUMNS,
+        after: Optional[str] = None,
+        limit: int = FILES_PAGE_SIZE,
+    ) -> List[Dict]:
+        """One keyset page ordered by file_id, starting after the `after` file_id."""
+        ...
+
+    @abstractmethod
+    def get_file(self, project_id: str, file_id: str, columns: Sequence[str] = FILE_COLUMNS) -> Optional[Dict]:
+        ...
+
+    def insert_files(self, records: List[Dict]) -> int:
+        """Insert in bounded batches; returns the number of batches sent."""
+        sent = 0
+        for batch in iter_batches(records):
+            self.insert_file_batch(batch)
+            sent += 1
+        return sent
+
+
+class SupabaseStore(ProjectStore):
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None):
+        from supabase import create_client
+
+        self.client = create_client(url or os.getenv("SUPABASE_URL"), key or os.getenv("SUPABASE_KEY"))
+
+    def insert_project(self, data: Dict) -> None:
+        self.client.table(PROJECT_TABLE).insert(data).execute()
+
+    def update_readme(self, project_name: str, readme_doc: str) -> None:
+        self.client.table(PROJECT_TABLE).update({"readme_doc": readme_doc}).eq("project_name", project_name).execute()
+
+    def get_project_id(self, project_name: str) -> Optional[str]:
+        response = self.client.table(PROJECT_TABLE).select("project_id").eq("project_name", project_name).execute()
+        return response.data[0]["project_id"] if response.data else None
+
+    def list_projects(self) -> List[Dict]:
+        return self.client.table(PROJECT_TABLE).select("project_id, project_name").execute().data
+
+    def get_readme(self, project_id: str) -> str:
+        response = self.client.table(PROJECT_TABLE).select("readme_doc").eq("project_id", project_id).execute()
+        if response.data and "readme_doc" in response.data[0]:
+            return response.data[0]["readme_doc"] or ""
+        return ""
+
+    def insert_file_batch(self, records: List[Dict]) -> None:
+        self.client.table(PROJECT_FILES_TABLE).insert(records).execute()
+
+    def delete_files(self, project_id: str) -> None:
+        self.client.table(PROJECT_FILES_TABLE).delete().eq("project_id", project_id).execute()
+
+    def list_files(
+        self,
+        project_id: str,
+        columns: Sequence[str] = FILE_COLUMNS,
+        after: Optional[str] = None,
+        limit: int = FILES_PAGE_SIZE,
+    ) -> List[Dict]:
+        query = (
+            self.client.table(PROJECT_FILES_TABLE)
+            .select(", ".join(check_columns(columns)))
+            .eq("project_id", project_id)
+        )
+        if after is not None:
+            query = query.gt("file_id", after)
+        return query.order("file_id").limit(limit).execute().data
+
+    def get_file(self, project_id: str, file_id: str, columns: Sequence[str] = FILE_COLUMNS) -> Optional[Dict]:
+        response = (
+            self.client.table(PROJECT_FILES_TABLE)
+            .select(", ".join(check_columns(columns)))
+            .eq("project_id", project_id)
+            .eq("file_id", file_id)
+            .limit(1)
+            .execute()
+        )
+        return response.data[0] if response.data else None
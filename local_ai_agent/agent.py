@@ -0,0 +1,217 @@
+"""
+Runtime behind the interactive loop in main.py.
+
+Per question, a repeated question (same text after normalisation) is
+answered from the cache; otherwise the query is embedded once for the
+vector search. The retrieved reviews are packed into a token budget, and
+the answer is streamed as it is generated. The cache is emptied whenever
+ingest.py syncs the store. The model
+is warmed up in the background while the store is opened, so the first
+question doesn't also pay for loading llama3.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_ollama.llms import OllamaLLM
+
+from vector import DB_LOCATION, get_retriever, store_version
+
+MODEL = "llama3"
+# Reviews retrieved per question, before the token budget is applied
+RETRIEVE_K = 5
+CONTEXT_TOKEN_BUDGET = 600
+# Reusing answers of merely similar questions is opt-in (AnswerCache(threshold=...)):
+# opposite questions ("is the crust good?" / "bad?") embed at 0.95+ with mxbai-embed-large
+STRICT_CACHE_SIMILARITY = 0.995
+CACHE_SIZE = 128
+
+TEMPLATE = """
+You are an exeprt in answering questions about a pizza restaurant
+
+Here are some relevant reviews (rating/5, date):
+{reviews}
+
+Here is the question to answer: {question}
+"""
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_tokens(text: str) -> int:
+    """Words + punctuation; close enough to llama3's count for budgeting."""
+    return len(_TOKEN_RE.findall(text))
+
+
+def format_reviews(docs: List[Document], budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """One line per review, best match first, cut off at `budget` tokens."""
+    lines, used = [], 0
+    for doc in docs:
+        meta = doc.metadata
+        line = f"- ({meta.get('rating', '?')}/5, {meta.get('date', '?')}) {' '.join(doc.page_content.split())}"
+        size = approx_tokens(line)
+        left = budget - used
+        if size > left:
+            # Trim the review that doesn't fit, unless too little room is left to be useful
+            if lines and left < 32:
+                break
+            words = line.split()
+            line = " ".join(words[:max(1, len(words) * left // size)]) + " ..."
+            size = left
+        lines.append(line)
+        used += size
+        if used >= budget:
+            break
+    return "\n".join(lines)
+
+
+def _normalize(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+class AnswerCache:
+    """
+    LRU of answered questions. A question hits when it matches an earlier one
+    after normalisation. With a `threshold` (STRICT_CACHE_SIMILARITY or
+    higher advised), `similar` also reuses the answer of an earlier question
+    whose embedding has at least that cosine similarity.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, size: int = CACHE_SIZE):
+        self.threshold = threshold
+        self.size = size
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, str]]" = OrderedDict()
+
+    def get(self, question: str) -> Optional[Tuple[str, float]]:
+        """(answer, 1.0) if the same question was answered before."""
+        key = _normalize(question)
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][1], 1.0
+
+    def similar(self, vector: np.ndarray) -> Optional[Tuple[str, float]]:
+        """(answer, similarity) for the closest earlier question; None unless a threshold is set and met."""
+        if self.threshold is None:
+            return None
+        best, best_sim = None, self.threshold
+        for k, (vec, _) in self._entries.items():
+            sim = float(vec @ vector)
+            if sim >= best_sim:
+                best, best_sim = k, sim
+        if best is None:
+            return None
+        self._entries.move_to_end(best)
+        return self._entries[best][1], best_sim
+
+    def put(self, question: str, vector: np.ndarray, answer: str) -> None:
+        self._entries[_normalize(question)] = (vector, answer)
+        self._entries.move_to_end(_normalize(question))
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@dataclass
+class TurnTimings:
+    retrieve_s: float = 0.0
+    first_token_s: Optional[float] = None
+    total_s: float = 0.0
+    cached: bool = False
+
+    def __str__(self) -> str:
+        if self.cached:
+            return f"cached answer, {self.total_s * 1000:.0f} ms"
+        first = f"{self.first_token_s * 1000:.0f} ms" if self.first_token_s is not None else "-"
+        return f"retrieve {self.retrieve_s * 1000:.0f} ms | first token {first} | total {self.total_s:.2f} s"
+
+
+class ReviewAgent:
+    def __init__(self, chain, vector_store, k: int = RETRIEVE_K, budget: int = CONTEXT_TOKEN_BUDGET,
+                 cache: Optional[AnswerCache] = None, db_location: Optional[str] = None):
+        self.chain = chain
+        self.vector_store = vector_store
+        self.k = k
+        self.budget = budget
+        self.cache = cache if cache is not None else AnswerCache()
+        # Answers are only valid for the reviews they were generated from
+        self.db_location = db_location
+        self._store_version = store_version(db_location) if db_location else None
+        self.last_timings = TurnTimings()
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.vector_store.embeddings.embed_query(question), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def ask(self, question: str) -> Iterator[str]:
+        """Answer text as it is generated; timings end up in `last_timings`."""
+        started = time.perf_counter()
+        timings = TurnTimings()
+        self.last_timings = timings
+
+        if self.db_location:
+            version = store_version(self.db_location)
+            if version != self._store_version:
+                self.cache.clear()
+                self._store_version = version
+
+        hit = self.cache.get(question)
+        vector = None
+        if hit is None:
+            vector = self._embed(question)
+            hit = self.cache.similar(vector)
+        if hit is not None:
+            timings.cached = True
+            timings.total_s = time.perf_counter() - started
+            yield hit[0]
+            return
+
+        docs = self.vector_store.similarity_search_by_vector(vector.tolist(), k=self.k)
+        reviews = format_reviews(docs, self.budget)
+        timings.retrieve_s = time.perf_counter() - started
+
+        parts = []
+        for piece in self.chain.stream({"reviews": reviews, "question": question}):
+            if timings.first_token_s is None:
+                timings.first_token_s = time.perf_counter() - started
+            parts.append(piece)
+            yield piece
+        timings.total_s = time.perf_counter() - started
+        self.cache.put(question, vector, "".join(parts))
+
+
+def warm_up(model: OllamaLLM) -> None:
+    """Have Ollama load the model now rather than on the first question."""
+    try:
+        model.invoke(" ", options={"num_predict": 1})
+    except Exception as e:
+        print(f"(model warm-up failed: {e})")
+
+
+def load_agent(model_name: str = MODEL, cache_similarity: Optional[float] = None) -> ReviewAgent:
+    """
+    Open the review store while the model loads in the background.
+    `cache_similarity` opts into reusing answers of near-identical questions
+    (see STRICT_CACHE_SIMILARITY); by default only repeated questions hit.
+    """
+    model = OllamaLLM(model=model_name)
+    threading.Thread(target=warm_up, args=(model,), daemon=True).start()
+
+    vector_store = get_retriever().vectorstore
+    embeddings = vector_store.embeddings
+    # Load the embedding model too; bypass the cache so Ollama actually gets a request
+    try:
+        getattr(embeddings, "underlying", embeddings).embed_query("warm up")
+    except Exception as e:
+        print(f"(embedding warm-up failed: {e})")
+
+    chain = ChatPromptTemplate.from_template(TEMPLATE) | model
+    return ReviewAgent(chain, vector_store, cache=AnswerCache(threshold=cache_similarity), db_location=DB_LOCATION)
@@ -0,0 +1,220 @@
+"""
+Sync the review CSV into the agent's Chroma store.
+
+    python ingest.py
+    python ingest.py --csv reviews.csv --key ReviewId --chunk-rows 50000 --batch-size 256
+    python ingest.py --rebuild
+
+Each row gets a stable id from its key columns (Title + Date by default, or
+a real id column via --key) and a hash of its contents. A manifest next to
+the DB remembers the hash stored for every id, so a run only embeds rows
+that are new or changed and deletes rows that left the CSV. The same dump
+can be re-synced daily without rebuilding the store.
+
+The CSV is read in chunks (pyarrow's streaming reader when installed, pandas
+otherwise), so files larger than memory are fine. Ids, hashes and documents
+are built with column operations rather than per-row Python.
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from langchain_chroma import Chroma
+
+from vector import CSV_PATH, DB_LOCATION, MANIFEST_NAME, get_vector_store
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # optional: pandas' chunked reader is used instead
+    pa = None
+
+TEXT_COLUMNS = ["Title", "Review"]
+METADATA_COLUMNS = ["Rating", "Date"]
+# Columns identifying a review across dumps; edits to the other columns are updates
+KEY_COLUMNS = ["Title", "Date"]
+# Rows held in memory at once
+CSV_CHUNK_ROWS = 20_000
+# Rows embedded and written per Chroma call
+EMBED_BATCH_SIZE = 256
+
+
+@dataclass
+class IngestStats:
+    rows: int
+    inserted: int
+    updated: int
+    deleted: int
+    seconds: float
+
+    @property
+    def unchanged(self) -> int:
+        return self.rows - self.inserted - self.updated
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def iter_frames(csv_path: str, columns: Sequence[str], chunk_rows: int = CSV_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    The given CSV columns, in the given order, as string DataFrames of about
+    chunk_rows rows. Content hashes depend on column order, so both readers
+    must agree on it (pandas' usecols keeps the file's order).
+    """
+    columns = list(columns)
+    if pa is None:
+        for df in pd.read_csv(csv_path, usecols=columns, dtype=str, keep_default_na=False, chunksize=chunk_rows):
+            yield df[columns]
+        return
+    reader = pa_csv.open_csv(
+        csv_path,
+        # ~1 KB per row is a generous estimate for reviews; blocks are sized in bytes
+        read_options=pa_csv.ReadOptions(block_size=max(1 << 20, chunk_rows * 1024)),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            column_types={c: pa.string() for c in columns},
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas().fillna("")[columns]
+
+
+def _hex_hashes(df: pd.DataFrame) -> pd.Series:
+    return pd.util.hash_pandas_object(df, index=False).map("{:016x}".format)
+
+
+def row_keys(df: pd.DataFrame, key_columns: Sequence[str], seen: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """
+    (ids, content hashes) for a chunk. Rows repeating an earlier key (in this
+    chunk or in `seen`) get a "-n" suffix so every row keeps its own id.
+    """
+    keys = _hex_hashes(df[list(key_columns)])
+    hashes = _hex_hashes(df).tolist()
+    ids = keys.tolist()
+    # Plain dict lookups; Series.isin against a large `seen` is far slower
+    repeated = [pos for pos, (key, dup) in enumerate(zip(ids, keys.duplicated().tolist())) if dup or key in seen]
+    if repeated:
+        taken = set(ids)
+        next_n: Dict[str, int] = {}
+        for pos in repeated:
+            key = ids[pos]
+            n = next_n.get(key, 1)
+            while f"{key}-{n}" in seen or f"{key}-{n}" in taken:
+                n += 1
+            ids[pos] = f"{key}-{n}"
+            taken.add(ids[pos])
+            next_n[key] = n + 1
+    return ids, hashes
+
+
+def build_documents(df: pd.DataFrame) -> Tuple[List[str], List[dict]]:
+    """(texts, metadatas) for the rows of `df`."""
+    texts = df["Title"].str.cat(df["Review"], sep=" ").tolist()
+    ratings = pd.to_numeric(df["Rating"], errors="coerce").fillna(0).astype("int64").tolist()
+    metadatas = [{"rating": r, "date": d} for r, d in zip(ratings, df["Date"].tolist())]
+    return texts, metadatas
+
+
+def load_manifest(db_location: str = DB_LOCATION) -> Optional[dict]:
+    """{"key_columns": [...], "rows": {id: content hash}} from the last sync, if any."""
+    path = os.path.join(db_location, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(db_location: str, manifest: dict) -> None:
+    os.makedirs(db_location, exist_ok=True)
+    tmp = os.path.join(db_location, MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(db_location, MANIFEST_NAME))
+
+
+def ingest_csv(
+    csv_path: str = CSV_PATH,
+    vector_store: Optional[Chroma] = None,
+    db_location: str = DB_LOCATION,
+    key_columns: Sequence[str] = KEY_COLUMNS,
+    chunk_rows: int = CSV_CHUNK_ROWS,
+    batch_size: int = EMBED_BATCH_SIZE,
+    rebuild: bool = False,
+) -> IngestStats:
+    """
+    Bring the store in line with the CSV: upsert new and changed rows, delete
+    removed ones. The manifest is written last, so an interrupted sync is
+    simply redone by the next run.
+    """
+    vector_store = vector_store or get_vector_store(db_location)
+    manifest = None if rebuild else load_manifest(db_location)
+    if manifest and manifest.get("key_columns") == list(key_columns):
+        previous: Dict[str, Optional[str]] = manifest["rows"]
+    else:
+        # No usable manifest (first sync, new key, or --rebuild): every row is
+        # (re)written and any id already in the store that isn't in the CSV goes
+        previous = dict.fromkeys(vector_store.get(include=[])["ids"])
+
+    started = time.perf_counter()
+    current: Dict[str, str] = {}
+    rows = inserted = updated = 0
+    columns = list(dict.fromkeys(TEXT_COLUMNS + METADATA_COLUMNS + list(key_columns)))
+    for df in iter_frames(csv_path, columns, chunk_rows):
+        ids, hashes = row_keys(df, key_columns, current)
+        current.update(zip(ids, hashes))
+        old = [previous.get(i, "") for i in ids]
+        changed = [h != o for h, o in zip(hashes, old)]
+        inserted += sum(1 for c, o in zip(changed, old) if c and o == "")
+        updated += sum(1 for c, o in zip(changed, old) if c and o != "")
+
+        todo = df[changed]
+        todo_ids = [i for i, c in zip(ids, changed) if c]
+        texts, metadatas = build_documents(todo)
+        for i in range(0, len(todo_ids), batch_size):
+            vector_store.add_texts(
+                texts[i:i + batch_size], metadatas=metadatas[i:i + batch_size], ids=todo_ids[i:i + batch_size]
+            )
+        rows += len(ids)
+        elapsed = time.perf_counter() - started
+        print(f"  {rows} rows checked, {inserted + updated} written, {rows / elapsed:.0f} rows/s")
+
+    removed = [i for i in previous if i not in current]
+    for i in range(0, len(removed), batch_size):
+        vector_store.delete(ids=removed[i:i + batch_size])
+    _save_manifest(db_location, {"csv": os.path.basename(csv_path), "key_columns": list(key_columns), "rows": current})
+
+    stats = IngestStats(rows, inserted, updated, len(removed), time.perf_counter() - started)
+    print(
+        f"Synced {stats.rows} rows from {csv_path} in {stats.seconds:.1f}s ({stats.rows_per_s:.0f} rows/s): "
+        f"{stats.inserted} inserted, {stats.updated} updated, {stats.deleted} deleted, {stats.unchanged} unchanged"
+    )
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sync the review CSV into the Chroma store.")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--db", default=DB_LOCATION)
+    parser.add_argument("--key", default=",".join(KEY_COLUMNS), help="comma-separated columns identifying a review")
+    parser.add_argument("--chunk-rows", type=int, default=CSV_CHUNK_ROWS)
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE)
+    parser.add_argument("--rebuild", action="store_true", help="ignore the manifest and rewrite every row")
+    args = parser.parse_args(argv)
+    ingest_csv(
+        args.csv,
+        get_vector_store(args.db),
+        db_location=args.db,
+        key_columns=args.key.split(","),
+        chunk_rows=args.chunk_rows,
+        batch_size=args.batch_size,
+        rebuild=args.rebuild,
+    )
+
+
+if __name__ == "__main__":
+    main()
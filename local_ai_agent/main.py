@@ -1,18 +1,6 @@
-from langchain_ollama.llms import OllamaLLM
-from langchain_core.prompts import ChatPromptTemplate
-from vector import retriever
+from agent import load_agent
 
-model = OllamaLLM(model="llama3")
-
-template = """
-You are an exeprt in answering questions about a pizza restaurant
-
-Here are some relevant reviews: {reviews}
-
-Here is the question to answer: {question}
-"""
-prompt = ChatPromptTemplate.from_template(template)
-chain = prompt | model
+agent = load_agent()
 
 while True:
     print("\n\n-------------------------------")
@@ -20,7 +8,10 @@ while True:
     print("\n\n")
     if question == "q":
         break
-    
-    reviews = retriever.invoke(question)
-    result = chain.invoke({"reviews": [], "question": question})
-    print(result)
\ No newline at end of file
+    if not question.strip():
+        continue
+
+    # Tokens are printed as they arrive
+    for piece in agent.ask(question):
+        print(piece, end="", flush=True)
+    print(f"\n\n[{agent.last_timings}]")
@@ -1,62 +1,61 @@
+"""
+Chroma store of restaurant reviews used by main.py.
+
+Importing this module is cheap: `vector_store` and `retriever` are created on
+first access. The CSV is only read when the collection is still empty; after
+the CSV changes, run `python ingest.py` to sync just the changed rows.
+"""
+import os
+from functools import lru_cache
+from typing import Optional
+
 from langchain_ollama import OllamaEmbeddings
 from langchain_chroma import Chroma
-from langchain_core.documents import Document
-import os
-import pandas as pd
-
-df = pd.read_csv("realistic_restaurant_reviews.csv")
-embeddings = OllamaEmbeddings(model="mxbai-embed-large")
-
-db_location = "./chroma_langchain_db"
-# Here we check if the database already exists
-# If it does not exist, we will add documents to it
-add_documents = not os.path.exists(db_location)
-
-# Here we create the database if it does not exist
-if add_documents:
-    documents = []
-    ids = []
-    
-    # Iterate through the DataFrame and create Document objects
-    # Each document will contain the title and review text, along with metadata
-    for i, row in df.iterrows():
-        # Create a Document object for each review
-        # The page_content will be a combination of the title and review text
-        # Metadata is for storing additional information like rating and date
-        # The id is set to the index of the row
-        document = Document(   
-            page_content=row["Title"] + " " + row["Review"],
-            metadata={
-                "rating": row["Rating"],
-                "date": row["Date"],
-            },
-            id=str(i)
-        )
-        # Append the document and its id to the lists
-        ids.append(str(i))
-        documents.append(document)
-
-# Create a Chroma vector store to store the documents
-# The collection name is set to "restaurant_reviews"
-# The persist_directory is where the database will be stored
-# The embedding_function is set to the Ollama embeddings model
-vector_store = Chroma(
-    collection_name="restaurant_reviews",
-    persist_directory=db_location,
-    embedding_function=embeddings,
-)
-
-# If the database does not exist, we add the documents to the vector store
-# The ids are used to uniquely identify each document in the vector store
-if add_documents:
-    vector_store.add_documents(documents, ids=ids)
-
-
-print("Vector store created and documents added successfully.")
-
-# Create a retriever from the vector store
-# The retriever will be used to search for relevant documents based on a query
-# The search_kwargs specify the number of results to return (k=2 in this case)
-retriever = vector_store.as_retriever(
-    search_kwargs={"k": 2}
-)
\ No newline at end of file
+from genai_common import CachedEmbeddings
+
+CSV_PATH = "realistic_restaurant_reviews.csv"
+DB_LOCATION = "./chroma_langchain_db"
+COLLECTION_NAME = "restaurant_reviews"
+EMBED_MODEL = "mxbai-embed-large"
+# Number of reviews returned per question
+RETRIEVER_K = 2
+# Written by ingest.py at the end of every sync
+MANIFEST_NAME = "reviews_manifest.json"
+
+
+@lru_cache(maxsize=None)
+def get_vector_store(db_location: str = DB_LOCATION) -> Chroma:
+    # Vectors are cached on disk by (model, text), so rebuilding the DB doesn't re-embed
+    embeddings = CachedEmbeddings(OllamaEmbeddings(model=EMBED_MODEL), model_id=f"ollama/{EMBED_MODEL}")
+    return Chroma(
+        collection_name=COLLECTION_NAME,
+        persist_directory=db_location,
+        embedding_function=embeddings,
+    )
+
+
+def store_version(db_location: str = DB_LOCATION) -> Optional[int]:
+    """Changes whenever ingest.py syncs the store (mtime of its manifest); None before the first sync."""
+    try:
+        return os.stat(os.path.join(db_location, MANIFEST_NAME)).st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_retriever(k: int = RETRIEVER_K):
+    vector_store = get_vector_store()
+    # First run: fill the store so the agent works without a separate ingest step
+    if vector_store._collection.count() == 0:
+        from ingest import ingest_csv
+        ingest_csv(CSV_PATH, vector_store)
+    return vector_store.as_retriever(search_kwargs={"k": k})
+
+
+def __getattr__(name: str):
+    # Keeps `from vector import retriever` working without doing the work at import time
+    if name == "retriever":
+        return get_retriever()
+    if name == "vector_store":
+        return get_vector_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
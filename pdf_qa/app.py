@@ -1,54 +1,79 @@
+
 import streamlit as st
-import tempfile
 
 from pdf_rag_utils import (
-    extract_text_from_the_pdf,
-    text_splitter,
-    get_documents,
-    embed_and_store,
+    get_embeddings,
+    get_vector_store,
+    ingest_pdf,
+    search,
+    stream_answer,
     create_model
 )
 
 
-st.title("📄 PDF Q&A with Ollama + Chroma")
+# Model clients and the Chroma handle are built once per server process and
+# shared by every session and rerun, instead of once per browser session.
+@st.cache_resource
+def load_embeddings():
+    return get_embeddings()
+
+@st.cache_resource
+def load_vector_store():
+    return get_vector_store(embeddings=load_embeddings())
 
-uploaded_file = st.file_uploader("Upload a PDF file", type=["pdf"])
+@st.cache_resource
+def load_chain():
+    return create_model()
 
-# Store the vector store and chain across reruns
-if "vector_store" not in st.session_state:
-    st.session_state.vector_store = None
-    st.session_state.chain = None
-    st.session_state.text = None
 
-if uploaded_file is not None:
-    with st.spinner("🔍 Reading and processing PDF..."):
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(uploaded_file.read())
-            tmp_path = tmp.name
+st.title("📄 PDF Q&A with Ollama + Chroma")
+
+uploaded_files = st.file_uploader("Upload PDF files", type=["pdf"], accept_multiple_files=True)
 
-        # Run pipeline
-        if not st.session_state.text:
-            st.session_state.text = extract_text_from_the_pdf(tmp_path)
-            chunks = text_splitter(st.session_state.text)
-            # documents = get_documents(chunks)
-            print("How many time this is running?")
-            st.session_state.vector_store = embed_and_store(chunks)
-            st.session_state.chain = create_model()
-            print("Vector store loaded")
+# upload id -> (doc_id, file name), so reruns don't re-hash files already handled
+if "documents" not in st.session_state:
+    st.session_state.documents = {}
 
-    st.success("✅ PDF processed! Now enter a question.")
+active = []
+for uploaded_file in uploaded_files or []:
+    upload_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    if upload_id not in st.session_state.documents:
+        # Bytes are hashed and parsed in memory; no temp file
+        pdf_bytes = uploaded_file.getvalue()
+        with st.spinner(f"🔍 Reading and processing {uploaded_file.name}..."):
+            # Pages are extracted, chunked and embedded as a stream; the bar follows the pages.
+            # Already-indexed PDFs return immediately; changed ones only embed new chunks.
+            bar = st.progress(0.0, text="Reading pages...")
+            result = ingest_pdf(
+                pdf_bytes,
+                uploaded_file.name,
+                load_vector_store(),
+                progress=lambda done, total: bar.progress(done / max(total, 1), text=f"Indexed {done}/{total} pages"),
+            )
+            bar.empty()
+        st.session_state.documents[upload_id] = (result.doc_id, uploaded_file.name)
+        if result.already_indexed:
+            st.success(f"✅ {uploaded_file.name} already indexed!")
+        else:
+            st.success(f"✅ {uploaded_file.name} processed ({result.pages} pages, {result.embedded} of {result.chunks} chunks embedded)!")
+    active.append(st.session_state.documents[upload_id])
 
 # Question input + search button
-if st.session_state.vector_store:
-    question = st.text_input("Ask a question about the PDF:")
+if active:
+    names = {doc_id: name for doc_id, name in active}
+    selected = st.multiselect("Search in:", list(names), default=list(names), format_func=names.get)
+    question = st.text_input("Ask a question about the PDFs:")
     search_button = st.button("🔍 Search")
 
-    if search_button and question.strip():
-        with st.spinner("🤖 Generating answer..."):
-            retriever = st.session_state.vector_store.as_retriever(search_kwargs={"k": 3})
-            docs = retriever.invoke(question)
-            combined = "\n\n".join([doc.page_content for doc in docs])
-            result = st.session_state.chain.invoke({"content": combined, "question": question})
+    if search_button and question.strip() and selected:
+        with st.spinner("🔎 Finding relevant passages..."):
+            docs = search(load_vector_store(), question, selected, k=3)
+
+        st.markdown("### 💬 Answer:")
+        # Tokens are written as they arrive instead of after the whole answer
+        st.write_stream(stream_answer(load_chain(), docs, question))
 
-            st.markdown("### 💬 Answer:")
-            st.write(result)
+        with st.expander("Sources"):
+            for doc in docs:
+                st.caption(f"{names.get(doc.metadata.get('doc_id'), '?')}, page {doc.metadata.get('page')}")
+                st.write(doc.page_content)
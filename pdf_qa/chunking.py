@@ -0,0 +1,193 @@
+"""
+Token-aware, sentence/section-aware chunking with near-duplicate suppression.
+
+Chunks are packed from whole sentences up to `chunk_tokens`, never straddle a
+section heading once they are reasonably full, and carry at most
+`overlap_tokens` of trailing sentences into the next chunk. Repeated text
+(running headers, disclaimers, boilerplate pages) is dropped by a MinHash
+filter before it reaches the embedding model.
+"""
+import hashlib
+import re
+from dataclasses import dataclass, asdict
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # optional: fall back to a word/punctuation count
+    _ENCODING = None
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])")
+# Short line without final punctuation: "3.2 Configuration", "INSTALLATION", "Safety notes"
+_HEADING_RE = re.compile(r"^(?:\d+(?:\.\d+)*\.?\s+)?[A-Z][^.!?]{0,80}$")
+
+
+def count_tokens(text: str) -> int:
+    """Token count under cl100k_base when tiktoken is installed, else words + punctuation."""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(_TOKEN_RE.findall(text))
+
+
+@dataclass(frozen=True)
+class ChunkConfig:
+    chunk_tokens: int = 256
+    overlap_tokens: int = 32
+    # A section heading starts a new chunk once the current one is this full
+    min_fill: float = 0.5
+    # MinHash Jaccard estimate above which a chunk counts as a near-duplicate; None disables
+    dedup_threshold: Optional[float] = 0.85
+
+    def signature(self) -> str:
+        """Stable description, stored with indexed documents to detect setting changes."""
+        return ",".join(f"{k}={v}" for k, v in sorted(asdict(self).items()))
+
+
+DEFAULT_CHUNK_CONFIG = ChunkConfig()
+
+
+def split_sections(text: str) -> List[List[str]]:
+    """Paragraph-joined text grouped into sections, each a list of sentences."""
+    sections: List[List[str]] = [[]]
+    paragraph: List[str] = []
+
+    def flush_paragraph():
+        if paragraph:
+            joined = " ".join(paragraph)
+            sections[-1].extend(s.strip() for s in _SENTENCE_END_RE.split(joined) if s.strip())
+            paragraph.clear()
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            flush_paragraph()
+        elif _HEADING_RE.match(line) and len(line.split()) <= 10:
+            flush_paragraph()
+            if sections[-1]:
+                sections.append([])
+            sections[-1].append(line)
+        else:
+            # PDF text breaks lines mid-sentence; rejoin, undoing hyphenation
+            if paragraph and paragraph[-1].endswith("-") and line[:1].islower():
+                paragraph[-1] = paragraph[-1][:-1] + line
+            else:
+                paragraph.append(line)
+    flush_paragraph()
+    return [s for s in sections if s]
+
+
+def _split_long(sentence: str, max_tokens: int, count: Callable[[str], int]) -> List[str]:
+    """Break a sentence longer than max_tokens on word boundaries."""
+    parts, current = [], []
+    for word in sentence.split():
+        if current and count(" ".join(current + [word])) > max_tokens:
+            parts.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+def _overlap_tail(sentences: List[str], sizes: List[int], budget: int):
+    """Trailing sentences (never all of them) whose sizes fit in `budget` tokens."""
+    keep, used = 0, 0
+    while keep < len(sizes) - 1 and used + sizes[-1 - keep] <= budget:
+        used += sizes[-1 - keep]
+        keep += 1
+    return (sentences[len(sentences) - keep:], sizes[len(sizes) - keep:]) if keep else ([], [])
+
+
+def chunk_text(text: str, config: ChunkConfig = DEFAULT_CHUNK_CONFIG, count: Callable[[str], int] = count_tokens) -> List[str]:
+    """Pack sentences into chunks of at most config.chunk_tokens tokens."""
+    chunks: List[str] = []
+    current: List[str] = []
+    sizes: List[int] = []
+    fresh = 0   # sentences in `current` not already emitted as overlap
+
+    for section in split_sections(text):
+        if fresh and sum(sizes) >= config.min_fill * config.chunk_tokens:
+            chunks.append(" ".join(current))
+            current, sizes, fresh = [], [], 0   # no overlap across a section boundary
+        for sentence in section:
+            size = count(sentence)
+            pieces = [sentence] if size <= config.chunk_tokens else _split_long(sentence, config.chunk_tokens, count)
+            for piece in pieces:
+                piece_size = size if len(pieces) == 1 else count(piece)
+                if current and sum(sizes) + piece_size > config.chunk_tokens:
+                    chunks.append(" ".join(current))
+                    budget = min(config.overlap_tokens, config.chunk_tokens - piece_size)
+                    current, sizes = _overlap_tail(current, sizes, budget)
+                    fresh = 0
+                current.append(piece)
+                sizes.append(piece_size)
+                fresh += 1
+    if fresh:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+# MinHash parameters: NUM_PERM = BANDS * ROWS; a pair is a candidate if any band matches
+_NUM_PERM, _BANDS = 64, 16
+_ROWS = _NUM_PERM // _BANDS
+_rng = np.random.default_rng(1234)
+# Permutation i: (h ^ MASK[i]) * ODD[i] mod 2**64
+_MASK = _rng.integers(0, 2**63, _NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_ODD = _rng.integers(0, 2**63, _NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+
+def _shingles(text: str, k: int = 3) -> np.ndarray:
+    words = _TOKEN_RE.findall(text.lower())
+    grams = {" ".join(words[i:i + k]) for i in range(max(1, len(words) - k + 1))}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(g.encode(), digest_size=8).digest(), "little") for g in grams),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+def minhash(text: str) -> np.ndarray:
+    hashes = _shingles(text)
+    if hashes.size == 0:
+        return np.zeros(_NUM_PERM, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        return ((hashes[:, None] ^ _MASK) * _ODD).min(axis=0)
+
+
+class NearDuplicateFilter:
+    """
+    Remembers the chunks it has accepted and rejects ones whose estimated
+    Jaccard similarity (3-word shingles) to any of them is >= threshold.
+    LSH banding keeps each check close to constant time.
+    """
+
+    def __init__(self, threshold: float = 0.85):
+        self.threshold = threshold
+        self._signatures: List[np.ndarray] = []
+        self._buckets = [dict() for _ in range(_BANDS)]
+        self.dropped = 0
+
+    def accept(self, text: str) -> bool:
+        sig = minhash(text)
+        bands = [sig[b * _ROWS:(b + 1) * _ROWS].tobytes() for b in range(_BANDS)]
+        candidates = set()
+        for table, band in zip(self._buckets, bands):
+            candidates.update(table.get(band, ()))
+        for idx in candidates:
+            if np.mean(self._signatures[idx] == sig) >= self.threshold:
+                self.dropped += 1
+                return False
+        idx = len(self._signatures)
+        self._signatures.append(sig)
+        for table, band in zip(self._buckets, bands):
+            table.setdefault(band, []).append(idx)
+        return True
+
+
+def dedupe(chunks: Iterable[str], threshold: float = 0.85) -> List[str]:
+    f = NearDuplicateFilter(threshold)
+    return [c for c in chunks if f.accept(c)]
@@ -0,0 +1,250 @@
+"""
+Offline evaluation of chunking settings on a generated fixture PDF.
+
+    python eval_chunking.py
+    python eval_chunking.py --chunk-tokens 128,256,384 --overlap 0,32,64 --dedup 0.85,none -k 3
+    python eval_chunking.py --embed ollama --out chunking_eval.json
+
+For every setting it reports chunk count, tokens embedded, index size, embed
+time and retrieval recall@k / MRR on questions whose answers are known. The
+legacy splitter (300 chars, 200 overlap) is included as a baseline. The
+default embedder is a local hashing bag-of-words model, so the run needs no
+Ollama; pass --embed ollama to measure the real one.
+"""
+import argparse
+import json
+import random
+import re
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import fitz
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from chunking import ChunkConfig, count_tokens
+from pdf_extract import iter_pages
+from pdf_rag_utils import EMBED_MODEL, iter_chunks
+
+HEADER = "ACME X200 Industrial Controller - Operator Manual - Rev 3 - Confidential"
+
+# (section title, facts planted in that section, as (sentence, question, answer))
+SECTIONS = [
+    ("1. Introduction", [
+        ("The X200 controller was first released in March 2019 by the Rotterdam engineering group.",
+         "When was the X200 controller first released?", "March 2019"),
+    ]),
+    ("2. Safety Notes", [
+        ("Never open the controller housing while the supply voltage exceeds 48 volts.",
+         "Above what supply voltage must the housing stay closed?", "48 volts"),
+        ("The emergency stop circuit must be tested every 90 days.",
+         "How often must the emergency stop circuit be tested?", "90 days"),
+    ]),
+    ("3. Installation", [
+        ("Mount the controller on a DIN rail with at least 35 millimetres of clearance above it.",
+         "How much clearance is needed above the controller?", "35 millimetres"),
+        ("Use shielded twisted-pair cable of type LIYCY for all analog inputs.",
+         "Which cable type is required for the analog inputs?", "LIYCY"),
+    ]),
+    ("4. Network Configuration", [
+        ("The default port for the web configuration server is 8042.",
+         "What is the default port of the web configuration server?", "8042"),
+        ("The factory default IP address of the controller is 192.168.7.20.",
+         "What is the factory default IP address?", "192.168.7.20"),
+        ("Modbus TCP polling should not be faster than every 250 milliseconds.",
+         "What is the fastest allowed Modbus TCP polling interval?", "250 milliseconds"),
+    ]),
+    ("5. Operation", [
+        ("Pressing the MODE key for five seconds switches the controller to manual override.",
+         "How do you switch the controller to manual override?", "five seconds"),
+        ("The status LED blinks amber when the controller is waiting for a firmware image.",
+         "What does an amber blinking status LED mean?", "waiting for a firmware image"),
+    ]),
+    ("6. Maintenance", [
+        ("Replace the backup battery, a CR2477 cell, every four years.",
+         "Which backup battery does the controller use?", "CR2477"),
+        ("Clean the cooling fan filter with compressed air at most 2 bar.",
+         "What pressure may be used to clean the fan filter?", "2 bar"),
+    ]),
+    ("7. Troubleshooting", [
+        ("Error code E17 indicates that the internal temperature exceeded 70 degrees Celsius.",
+         "What does error code E17 indicate?", "70 degrees Celsius"),
+        ("If the display shows E31, the calibration table is corrupted and must be reloaded.",
+         "What should be done when the display shows E31?", "calibration table"),
+    ]),
+    ("8. Technical Data", [
+        ("The controller draws a maximum of 14 watts at full load.",
+         "What is the maximum power draw?", "14 watts"),
+        ("The operating temperature range is from minus 20 to plus 55 degrees Celsius.",
+         "What is the operating temperature range?", "minus 20 to plus 55"),
+    ]),
+]
+
+_SUBJECTS = ["The controller", "Each input module", "The firmware", "The operator panel", "The relay board",
+             "The network interface", "The logging service", "Every output channel", "The power supply"]
+_VERBS = ["monitors", "reports", "buffers", "validates", "synchronises", "records", "limits", "protects"]
+_OBJECTS = ["the process values", "all configuration changes", "the alarm history", "incoming commands",
+            "the supply rails", "sensor readings", "the output states", "the event journal"]
+_TAILS = ["during normal operation", "when the system starts", "according to the active profile",
+          "before any change is applied", "at a fixed interval", "without operator action"]
+# Repeated between chapters, as manuals do; a page of its own each time
+LEGAL_PAGE = (
+    "Legal Notice\n\n"
+    "The information in this manual is subject to change without notice and does not represent a "
+    "commitment on the part of the manufacturer. No part of this manual may be reproduced or transmitted "
+    "in any form or by any means without the written permission of the manufacturer. The manufacturer "
+    "accepts no liability for damage resulting from improper installation, operation or maintenance of "
+    "the equipment described here. Observe all local regulations for electrical installations. Keep this "
+    "manual near the equipment for the entire service life of the product."
+)
+
+
+def _filler(rng: random.Random, sentences: int) -> str:
+    return " ".join(
+        f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} {rng.choice(_TAILS)}."
+        for _ in range(sentences)
+    )
+
+
+def fixture_text(seed: int = 7) -> Tuple[str, List[Tuple[str, str]]]:
+    """(manual text, [(question, answer)]); the same seed gives the same text."""
+    rng = random.Random(seed)
+    parts, questions = [], []
+    for title, facts in SECTIONS:
+        parts.append(title)
+        for fact, question, answer in facts:
+            parts.append(f"{_filler(rng, 6)} {fact} {_filler(rng, 5)}")
+            questions.append((question, answer))
+        parts.append(_filler(rng, 8))
+        parts.append(f"\f{LEGAL_PAGE}\f")
+    return "\n\n".join(parts), questions
+
+
+def make_fixture_pdf(text: str, lines_per_page: int = 48) -> bytes:
+    """
+    Lay `text` out on A4 pages with a running header and page footer, like a
+    real manual; a form feed forces a page break.
+    """
+    pages: List[List[str]] = []
+    for block in text.split("\f"):
+        wrapped: List[str] = []
+        for paragraph in block.strip().split("\n\n"):
+            line = ""
+            for word in paragraph.split():
+                if len(line) + len(word) + 1 > 95:
+                    wrapped.append(line)
+                    line = word
+                else:
+                    line = f"{line} {word}".strip()
+            wrapped += [line, ""]
+        if any(wrapped):
+            pages += [wrapped[i:i + lines_per_page] for i in range(0, len(wrapped), lines_per_page)]
+    doc = fitz.open()
+    for n, lines in enumerate(pages, 1):
+        page = doc.new_page()
+        page.insert_text((40, 30), HEADER, fontsize=8)
+        page.insert_textbox(fitz.Rect(40, 50, 560, 790), "\n".join(lines), fontsize=9)
+        page.insert_text((270, 820), f"Page {n} of {len(pages)}", fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline bag-of-words embedding (hashed unigrams + bigrams, L2-normalised)."""
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"\w+", text.lower())
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            vec[zlib.crc32(term.encode()) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def legacy_chunks(pdf_bytes: bytes) -> List[str]:
+    """What pdf_qa used to index: 300-char chunks with 200 chars of overlap, no dedup."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=300, chunk_overlap=200, separators=["\n\n", "\n", ".", " "])
+    return [c for _, text in iter_pages(pdf_bytes) for c in splitter.split_text(text)]
+
+
+def evaluate(chunks: List[str], questions: List[Tuple[str, str]], embeddings: Embeddings, k: int) -> Dict[str, float]:
+    started = time.perf_counter()
+    matrix = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+    embed_s = time.perf_counter() - started
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    hits, reciprocal = 0, 0.0
+    for question, answer in questions:
+        q = np.asarray(embeddings.embed_query(question), dtype=np.float32)
+        top = np.argsort(-(matrix @ (q / (np.linalg.norm(q) + 1e-12))))[:k]
+        rank = next((r for r, i in enumerate(top, 1) if answer.lower() in chunks[i].lower()), None)
+        if rank:
+            hits += 1
+            reciprocal += 1 / rank
+    return {
+        "chunks": len(chunks),
+        "tokens_embedded": sum(count_tokens(c) for c in chunks),
+        "index_bytes": int(matrix.nbytes + sum(len(c.encode("utf-8")) for c in chunks)),
+        "embed_s": round(embed_s, 3),
+        f"recall@{k}": round(hits / len(questions), 3),
+        "mrr": round(reciprocal / len(questions), 3),
+    }
+
+
+def _parse_list(value: str, cast) -> List:
+    return [None if v.strip().lower() == "none" else cast(v) for v in value.split(",")]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-tokens", default="128,256,384")
+    parser.add_argument("--overlap", default="0,32")
+    parser.add_argument("--dedup", default="0.85,none", help="near-duplicate thresholds; 'none' disables")
+    parser.add_argument("-k", type=int, default=3, help="retrieved chunks per question")
+    parser.add_argument("--embed", choices=["hashing", "ollama"], default="hashing")
+    parser.add_argument("--out", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.embed == "ollama":
+        from langchain_ollama import OllamaEmbeddings
+        embeddings: Embeddings = OllamaEmbeddings(model=EMBED_MODEL)
+    else:
+        embeddings = HashingEmbeddings()
+
+    text, questions = fixture_text()
+    pdf_bytes = make_fixture_pdf(text)
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        print(f"Fixture: {doc.page_count} pages, {len(questions)} questions, embedder={args.embed}\n")
+
+    rows = [{"setting": "legacy 300/200 chars", **evaluate(legacy_chunks(pdf_bytes), questions, embeddings, args.k)}]
+    for size in _parse_list(args.chunk_tokens, int):
+        for overlap in _parse_list(args.overlap, int):
+            for dedup in _parse_list(args.dedup, float):
+                config = ChunkConfig(chunk_tokens=size, overlap_tokens=overlap, dedup_threshold=dedup)
+                chunks = [c for _, _, _, c in iter_chunks(iter_pages(pdf_bytes), config)]
+                label = f"{size} tok / {overlap} overlap / dedup {dedup if dedup else 'off'}"
+                rows.append({"setting": label, **config.__dict__, **evaluate(chunks, questions, embeddings, args.k)})
+
+    columns = ["chunks", "tokens_embedded", "index_bytes", "embed_s", f"recall@{args.k}", "mrr"]
+    print(f"{'setting':<36}" + "".join(f"{c:>16}" for c in columns))
+    for row in rows:
+        print(f"{row['setting']:<36}" + "".join(f"{row[c]:>16}" for c in columns))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"embedder": args.embed, "k": args.k, "results": rows}, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
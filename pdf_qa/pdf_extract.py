@@ -0,0 +1,87 @@
+"""
+Page-level PDF text extraction. Kept free of LangChain/Chroma imports so
+process-pool workers start quickly.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from itertools import islice
+from multiprocessing import shared_memory
+from typing import Iterator, List, Optional, Tuple
+
+import fitz
+
+# Documents with at least this many pages are extracted in a process pool
+PARALLEL_MIN_PAGES = 64
+PAGES_PER_TASK = 8
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    One pool per process, reused across documents: starting workers costs far
+    more than extracting a page. spawn, not fork: Streamlit's server threads
+    make forking unsafe.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, cancel_futures=True)
+        return _pool
+
+def _extract_range(shm_name: str, size: int, start: int, end: int) -> List[Tuple[int, str]]:
+    """Worker side: open the shared PDF for one range only, so idle workers hold no document."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        doc = fitz.open(stream=bytes(shm.buf[:size]), filetype="pdf")
+    finally:
+        shm.close()
+    try:
+        return [(i + 1, doc[i].get_text()) for i in range(start, end)]
+    finally:
+        doc.close()
+
+def iter_pages(pdf_bytes: bytes, parallel: Optional[bool] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (1-based page number, text) in page order, as pages are extracted.
+    Documents of PARALLEL_MIN_PAGES or more (or any, with parallel=True) are
+    split into page ranges handled by the shared process pool; the PDF is
+    handed to the workers through shared memory, and a bounded number of
+    ranges is in flight so pages stream out as they complete.
+    """
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    page_count = doc.page_count
+    if parallel is None:
+        parallel = page_count >= PARALLEL_MIN_PAGES and MAX_WORKERS > 1
+    if not parallel:
+        try:
+            for i, page in enumerate(doc):
+                yield i + 1, page.get_text()
+        finally:
+            doc.close()
+        return
+    doc.close()
+
+    pool = _get_pool()
+    shm = shared_memory.SharedMemory(create=True, size=len(pdf_bytes))
+    pending = []
+    try:
+        shm.buf[:len(pdf_bytes)] = pdf_bytes
+        ranges = ((s, min(s + PAGES_PER_TASK, page_count)) for s in range(0, page_count, PAGES_PER_TASK))
+        submit = lambda r: pool.submit(_extract_range, shm.name, len(pdf_bytes), *r)
+        pending = [submit(r) for r in islice(ranges, 2 * MAX_WORKERS)]
+        while pending:
+            pages = pending.pop(0).result()
+            pending.extend(submit(r) for r in islice(ranges, 1))
+            yield from pages
+    finally:
+        # The consumer may stop early; don't leave queued ranges behind, and let
+        # ranges already running finish before their shared memory goes away
+        wait([future for future in pending if not future.cancel()])
+        shm.close()
+        shm.unlink()
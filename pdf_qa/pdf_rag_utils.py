@@ -1,6 +1,9 @@
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 import fitz
+import hashlib
+import json
 import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from langchain_ollama import OllamaEmbeddings
 from langchain_core.documents import Document
@@ -9,38 +12,206 @@ from langchain_chroma import Chroma
 from langchain_ollama.llms import OllamaLLM
 from langchain_core.prompts import ChatPromptTemplate
 
+from genai_common import CachedEmbeddings
+from chunking import ChunkConfig, DEFAULT_CHUNK_CONFIG, NearDuplicateFilter, chunk_text
+from pdf_extract import iter_pages
+
+PERSIST_DIR = "./pdf_store_dir"
+COLLECTION_NAME = "pdf_store"
+EMBED_MODEL = "mxbai-embed-large"
+MANIFEST_NAME = "documents.json"
+# Chroma caps the size of a single add/get; stay well below it
+STORE_BATCH_SIZE = 500
+# Chunks per embed+store round; extraction keeps running meanwhile
+EMBED_BATCH_SIZE = 64
+
 def extract_text_from_the_pdf(pdf_path:str) -> str:
-    doc = fitz.open(pdf_path)
-    full_text = ""
-    for page in doc:
-        full_text += page.get_text()
-    doc.close()
-    return full_text
-
-def text_splitter(text:str, chunk_size=300, chunk_overlap=200):
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ".", " "]
-    )
-    return splitter.split_text(text)
+    with open(pdf_path, "rb") as f:
+        return "".join(text for _, text in iter_pages(f.read()))
+
+def text_splitter(text:str, config: ChunkConfig = DEFAULT_CHUNK_CONFIG):
+    """Token-sized, sentence-aligned chunks (see chunking.py; tune with eval_chunking.py)."""
+    return chunk_text(text, config)
 
 def get_documents(chunks):
     return [Document(chunk) for chunk in chunks]
 
-def embed_and_store(chunks, persist_dir="./pdf_store_dir"):
-    add_documents = not os.path.exists(persist_dir)
-    embeddings = OllamaEmbeddings(model="mxbai-embed-large")
-    vector_store = Chroma(
-        collection_name="pdf_store",
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def iter_chunks(
+    pages: Iterable[Tuple[int, str]],
+    config: ChunkConfig = DEFAULT_CHUNK_CONFIG,
+) -> Iterator[Tuple[int, int, str, str]]:
+    """
+    (page number, chunk index within page, page hash, chunk text), one page at a time.
+    Near-duplicates of earlier chunks in the document (running headers,
+    repeated notices) are skipped; indexes keep counting so ids stay stable.
+    """
+    seen = NearDuplicateFilter(config.dedup_threshold) if config.dedup_threshold else None
+    for page_no, page_text in pages:
+        page_hash = hash_text(page_text)
+        for i, chunk in enumerate(text_splitter(page_text, config)):
+            if seen is None or seen.accept(chunk):
+                yield page_no, i, page_hash, chunk
+
+def get_embeddings() -> CachedEmbeddings:
+    """Ollama embeddings behind the shared on-disk cache (also used by local_ai_agent)."""
+    return CachedEmbeddings(OllamaEmbeddings(model=EMBED_MODEL), model_id=f"ollama/{EMBED_MODEL}")
+
+def get_vector_store(persist_dir=PERSIST_DIR, embeddings=None) -> Chroma:
+    """One collection for all PDFs; each chunk carries its document's content hash as `doc_id`."""
+    return Chroma(
+        collection_name=COLLECTION_NAME,
         persist_directory=persist_dir,
-        embedding_function=embeddings,
+        embedding_function=embeddings or get_embeddings(),
+    )
+
+@dataclass
+class IngestResult:
+    doc_id: str
+    pages: int
+    chunks: int
+    embedded: int           # chunks sent to the embedding model
+    already_indexed: bool
+
+def load_manifest(persist_dir=PERSIST_DIR) -> Dict[str, dict]:
+    """doc_id -> {source, pages, chunks} for every fully ingested PDF."""
+    path = os.path.join(persist_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _record_document(persist_dir: str, doc_id: str, info: dict) -> None:
+    manifest = load_manifest(persist_dir)
+    manifest[doc_id] = info
+    os.makedirs(persist_dir, exist_ok=True)
+    tmp = os.path.join(persist_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(persist_dir, MANIFEST_NAME))
+
+def _known_embeddings(vector_store: Chroma, chunk_hashes: List[str]) -> Dict[str, List[float]]:
+    """Embeddings already stored for any of these chunk texts (from this or another document)."""
+    found = {}
+    unique = list(dict.fromkeys(chunk_hashes))
+    for i in range(0, len(unique), STORE_BATCH_SIZE):
+        batch = unique[i:i + STORE_BATCH_SIZE]
+        got = vector_store.get(where={"chunk_hash": {"$in": batch}}, include=["embeddings", "metadatas"])
+        for meta, emb in zip(got["metadatas"], got["embeddings"]):
+            found.setdefault(meta["chunk_hash"], [float(x) for x in emb])
+    return found
+
+def _store_batch(vector_store: Chroma, ids: List[str], texts: List[str], metadatas: List[dict]) -> int:
+    """Embed what the store doesn't know yet, then upsert; returns how many texts were embedded."""
+    known = _known_embeddings(vector_store, [m["chunk_hash"] for m in metadatas])
+    # First occurrence of each chunk text that has no stored embedding yet
+    missing, seen = [], set()
+    for i, meta in enumerate(metadatas):
+        if meta["chunk_hash"] not in known and meta["chunk_hash"] not in seen:
+            seen.add(meta["chunk_hash"])
+            missing.append(i)
+    if missing:
+        vectors = vector_store.embeddings.embed_documents([texts[i] for i in missing])
+        for i, vec in zip(missing, vectors):
+            known[metadatas[i]["chunk_hash"]] = vec
+    vector_store._collection.upsert(
+        ids=ids,
+        documents=texts,
+        metadatas=metadatas,
+        embeddings=[known[m["chunk_hash"]] for m in metadatas],
     )
-    if not add_documents:
-        documents = get_documents(chunks)
-        vector_store.add_documents(documents)
-    print("Vector store created successfully!")
-    return vector_store
+    return len(missing)
+
+def ingest_pdf(
+    pdf_bytes: bytes,
+    source: str,
+    vector_store: Optional[Chroma] = None,
+    persist_dir: str = PERSIST_DIR,
+    progress=None,
+    chunk_config: ChunkConfig = DEFAULT_CHUNK_CONFIG,
+) -> IngestResult:
+    """
+    Index a PDF keyed by its content hash. Re-uploading the same file is a no-op;
+    a revised file only embeds chunks whose text is not in the store yet.
+    Chunk ids are deterministic: <doc hash>:<page>:<chunk index>.
+    Pages are extracted and chunked as a stream and stored every
+    EMBED_BATCH_SIZE chunks, so embedding starts before extraction ends.
+    `progress(pages_done, page_count)` is called after each stored batch.
+    A document is only recorded in the manifest once fully stored, so an
+    interrupted ingest is simply resumed by the next upload. Changing
+    `chunk_config` re-chunks the document and removes its stale chunks.
+    """
+    vector_store = vector_store or get_vector_store(persist_dir)
+    doc_id = hash_bytes(pdf_bytes)
+    entry = load_manifest(persist_dir).get(doc_id)
+    if entry and entry.get("chunking") == chunk_config.signature():
+        print(f"{source} ({doc_id[:12]}) already indexed")
+        return IngestResult(doc_id, 0, 0, 0, already_indexed=True)
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+    ids, texts, metadatas = [], [], []
+    chunks = embedded = 0
+    last_page = 0
+    all_ids = set()
+    for page_no, i, page_hash, chunk in iter_chunks(iter_pages(pdf_bytes), chunk_config):
+        ids.append(f"{doc_id}:{page_no}:{i}")
+        all_ids.add(ids[-1])
+        texts.append(chunk)
+        metadatas.append({
+            "doc_id": doc_id,
+            "source": source,
+            "page": page_no,
+            "page_hash": page_hash,
+            "chunk_hash": hash_text(chunk),
+        })
+        last_page = page_no
+        if len(ids) >= EMBED_BATCH_SIZE:
+            embedded += _store_batch(vector_store, ids, texts, metadatas)
+            chunks += len(ids)
+            ids, texts, metadatas = [], [], []
+            if progress:
+                progress(last_page, page_count)
+    if ids:
+        embedded += _store_batch(vector_store, ids, texts, metadatas)
+        chunks += len(ids)
+    if progress:
+        progress(page_count, page_count)
+
+    # Chunks from an earlier ingest with other settings
+    stale = [i for i in vector_store.get(where={"doc_id": doc_id}, include=[])["ids"] if i not in all_ids]
+    if stale:
+        vector_store.delete(ids=stale)
+
+    _record_document(persist_dir, doc_id, {
+        "source": source, "pages": page_count, "chunks": chunks, "chunking": chunk_config.signature(),
+    })
+    print(f"Indexed {source} ({doc_id[:12]}): {page_count} pages, {chunks} chunks, {embedded} embedded")
+    return IngestResult(doc_id, page_count, chunks, embedded, already_indexed=False)
+
+def doc_filter(doc_ids: Sequence[str]) -> dict:
+    """Chroma `where` clause matching chunks of any of these documents."""
+    if len(doc_ids) == 1:
+        return {"doc_id": doc_ids[0]}
+    return {"doc_id": {"$in": list(doc_ids)}}
+
+def get_retriever(vector_store: Chroma, doc_id: str, k: int = 3):
+    """Retriever restricted to one document's chunks."""
+    return vector_store.as_retriever(search_kwargs={"k": k, "filter": doc_filter([doc_id])})
+
+def search(vector_store: Chroma, question: str, doc_ids: Sequence[str], k: int = 3) -> List[Document]:
+    """Top-k chunks for `question` across the given documents, without building a retriever."""
+    return vector_store.similarity_search(question, k=k, filter=doc_filter(doc_ids))
+
+def stream_answer(chain, docs: List[Document], question: str) -> Iterator[str]:
+    """Answer tokens as the model produces them."""
+    combined = "\n\n".join(doc.page_content for doc in docs)
+    yield from chain.stream({"content": combined, "question": question})
 
 def create_model(model:str = "llama3"):
     model = OllamaLLM(model=model)